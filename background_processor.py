@@ -1,19 +1,62 @@
 # background_processor.py
 
 from PyQt6.QtCore import QThread, pyqtSignal
-import queue
+import inspect
+import itertools
 import logging
+import multiprocessing
 import os
-from concurrent.futures import ThreadPoolExecutor
-from dataclasses import dataclass
-from typing import Callable
+import pickle
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional
 from enum import Enum
-from queue import PriorityQueue
+from config import CONFIG
+from task_journal import TaskJournal
+from progress_tracker import ProgressTracker, ProgressReporter
 
 class TaskType(Enum):
     FILE_CONVERSION = "file_conversion"
     TEXT_EXTRACTION = "text_extraction"
     FILE_ORGANIZATION = "file_organization"
+    DUPLICATE_CHECK = "duplicate_check"
+    BATCH_CONVERSION = "batch_conversion"
+
+# Which execution lane each task type runs on unless add_task overrides it
+LANE_FOR_TASK_TYPE = {
+    TaskType.TEXT_EXTRACTION: "cpu",
+    TaskType.FILE_CONVERSION: "com",
+    TaskType.FILE_ORGANIZATION: "io",
+    TaskType.DUPLICATE_CHECK: "io",
+    TaskType.BATCH_CONVERSION: "com",
+}
+
+class TaskCancelledError(Exception):
+    """Raised inside a running task once its cancellation token is triggered."""
+    pass
+
+class CancellationToken:
+    """Thread-safe flag that long-running work polls to stop early."""
+
+    def __init__(self, event=None):
+        # A multiprocessing.Manager event lets the flag cross into process-pool workers
+        self._event = event if event is not None else threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """Raise TaskCancelledError if cancellation has been requested."""
+        if self._event.is_set():
+            raise TaskCancelledError("Task was cancelled")
 
 @dataclass
 class Task:
@@ -22,80 +65,655 @@ class Task:
     args: tuple
     kwargs: dict
     callback: Callable = None
+    errback: Callable = None  # called with the error when the task fails or is cancelled
+    priority: int = 0
+    token: CancellationToken = field(default_factory=CancellationToken)
+    enqueued_at: float = field(default_factory=time.monotonic)
+    sequence: int = 0
+    state: str = "queued"
+    lane: str = "io"
+    task_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    replay_name: Optional[str] = None
+    coalesce_key: Optional[str] = None
+
+    @property
+    def file_path(self) -> Optional[str]:
+        if self.args and isinstance(self.args[0], str):
+            return self.args[0]
+        return None
+
+    def effective_priority(self, now, aging_interval):
+        """Lower is sooner; every aging_interval seconds in the queue promotes the task one level."""
+        if not aging_interval:
+            return self.priority
+        return self.priority - (now - self.enqueued_at) / aging_interval
+
+class TaskHandle:
+    """Returned by BackgroundProcessor.add_task so callers can cancel queued or running work."""
+
+    def __init__(self, task, processor):
+        self._task = task
+        self._processor = processor
+
+    @property
+    def task_type(self):
+        return self._task.type
+
+    @property
+    def cancelled(self):
+        return self._task.token.cancelled
+
+    @property
+    def done(self):
+        return self._task.state in ("completed", "failed", "cancelled")
+
+    def cancel(self):
+        """Cancel the task; returns True if it had not finished yet."""
+        return self._processor.cancel_task(self._task)
+
+class ExecutionLane:
+    """A bounded executor with its own pending queue, concurrency limit and counters."""
+
+    def __init__(self, name, max_workers):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.pending = []
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.executor = None
+        self.hooks = []  # [func, interval, last_run, on_shutdown]
+
+    def has_capacity(self):
+        return self.running < self.max_workers
+
+    def pop_next(self, now, aging_interval, eligible=None):
+        """Remove and return the eligible pending task with the best aged priority, or None."""
+        candidates = [t for t in self.pending if eligible is None or eligible(t)]
+        if not candidates:
+            return None
+        task = min(
+            candidates,
+            key=lambda t: (t.effective_priority(now, aging_interval), t.sequence)
+        )
+        self.pending.remove(task)
+        return task
+
+    def new_token(self):
+        return CancellationToken()
+
+    def progress_sink(self, tracker):
+        """Where this lane's ProgressReporters send updates; thread lanes write straight to the tracker."""
+        return tracker
+
+    def drain_progress(self, tracker):
+        pass
+
+    def accepts(self, task):
+        return True
+
+    def submit(self, task):
+        return self.executor.submit(task.func, *task.args, **task.kwargs)
+
+    def add_hook(self, func, interval, on_shutdown=None):
+        self.hooks.append([func, interval, time.monotonic(), on_shutdown])
+
+    def run_idle_hooks(self, now):
+        """Run due maintenance hooks on the lane's own worker thread while it has nothing to do."""
+        if self.running or self.pending or not self.executor:
+            return
+        for hook in self.hooks:
+            func, interval, last_run, _ = hook
+            if now - last_run >= interval:
+                hook[2] = now
+                self.executor.submit(func).add_done_callback(self._log_hook_error)
+
+    def run_shutdown_hooks(self, timeout=30):
+        for _, _, _, on_shutdown in self.hooks:
+            if on_shutdown and self.executor:
+                try:
+                    self.executor.submit(on_shutdown).result(timeout=timeout)
+                except Exception as e:
+                    logging.warning(f"Shutdown hook failed on {self.name} lane: {e}")
+
+    def _log_hook_error(self, future):
+        if future.exception():
+            logging.warning(f"Maintenance hook failed on {self.name} lane: {future.exception()}")
+
+    def metrics(self):
+        return {
+            'max_workers': self.max_workers,
+            'queued': len(self.pending),
+            'running': self.running,
+            'completed': self.completed,
+            'failed': self.failed,
+            'cancelled': self.cancelled,
+        }
+
+    def shutdown(self):
+        if self.executor:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+
+class ThreadLane(ExecutionLane):
+    """Thread pool for I/O-bound work such as copies and moves."""
+
+    def __init__(self, name, max_workers):
+        super().__init__(name, max_workers)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"lane-{name}")
+
+class StaLane(ExecutionLane):
+    """One long-lived thread initialised as a COM single-threaded apartment for Office automation."""
+
+    def __init__(self, name):
+        super().__init__(name, 1)
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"lane-{name}", initializer=initialize_sta
+        )
+
+class ProcessLane(ExecutionLane):
+    """Warm process pool for CPU-bound work (OCR, text extraction) that would otherwise hold the GIL."""
+
+    def __init__(self, name, max_workers):
+        super().__init__(name, max_workers)
+        self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        self._manager = None
+        self._manager_lock = threading.Lock()
+        self._progress_queue = None
+
+    def _get_manager(self):
+        """Start (once) the manager process that backs cross-process cancellation tokens."""
+        with self._manager_lock:
+            if self._manager is None:
+                self._manager = multiprocessing.Manager()
+            return self._manager
+
+    def warm(self):
+        """Start the worker processes and their imports now instead of on the first task."""
+        try:
+            self._get_manager()
+            for _ in range(self.max_workers):
+                self.executor.submit(_warm_worker)
+        except Exception as e:
+            logging.warning(f"Could not warm {self.name} process lane: {e}")
+
+    def new_token(self):
+        try:
+            return CancellationToken(self._get_manager().Event())
+        except Exception as e:
+            logging.warning(f"Falling back to a thread-local cancellation token: {e}")
+            return CancellationToken()
+
+    def progress_sink(self, tracker):
+        try:
+            if self._progress_queue is None:
+                self._progress_queue = self._get_manager().Queue()
+            return self._progress_queue
+        except Exception as e:
+            logging.warning(f"Progress reporting unavailable on {self.name} lane: {e}")
+            return tracker
+
+    def drain_progress(self, tracker):
+        """Move progress messages sent by worker processes into the tracker."""
+        if self._progress_queue is None:
+            return
+        try:
+            while True:
+                tracker.put(self._progress_queue.get_nowait())
+        except queue.Empty:
+            pass
+        except Exception as e:
+            logging.debug(f"Could not drain progress from {self.name} lane: {e}")
+
+    def accepts(self, task):
+        """Process workers need the function and its arguments to be picklable."""
+        try:
+            pickle.dumps((task.func, task.args, task.kwargs))
+            return True
+        except Exception:
+            return False
+
+    def shutdown(self):
+        super().shutdown()
+        if self._manager:
+            self._manager.shutdown()
 
 class BackgroundProcessor(QThread):
     task_completed = pyqtSignal(TaskType, object)
     task_failed = pyqtSignal(TaskType, str)
+    task_cancelled = pyqtSignal(TaskType)
     progress_updated = pyqtSignal(int)
+    progress_eta = pyqtSignal(float)  # seconds remaining across all active tasks, -1 if unknown
 
-    def __init__(self, max_workers=None):
+    def __init__(self, max_workers=None, aging_interval=10.0, lane_limits=None, journal=None,
+                 frame_budget=0.1):
         super().__init__()
-        self.task_queue = PriorityQueue()
-        self.executor = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count())
         self.running = True
+        self.progress = ProgressTracker(frame_budget)
+        self.journal = journal
+        self._replay_handlers = {}
+        self._batch_handlers = {}
+        self.aging_interval = aging_interval  # seconds of waiting per priority level gained
+        limits = {
+            'cpu': max(1, (os.cpu_count() or 2) - 1),
+            'io': max_workers or 4,
+        }
+        limits.update(lane_limits or {})
+        self.lanes = {
+            'cpu': ProcessLane('cpu', limits['cpu']),
+            'com': StaLane('com'),
+            'io': ThreadLane('io', limits['io']),
+        }
+        self._active = {}
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
         self._processed_files = set()
 
     def update_progress(self, progress):
         self.progress_updated.emit(progress)
 
-    def add_task(self, priority, task_type, func, *args, callback=None, **kwargs):
-        if args and isinstance(args[0], str) and os.path.isfile(args[0]):
-            file_path = args[0]
-            if file_path in self._processed_files or self.is_processing_file(file_path):
-                logging.info(f"File already processed or in queue: {file_path}")
-                return
-            self._processed_files.add(file_path)
-            
-        task = Task(task_type, func, args, kwargs, callback)
-        self.task_queue.put((priority, task))
-        logging.debug(f"Added task to queue with priority {priority}: {task_type.value}")
+    def register_replay_handler(self, name, func):
+        """Make func replayable from the journal under name."""
+        self._replay_handlers[name] = func
+
+    def register_batch_handler(self, coalesce_key, func, window=0.5, max_batch=25):
+        """
+        Run tasks queued with coalesce_key together through func.
+
+        A coalescible task waits up to window seconds so that others with the same key can
+        join it. func receives a list of (args, kwargs) pairs and returns one result per
+        item, in order; an Exception in the list fails just that item.
+        """
+        self._batch_handlers[coalesce_key] = (func, window, max_batch)
+
+    def register_lane_hook(self, lane_name, func, interval=60.0, on_shutdown=None):
+        """
+        Run func every interval seconds on the named lane's worker thread while the lane is idle,
+        and on_shutdown once from stop() before the lane's executor goes away.
+
+        Thread-affine resources such as COM objects created on the com lane must be released
+        from that same thread, which is what these hooks are for.
+        """
+        self.lanes[lane_name].add_hook(func, interval, on_shutdown)
+
+    def add_task(self, priority, task_type, func, *args, callback=None, errback=None, lane=None,
+                 replay_name=None, task_id=None, coalesce_key=None, **kwargs):
+        """
+        Queue func on its task type's lane and return a TaskHandle (None if the file was already processed).
+
+        Tasks given a replay_name registered with register_replay_handler are journaled and
+        resumed by resume_unfinished() if the app exits before they finish. Tasks given a
+        coalesce_key registered with register_batch_handler may run as part of a batch.
+        """
+        task = Task(task_type, func, args, kwargs, callback, errback, priority=priority,
+                    replay_name=replay_name, coalesce_key=coalesce_key)
+        if task_id:
+            task.task_id = task_id
+        journal_kwargs = dict(kwargs)
+        file_path = task.file_path if task.file_path and os.path.isfile(task.file_path) else None
+        execution_lane = self._select_lane(task, lane or LANE_FOR_TASK_TYPE.get(task_type, 'io'))
+
+        with self._condition:
+            if any(t.task_id == task.task_id for t in self._all_tasks()):
+                logging.info(f"Task already queued: {task.task_id}")
+                return None
+            if file_path:
+                existing = self._find_file_task(task_type, file_path)
+                if existing:
+                    logging.info(f"File already in queue: {file_path}")
+                    return TaskHandle(existing, self)
+                if (task_type, file_path) in self._processed_files:
+                    logging.info(f"File already processed: {file_path}")
+                    return None
+                self._processed_files.add((task_type, file_path))
+
+            task.sequence = next(self._sequence)
+            task.lane = execution_lane.name
+            if self._is_journaled(task):
+                self.journal.record_enqueue(
+                    task.task_id, task_type.value, replay_name, args, journal_kwargs, priority
+                )
+            execution_lane.pending.append(task)
+            self._condition.notify()
+
+        logging.debug(f"Added task to {task.lane} lane with priority {priority}: {task_type.value}")
+        return TaskHandle(task, self)
+
+    def _select_lane(self, task, lane_name):
+        """Bind the task's cancellation token for lane_name, falling back to the I/O lane if it can't run there."""
+        execution_lane = self.lanes.get(lane_name, self.lanes['io'])
+        self._bind_to_lane(task, execution_lane)
+        if execution_lane.accepts(task):
+            return execution_lane
+
+        logging.debug(f"Task {task.type.value} cannot run on {lane_name} lane; using io lane")
+        execution_lane = self.lanes['io']
+        self._bind_to_lane(task, execution_lane)
+        return execution_lane
+
+    def _bind_to_lane(self, task, execution_lane):
+        """Give the task a cancellation token and progress reporter that work on execution_lane."""
+        task.token = execution_lane.new_token()
+        if _accepts_kwarg(task.func, 'cancel_token'):
+            task.kwargs['cancel_token'] = task.token
+        if _accepts_kwarg(task.func, 'progress'):
+            sink = execution_lane.progress_sink(self.progress)
+            task.kwargs['progress'] = ProgressReporter(sink, task.task_id)
+
+    def _is_journaled(self, task):
+        return bool(self.journal and task.replay_name in self._replay_handlers)
+
+    def _journal(self, method, task, *args):
+        """Write a lifecycle event for a journaled task; journal errors never fail the task itself."""
+        if not self._is_journaled(task):
+            return
+        try:
+            getattr(self.journal, method)(task.task_id, *args)
+        except Exception as e:
+            logging.error(f"Task journal write failed ({method}): {e}")
+
+    def resume_unfinished(self):
+        """Re-queue journaled tasks that were queued or running when the app last exited."""
+        if not self.journal:
+            return 0
+        resumed = 0
+        for entry in self.journal.unfinished():
+            func = self._replay_handlers.get(entry.replay_name)
+            source = entry.args[0] if entry.args and isinstance(entry.args[0], str) else None
+            if source and not os.path.exists(source):
+                logging.warning(f"Source of journaled task {entry.task_id} is gone: {source}")
+                self.journal.record_failure(entry.task_id, f"Source file no longer exists: {source}")
+                continue
+            if not func:
+                logging.warning(f"No replay handler for journaled task {entry.task_id}: {entry.replay_name}")
+                self.journal.record_failure(entry.task_id, f"No replay handler: {entry.replay_name}")
+                continue
+            handle = self.add_task(
+                entry.priority, TaskType(entry.task_type), func, *entry.args,
+                replay_name=entry.replay_name, task_id=entry.task_id, **entry.kwargs
+            )
+            if handle:
+                resumed += 1
+        if resumed:
+            logging.info(f"Resumed {resumed} unfinished task(s) from the journal")
+        return resumed
+
+    def _all_tasks(self):
+        pending = (task for lane in self.lanes.values() for task in lane.pending)
+        return itertools.chain(pending, self._active.values())
+
+    def _find_file_task(self, task_type, file_path):
+        for task in self._all_tasks():
+            if task.type == task_type and task.file_path == file_path and not task.token.cancelled:
+                return task
+        return None
 
     def is_processing_file(self, file_path):
-        with self.task_queue.mutex:
+        with self._condition:
             return any(
-                isinstance(item[1], Task) and 
-                item[1].args and 
-                isinstance(item[1].args[0], str) and 
-                item[1].args[0] == file_path 
-                for item in self.task_queue.queue
+                task.file_path == file_path and not task.token.cancelled
+                for task in self._all_tasks()
+            )
+
+    def lane_metrics(self):
+        """Queue depth, concurrency and outcome counters for each execution lane."""
+        with self._condition:
+            return {name: lane.metrics() for name, lane in self.lanes.items()}
+
+    def cancel_task(self, task):
+        """Cancel a queued task outright, or signal a running one to stop at its next checkpoint."""
+        with self._condition:
+            if task.state in ("completed", "failed", "cancelled"):
+                return False
+            task.token.cancel()
+            lane = self.lanes[task.lane]
+            dequeued = task in lane.pending
+            if dequeued:
+                lane.pending.remove(task)
+                lane.cancelled += 1
+                task.state = "cancelled"
+                self._journal('record_cancelled', task)
+            if task.file_path:
+                self._processed_files.discard((task.type, task.file_path))
+        logging.info(f"Cancelled task: {task.type.value} ({task.file_path or 'no file'})")
+        if dequeued:
+            # A running task reports its cancellation from _finish_task
+            self._run_errback(task, TaskCancelledError("Task was cancelled"))
+        return True
+
+    def _run_errback(self, task, error):
+        if not task.errback:
+            return
+        try:
+            task.errback(error)
+        except Exception as e:
+            logging.error(f"Task error callback failed: {str(e)}", exc_info=True)
+
+    def cancel_file(self, file_path):
+        """Cancel every queued or running task that operates on file_path."""
+        with self._condition:
+            tasks = [task for task in self._all_tasks() if task.file_path == file_path]
+        return sum(1 for task in tasks if self.cancel_task(task))
+
+    def _is_ripe(self, task, now):
+        """Coalescible tasks wait out their batch window before they may start."""
+        batch = self._batch_handlers.get(task.coalesce_key)
+        return batch is None or now - task.enqueued_at >= batch[1]
+
+    def _next_ripe_delay(self, now):
+        delays = [
+            self._batch_handlers[t.coalesce_key][1] - (now - t.enqueued_at)
+            for lane in self.lanes.values() if lane.has_capacity()
+            for t in lane.pending if not self._is_ripe(t, now)
+        ]
+        return max(0.01, min(delays)) if delays else None
+
+    def _pop_group(self, lane, now):
+        """Pop the next task from lane together with queued tasks it can be coalesced with."""
+        task = lane.pop_next(now, self.aging_interval, eligible=lambda t: self._is_ripe(t, now))
+        if task is None:
+            return []
+        group = [task]
+        if task.coalesce_key in self._batch_handlers:
+            max_batch = self._batch_handlers[task.coalesce_key][2]
+            mates = sorted(
+                (t for t in lane.pending if t.coalesce_key == task.coalesce_key),
+                key=lambda t: t.sequence
+            )[:max_batch - 1]
+            for mate in mates:
+                lane.pending.remove(mate)
+            group.extend(mates)
+        return group
+
+    def _take_ready_tasks(self, timeout):
+        """Move task groups into their lanes' free slots, waiting up to timeout seconds if none can start."""
+        with self._condition:
+            now = time.monotonic()
+            ripe = any(
+                lane.has_capacity() and any(self._is_ripe(t, now) for t in lane.pending)
+                for lane in self.lanes.values()
             )
+            if not ripe:
+                delay = self._next_ripe_delay(now)
+                if self.progress.busy:
+                    delay = min(delay or timeout, self.progress.frame_budget)
+                self._condition.wait(timeout if delay is None else min(timeout, delay))
+            now = time.monotonic()
+            ready = []
+            for lane in self.lanes.values():
+                while lane.pending and lane.has_capacity():
+                    group = self._pop_group(lane, now)
+                    if not group:
+                        break
+                    lane.running += 1
+                    for task in group:
+                        task.state = "running"
+                        self._active[task.sequence] = task
+                        self.progress.start(task.task_id)
+                    ready.append((lane, group))
+            return ready
 
     def run(self):
+        self.lanes['cpu'].warm()
         while self.running:
             try:
-                priority, task = self.task_queue.get(timeout=1)
-                logging.info(f"Processing task: {task.type.value}")
-
-                future = self.executor.submit(task.func, *task.args, **task.kwargs)
-                try:
-                    result = future.result()
-                    if task.callback:
-                        task.callback(result)
-                    self.task_completed.emit(task.type, result)
-                except Exception as task_error:
-                    logging.error(f"Task execution failed: {str(task_error)}", exc_info=True)
-                    self.task_failed.emit(task.type, str(task_error))
-                    if task.args and isinstance(task.args[0], str):
-                        self._processed_files.discard(task.args[0])
-
-            except queue.Empty:
-                continue
+                for lane, group in self._take_ready_tasks(timeout=1):
+                    for task in group:
+                        self._journal('record_start', task)
+                    try:
+                        if len(group) > 1:
+                            handler = self._batch_handlers[group[0].coalesce_key][0]
+                            logging.info(f"Processing batch of {len(group)} {group[0].coalesce_key} tasks on {lane.name} lane")
+                            items = [(task.args, task.kwargs) for task in group]
+                            future = lane.executor.submit(handler, items)
+                        else:
+                            logging.info(f"Processing task on {lane.name} lane: {group[0].type.value}")
+                            future = lane.submit(group[0])
+                    except Exception as e:
+                        self._release_slot(lane)
+                        for task in group:
+                            self._finish_task(lane, task, error=e)
+                        continue
+                    future.add_done_callback(
+                        lambda f, lane=lane, group=group: self._on_future_done(lane, group, f)
+                    )
+                self._publish_progress()
+                self._run_lane_hooks()
             except Exception as e:
-                logging.error(f"Task processing failed: {str(e)}", exc_info=True)
-                if 'task' in locals():
-                    self.task_failed.emit(task.type, str(e))
+                logging.error(f"Task dispatch failed: {str(e)}", exc_info=True)
+
+    def _publish_progress(self):
+        """Emit aggregated progress at most once per frame budget so the GUI event loop isn't flooded."""
+        for lane in self.lanes.values():
+            lane.drain_progress(self.progress)
+        update = self.progress.take_update()
+        if update:
+            percent, eta = update
+            self.progress_updated.emit(percent)
+            self.progress_eta.emit(eta)
+
+    def _run_lane_hooks(self):
+        with self._condition:
+            now = time.monotonic()
+            for lane in self.lanes.values():
+                lane.run_idle_hooks(now)
+
+    def _on_future_done(self, lane, group, future):
+        self._release_slot(lane)
+        try:
+            results = future.result()
+        except BaseException as e:
+            for task in group:
+                self._finish_task(lane, task, error=e)
+            return
+
+        if len(group) == 1:
+            self._finish_task(lane, group[0], result=results)
+            return
+        if not isinstance(results, (list, tuple)) or len(results) != len(group):
+            error = RuntimeError(f"Batch handler returned {len(results or [])} results for {len(group)} tasks")
+            results = [error] * len(group)
+        for task, result in zip(group, results):
+            if isinstance(result, BaseException):
+                self._finish_task(lane, task, error=result)
+            else:
+                self._finish_task(lane, task, result=result)
+
+    def _release_slot(self, lane):
+        with self._condition:
+            lane.running -= 1
+            self._condition.notify()
+
+    def _finish_task(self, lane, task, result=None, error=None):
+        """Record the outcome of a task, run its callback and emit the matching signal."""
+        try:
+            if error is None and task.token.cancelled:
+                error = TaskCancelledError("Task was cancelled")
+            if error is None:
+                task.state = "completed"
+                lane.completed += 1
+                self._journal('record_completion', task)
+                if task.file_path:
+                    # Only queued and running work is deduplicated; the same file may be dropped again
+                    self._processed_files.discard((task.type, task.file_path))
+                if task.callback:
+                    task.callback(result)
+                self.task_completed.emit(task.type, result)
+            elif isinstance(error, TaskCancelledError) or task.token.cancelled:
+                task.state = "cancelled"
+                lane.cancelled += 1
+                if self.running:
+                    # Tasks interrupted by stop() stay unfinished in the journal so they resume
+                    self._journal('record_cancelled', task)
+                logging.info(f"Task cancelled while running: {task.type.value}")
+                self._run_errback(task, error)
+                self.task_cancelled.emit(task.type)
+            else:
+                task.state = "failed"
+                lane.failed += 1
+                self._journal('record_failure', task, error)
+                logging.error(f"Task execution failed: {str(error)}", exc_info=error)
+                self._run_errback(task, error)
+                self.task_failed.emit(task.type, str(error))
+                if task.file_path:
+                    self._processed_files.discard((task.type, task.file_path))
+        except Exception as e:
+            logging.error(f"Task completion handling failed: {str(e)}", exc_info=True)
+            self.task_failed.emit(task.type, str(e))
+        finally:
+            self.progress.finish(task.task_id)
+            with self._condition:
+                self._active.pop(task.sequence, None)
+                self._condition.notify()
+            logging.debug(f"Lane {lane.name} metrics: {lane.metrics()}")
 
     def stop(self):
         self.running = False
-        self.executor.shutdown(wait=True)
-        while not self.task_queue.empty():
-            try:
-                _, task = self.task_queue.get_nowait()
+        with self._condition:
+            for task in self._active.values():
+                task.token.cancel()
+            dropped = []
+            for lane in self.lanes.values():
+                dropped.extend(lane.pending)
+                lane.pending = []
+            self._condition.notify_all()
+        for task in dropped:
+            task.token.cancel()
+            task.state = "cancelled"
+            if self._is_journaled(task):
+                logging.info(f"Unprocessed task kept in journal for next start: {task.type.value}")
+            else:
                 logging.warning(f"Unprocessed task dropped: {task.type.value}")
-            except:
-                pass
-        self._processed_files.clear()
         self.wait()
+        for lane in self.lanes.values():
+            lane.run_shutdown_hooks()
+            lane.shutdown()
+        self._processed_files.clear()
+        if self.journal:
+            self.journal.close()
+
+def initialize_sta():
+    """Thread initializer for the COM lane and other Office threads; pythoncom is only available on Windows."""
+    try:
+        import pythoncom
+        pythoncom.CoInitialize()
+    except ImportError:
+        logging.debug("pythoncom not available; COM lane runs without apartment initialisation")
+
+def _warm_worker():
+    """Import the heavy document modules in a process-pool worker before real work arrives."""
+    import file_operations  # noqa: F401
+    return os.getpid()
+
+def _accepts_kwarg(func, name):
+    """Return True if func can be called with keyword argument name."""
+    try:
+        parameters = inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+    return name in parameters or any(
+        p.kind == inspect.Parameter.VAR_KEYWORD for p in parameters.values()
+    )
 
 def integrate_background_processor(doc_handler_app):
     """
@@ -107,8 +725,8 @@ def integrate_background_processor(doc_handler_app):
         def handle_task_completed(task_type, result):
             logging.info(f"Task completed: {task_type}, Result: {result}")
             if task_type == TaskType.FILE_CONVERSION:
+                doc_handler_app._on_file_processed(result)
                 doc_handler_app.ui_components.set_label_text(f"File converted: {result}")
-                doc_handler_app.ui_components.update_recent_files(result)
                 if hasattr(doc_handler_app, 'preview_window') and doc_handler_app.preview_window.isVisible():
                     doc_handler_app.preview_window.set_preview(result)
             elif task_type == TaskType.FILE_ORGANIZATION:
@@ -121,18 +739,50 @@ def integrate_background_processor(doc_handler_app):
             logging.error(f"Task failed: {task_type}, Error: {error_message}")
             doc_handler_app.ui_components.show_error_message("Task Failed", error_message)
 
-        # Add methods to the class
-        setattr(doc_handler_app.__class__, 'handle_task_completed', handle_task_completed)
-        setattr(doc_handler_app.__class__, 'handle_task_failed', handle_task_failed)
-
         # Add and start the background processor
-        doc_handler_app.background_processor = BackgroundProcessor()
+        try:
+            journal = TaskJournal(CONFIG['TASK_JOURNAL_PATH'])
+        except Exception as e:
+            logging.error(f"Task journal unavailable, queued work will not survive a restart: {e}")
+            journal = None
+        doc_handler_app.background_processor = BackgroundProcessor(journal=journal)
+        doc_handler_app.background_processor.register_replay_handler(
+            'convert_to_pdf', doc_handler_app.pdf_ops.convert_to_pdf
+        )
+
+        def convert_word_batch(items):
+            paths, save_dirs, names = zip(*(args for args, _ in items))
+            tokens = [kwargs.get('cancel_token') for _, kwargs in items]
+            results = doc_handler_app.pdf_ops.convert_many(paths, save_dirs, names, cancel_tokens=tokens)
+            return [r.pdf_path if r.ok else r.error for r in results]
+
+        doc_handler_app.background_processor.register_batch_handler('word_to_pdf', convert_word_batch)
+
+        # Pooled Office instances started on the COM lane must be reaped and quit from that thread
+        doc_handler_app.background_processor.register_lane_hook(
+            'com', doc_handler_app.pdf_ops.reap_idle_office_instances,
+            interval=30.0, on_shutdown=doc_handler_app.pdf_ops.shutdown_office_instances
+        )
+
+        # Keep the duplicate index of the current save folder up to date while the io lane is idle
+        if getattr(doc_handler_app, 'duplicate_index', None):
+            def index_save_directory():
+                save_dir = doc_handler_app.session_save_dir or doc_handler_app.default_save_dir
+                doc_handler_app.duplicate_index.index_directory(str(save_dir))
+
+            doc_handler_app.background_processor.register_lane_hook('io', index_save_directory, interval=60.0)
         doc_handler_app.background_processor.start()
 
         # Connect signals
-        doc_handler_app.background_processor.task_completed.connect(doc_handler_app.handle_task_completed)
-        doc_handler_app.background_processor.task_failed.connect(doc_handler_app.handle_task_failed)
+        doc_handler_app.background_processor.task_completed.connect(handle_task_completed)
+        doc_handler_app.background_processor.task_failed.connect(handle_task_failed)
         doc_handler_app.background_processor.progress_updated.connect(doc_handler_app.ui_components.show_progress)
+        doc_handler_app.background_processor.progress_eta.connect(doc_handler_app.ui_components.show_eta)
+
+        # Pick up conversions interrupted by a crash or close mid-batch
+        resumed = doc_handler_app.background_processor.resume_unfinished()
+        if resumed:
+            doc_handler_app.ui_components.set_label_text(f"Resuming {resumed} unfinished conversion(s)...")
         logging.info("BackgroundProcessor integrated successfully.")
     except Exception as e:
         logging.error(f"Failed to integrate BackgroundProcessor: {e}")
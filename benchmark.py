@@ -0,0 +1,254 @@
+"""
+Conversion throughput benchmarks.
+
+Run from the project folder on a machine with the converters installed, e.g.:
+
+    python benchmark.py word quotes\\*.docx
+    python benchmark.py backends quotes\\*.docx budgets\\*.xlsx
+    python benchmark.py docx quotes\\*.docx
+    python benchmark.py profiles quotes\\*.docx budgets\\*.xlsx
+    python benchmark.py cache
+    python benchmark.py msg archive\\*.msg
+"""
+import argparse
+import glob
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from config import CONFIG
+from conversion_profiles import PROFILES, load_measurements, record_measurement
+from file_operations import FileOperations
+from pdf_operations import PDFOperations
+
+
+def _expand(patterns):
+    paths = []
+    for pattern in patterns:
+        paths.extend(glob.glob(pattern) or [pattern])
+    return [os.path.abspath(p) for p in paths if os.path.isfile(p)]
+
+
+def _report(label, count, elapsed):
+    rate = count * 60 / elapsed if elapsed else 0.0
+    print(f"{label:<28} {count:>4} docs  {elapsed:>8.2f}s  {rate:>8.1f} docs/min")
+    return rate
+
+
+def benchmark_word(pdf_ops, paths, out_dir):
+    """Compare one conversion call per document against convert_many, sequential and parallel."""
+    started = time.perf_counter()
+    for path in paths:
+        pdf_ops.convert_word_to_pdf(path, out_dir, os.path.basename(path))
+    before = _report("per-document (before)", len(paths), time.perf_counter() - started)
+
+    names = [os.path.basename(path) for path in paths]
+    for label, parallel in (("convert_many sequential", 1), ("convert_many parallel", pdf_ops.word_pool.max_size)):
+        started = time.perf_counter()
+        results = pdf_ops.convert_many(paths, out_dir, names, parallel=parallel)
+        after = _report(label, sum(1 for r in results if r.ok), time.perf_counter() - started)
+        if before:
+            print(f"Speed-up: {after / before:.2f}x")
+
+
+def benchmark_backends(pdf_ops, paths):
+    """Time every available converter backend on each file and refresh the selector's cache."""
+    selector = pdf_ops.converters
+    for path in paths:
+        selector.benchmark(path, force=True)
+    timings = selector.timings()
+    for route in sorted(timings):
+        print(route)
+        for name, seconds in sorted(timings[route].items(), key=lambda item: float('inf') if item[1] is None else item[1]):
+            if seconds is None:
+                print(f"  {name:<26} failed")
+            else:
+                _report(f"  {name}", 1, seconds)
+    print(f"Fidelity setting: {selector.fidelity}")
+
+
+def benchmark_docx(pdf_ops, paths, out_dir):
+    """Classify Word files for the in-process renderer and compare its throughput with Word/LibreOffice."""
+    from docx_renderer import classify_docx, render_docx_to_pdf
+
+    simple = []
+    for path in paths:
+        reasons = classify_docx(path)
+        print(f"{os.path.basename(path):<40} {'fast path' if not reasons else ', '.join(reasons)}")
+        if not reasons:
+            simple.append(path)
+    print(f"{len(simple)} of {len(paths)} documents can skip Word")
+    if not simple:
+        return
+
+    started = time.perf_counter()
+    rendered = 0
+    for path in simple:
+        try:
+            render_docx_to_pdf(path, os.path.join(out_dir, os.path.basename(path) + ".fast.pdf"), check_complexity=False)
+            rendered += 1
+        except Exception as e:
+            print(f"  {os.path.basename(path)}: {e}")
+    elapsed = time.perf_counter() - started
+    fast = _report("docx-fast", rendered, elapsed)
+    print(f"{'':<28} {rendered / elapsed if elapsed else 0.0:>28.1f} docs/sec")
+
+    fallback = next((b for b in pdf_ops.converters.candidates(simple[0]) if b.name != "docx-fast"), None)
+    if fallback is None:
+        print("No Word or LibreOffice backend available to compare against")
+        return
+    started = time.perf_counter()
+    converted = 0
+    for path in simple:
+        try:
+            fallback.convert(path, os.path.join(out_dir, os.path.basename(path) + ".office.pdf"))
+            converted += 1
+        except Exception as e:
+            print(f"  {os.path.basename(path)}: {e}")
+    elapsed = time.perf_counter() - started
+    slow = _report(fallback.name, converted, elapsed)
+    print(f"{'':<28} {converted / elapsed if elapsed else 0.0:>28.1f} docs/sec")
+    if slow:
+        print(f"Speed-up: {fast / slow:.2f}x")
+
+
+def benchmark_profiles(pdf_ops, paths, out_dir):
+    """Convert every file under each conversion profile and record throughput and output size."""
+    path = CONFIG['PROFILE_BENCHMARK_PATH']
+    if paths:
+        selector = pdf_ops.converters
+        try:
+            # Warm up so the first profile timed doesn't also pay for imports and converter startup
+            warm = selector.select(paths[0])
+            warm.start()
+            warm.convert(paths[0], os.path.join(out_dir, "warm-up.pdf"))
+        except Exception as e:
+            logging.warning(f"Warm-up conversion failed: {e}")
+        for profile in PROFILES.values():
+            runs = {}
+            for src in paths:
+                try:
+                    backend = selector.select(src)
+                except Exception as e:
+                    print(f"  {os.path.basename(src)}: {e}")
+                    continue
+                dst = os.path.join(out_dir, f"{profile.name}-{os.path.basename(src)}.pdf")
+                backend.start()
+                started = time.perf_counter()
+                try:
+                    # Straight to the backend so cached conversions don't flatter the numbers
+                    backend.convert(src, dst, profile.options())
+                except Exception as e:
+                    print(f"  {profile.name} {backend.name} {os.path.basename(src)}: {e}")
+                    continue
+                run = runs.setdefault(backend.name, [0, 0.0, 0, 0])
+                run[0] += 1
+                run[1] += time.perf_counter() - started
+                run[2] += os.path.getsize(dst)
+                run[3] += os.path.getsize(src)
+            for backend_name, (documents, seconds, output_bytes, input_bytes) in runs.items():
+                record_measurement(path, profile.name, backend_name, documents, seconds, output_bytes, input_bytes)
+
+    measurements = load_measurements(path)
+    if not measurements:
+        print("No profile measurements recorded yet")
+        return
+    for name, profile in PROFILES.items():
+        print(f"{name}: {profile.description}")
+        for backend_name, m in sorted(measurements.get(name, {}).items()):
+            print(
+                f"  {backend_name:<26} {m['documents']:>4} docs  {m['docs_per_minute'] or 0:>8.1f} docs/min  "
+                f"{m['output_bytes'] / max(m['documents'], 1) / 1024:>8.1f} KB/doc  ({m['measured_at']})"
+            )
+
+
+def benchmark_msg(paths, out_dir):
+    """Extract attachments from saved .msg files without Outlook, one process vs a worker pool."""
+    from msg_reader import ingest_msg_files
+
+    for label, workers in (("msg sequential", 1), ("msg parallel", None)):
+        started = time.perf_counter()
+        results = ingest_msg_files(paths, os.path.join(out_dir, label.replace(' ', '-')), max_workers=workers)
+        elapsed = time.perf_counter() - started
+        ok = sum(1 for r in results if r.ok)
+        _report(label, ok, elapsed)
+        print(f"{'':<28} {ok / elapsed if elapsed else 0.0:>28.1f} msg/sec")
+
+
+def show_cache_stats(pdf_ops):
+    """Print what the conversion cache has saved so far."""
+    cache = pdf_ops.converters.cache
+    if not cache:
+        print("Conversion cache is not available")
+        return
+    stats = cache.stats()
+    lookups = stats['hits'] + stats['misses']
+    print(f"Hits: {stats['hits']:.0f} / {lookups:.0f} lookups ({stats['hits'] * 100 / lookups if lookups else 0:.1f}%)")
+    print(f"Office conversions saved: {stats['office_launches_saved']:.0f} ({stats['seconds_saved']:.1f}s of converter time)")
+    print(f"Entries: {stats['entries']}  Size: {stats['bytes'] / 1024 ** 2:.1f} MB  Evictions: {stats['evictions']:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DocHandler conversion benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    word_parser = subparsers.add_parser("word", help="Word to PDF: per-document vs batched")
+    word_parser.add_argument("files", nargs="+", help="Word files or glob patterns")
+
+    backends_parser = subparsers.add_parser("backends", help="Compare converter backends per format")
+    backends_parser.add_argument("files", nargs="+", help="Sample documents or glob patterns")
+
+    docx_parser = subparsers.add_parser("docx", help="Word to PDF: in-process renderer vs Word/LibreOffice")
+    docx_parser.add_argument("files", nargs="+", help="Word files or glob patterns")
+
+    profiles_parser = subparsers.add_parser("profiles", help="Measure and show speed/size of each conversion profile")
+    profiles_parser.add_argument("files", nargs="*", help="Sample documents or glob patterns (none: show recorded results)")
+
+    subparsers.add_parser("cache", help="Show conversion cache statistics")
+
+    msg_parser = subparsers.add_parser("msg", help="Extract attachments from saved .msg files without Outlook")
+    msg_parser.add_argument("files", nargs="+", help=".msg files or glob patterns")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.command == "msg":
+        # Pure Python: runs without Office or Outlook, e.g. on a Linux build agent
+        paths = _expand(args.files)
+        if not paths:
+            parser.error("No input files found")
+        out_dir = tempfile.mkdtemp(prefix="dochandler_bench_")
+        try:
+            benchmark_msg(paths, out_dir)
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+        return
+
+    file_ops = FileOperations()
+    pdf_ops = PDFOperations(file_ops)
+    out_dir = tempfile.mkdtemp(prefix="dochandler_bench_")
+    try:
+        if args.command == "cache":
+            show_cache_stats(pdf_ops)
+            return
+        if args.command == "profiles":
+            benchmark_profiles(pdf_ops, _expand(args.files), out_dir)
+            return
+        paths = _expand(args.files)
+        if not paths:
+            parser.error("No input files found")
+        if args.command == "word":
+            benchmark_word(pdf_ops, paths, out_dir)
+        elif args.command == "backends":
+            benchmark_backends(pdf_ops, paths)
+        elif args.command == "docx":
+            benchmark_docx(pdf_ops, paths, out_dir)
+    finally:
+        pdf_ops.close_converters()
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
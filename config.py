@@ -15,6 +15,38 @@ CONFIG = {
     'DEFAULT_SAVE_DIR': Path.home() / 'Downloads' / 'DocHandler',
     'LOG_FILE_PATH': Path.home() / 'DocHandlerLogs' / 'dochandler.log',
     'RECENT_SAVE_LOCATIONS': Path.home() / 'DocHandlerLogs' / 'recent_save_locations.txt',
+    'TASK_JOURNAL_PATH': Path.home() / '.dochandler' / 'task_journal.db',
+    # Lowest acceptable converter fidelity: 'exact' (Office), 'standard' (LibreOffice and the
+    # in-process .xlsx/.docx renderers) or 'draft' (pure Python). 'standard' renders plain
+    # letters and sheets in-process and sends the rest to Office, or LibreOffice without it;
+    # 'exact' sends everything to Office and fails where it is not installed
+    'CONVERSION_FIDELITY': 'standard',
+    # Export settings for every converter: 'fast', 'balanced' or 'archival' (see conversion_profiles.py)
+    'CONVERSION_PROFILE': 'balanced',
+    'PROFILE_BENCHMARK_PATH': Path.home() / '.dochandler' / 'profile_benchmarks.json',
+    'CONVERTER_BENCHMARK_PATH': Path.home() / '.dochandler' / 'converter_benchmarks.json',
+    'LIBREOFFICE_PROFILE_DIR': Path.home() / '.dochandler' / 'libreoffice_profile',
+    'CONVERSION_CACHE_DIR': Path.home() / '.dochandler' / 'conversion_cache',
+    'CONVERSION_CACHE_MAX_BYTES': 1024 ** 3,
+    # A conversion still running after this many seconds has its converter process killed
+    'CONVERSION_DEADLINE_SECONDS': 120,
+    # Documents that hang or fail this many times are refused until released
+    'QUARANTINE_AFTER_FAILURES': 2,
+    'QUARANTINE_PATH': Path.home() / '.dochandler' / 'quarantine.json',
+    # The Outlook session is closed after this many seconds without a drop
+    'OUTLOOK_SESSION_IDLE_SECONDS': 600,
+    # Dropped-email images up to this size are treated as signature graphics and not saved
+    'OUTLOOK_INLINE_IMAGE_MAX_BYTES': 64 * 1024,
+    # Companies learned from the senders of emailed files (see sender_companies.py)
+    'SENDER_COMPANIES_PATH': Path.home() / '.dochandler' / 'sender_companies.json',
+    # Fingerprints of the documents in save folders, for spotting resent quotes
+    'DUPLICATE_INDEX_PATH': Path.home() / '.dochandler' / 'duplicate_index.db',
+    # Dropped files wait here, outside the (possibly synced) save folder, until they are named;
+    # see staging.py for save folders on other volumes
+    'STAGING_DIR': (
+        Path(os.environ['LOCALAPPDATA']) / 'DocHandler' / 'staging' if os.environ.get('LOCALAPPDATA')
+        else Path.home() / '.dochandler' / 'staging'
+    ),
 }
 
 # Ensure required directories exist
@@ -0,0 +1,243 @@
+# content_sniffer.py
+
+import io
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import zipfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import fast_copy
+import name_index
+from msg_reader import CFB_SIGNATURE, CompoundFile, CompoundFileError
+
+# Extensions each kind goes by; the first is the one a mislabelled file is given
+KIND_EXTENSIONS = {
+    'pdf': ('.pdf',),
+    'docx': ('.docx',),
+    'docm': ('.docm',),
+    'xlsx': ('.xlsx',),
+    'xlsm': ('.xlsm',),
+    'pptx': ('.pptx',),
+    'doc': ('.doc',),
+    'xls': ('.xls',),
+    'ppt': ('.ppt',),
+    'msg': ('.msg',),
+    'rtf': ('.rtf',),
+    'png': ('.png',),
+    'jpeg': ('.jpg', '.jpeg', '.jpe'),
+    'gif': ('.gif',),
+    'tiff': ('.tif', '.tiff'),
+    'bmp': ('.bmp',),
+    'webp': ('.webp',),
+    'zip': ('.zip',),
+    'ole': (),
+}
+
+# What the drop pipeline names and saves as a document
+DOCUMENT_KINDS = {'pdf', 'doc', 'docx'}
+# What the Office converters export to PDF
+OFFICE_KINDS = {'doc', 'docx', 'xls', 'xlsx', 'xlsm'}
+# What image_to_pdf can turn into pages
+IMAGE_KINDS = {'png', 'jpeg', 'gif', 'tiff', 'bmp'}
+
+HEADER_SIZE = 4096
+# Readers look for %%EOF near the end; allow for a little trailing padding
+PDF_TAIL_SIZE = 4096
+CACHE_SIZE = 1024
+
+@dataclass(frozen=True)
+class SniffResult:
+    kind: Optional[str]  # None: not a type we recognise
+    damaged: bool = False
+    detail: str = ''
+
+    @property
+    def extension(self):
+        """The extension this kind of file should have, or None."""
+        extensions = KIND_EXTENSIONS.get(self.kind, ())
+        return extensions[0] if extensions else None
+
+    def matches(self, path):
+        """True if path's extension already names this kind."""
+        return os.path.splitext(path)[1].lower() in KIND_EXTENSIONS.get(self.kind, ())
+
+    def describe(self):
+        text = self.kind.upper() if self.kind else "unrecognised file"
+        if self.damaged:
+            text = f"damaged {text}"
+        return f"{text} ({self.detail})" if self.detail else text
+
+def _check_pdf(f, size, header_offset):
+    """Why the PDF looks truncated or corrupt (no %%EOF, or a startxref that points nowhere), or ''."""
+    tail_size = min(size, PDF_TAIL_SIZE)
+    f.seek(size - tail_size)
+    tail = f.read(tail_size)
+    eof = tail.rfind(b'%%EOF')
+    if eof < 0:
+        return "no %%EOF marker, the file is probably truncated"
+    start = tail.rfind(b'startxref', 0, eof)
+    match = re.match(rb'startxref\s+(\d+)', tail[start:eof]) if start >= 0 else None
+    if not match:
+        return "no cross-reference offset before %%EOF"
+    offset = int(match.group(1))
+    # Offsets count from %PDF, which some generators put after a few junk bytes
+    for candidate in dict.fromkeys((offset, offset + header_offset)):
+        if candidate >= size:
+            continue
+        f.seek(candidate)
+        # A classic xref table or an xref stream object
+        if re.match(rb'\s*(xref|\d+\s+\d+\s+obj)', f.read(32)):
+            return ''
+    return f"cross-reference offset {offset} does not point at a cross-reference table"
+
+def _sniff_pdf(f, size, header_offset):
+    problem = _check_pdf(f, size, header_offset)
+    return SniffResult('pdf', damaged=bool(problem), detail=problem)
+
+def _sniff_zip(f):
+    try:
+        # Reads only the end-of-central-directory record and the central directory
+        with zipfile.ZipFile(f) as archive:
+            names = set(archive.namelist())
+    except (zipfile.BadZipFile, OSError, ValueError) as e:
+        return SniffResult('zip', damaged=True, detail=str(e))
+    if '[Content_Types].xml' in names:
+        parts = {name.split('/', 1)[0] for name in names}
+        if 'word' in parts:
+            return SniffResult('docm' if 'word/vbaProject.bin' in names else 'docx')
+        if 'xl' in parts:
+            return SniffResult('xlsm' if 'xl/vbaProject.bin' in names else 'xlsx')
+        if 'ppt' in parts:
+            return SniffResult('pptx')
+    return SniffResult('zip')
+
+def _ole_kind(data):
+    names = set(CompoundFile(data).children())
+    if 'WordDocument' in names:
+        return SniffResult('doc')
+    if 'Workbook' in names or 'Book' in names:
+        return SniffResult('xls')
+    if 'PowerPoint Document' in names:
+        return SniffResult('ppt')
+    if '__properties_version1.0' in names or any(name.startswith('__substg1.0_') for name in names):
+        return SniffResult('msg')
+    if 'EncryptedPackage' in names:
+        return SniffResult('ole', detail="password-protected Office document")
+    return SniffResult('ole')
+
+def _sniff_ole(f):
+    try:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, io.UnsupportedOperation, OSError, ValueError):
+            f.seek(0)
+            data = f.read()
+        try:
+            # Only the directory is parsed; the pages holding the document body are never read
+            return _ole_kind(data)
+        finally:
+            if isinstance(data, mmap.mmap):
+                try:
+                    data.close()
+                except BufferError:
+                    # A traceback still holds the reader's view; the map closes when it is collected
+                    pass
+    except (CompoundFileError, struct.error, IndexError) as e:
+        # A truncated file runs out of sectors partway through the directory
+        return SniffResult('ole', damaged=True, detail=str(e))
+
+def _sniff_stream(f, size):
+    header = f.read(HEADER_SIZE)
+    if header.startswith(b'%PDF-'):
+        return _sniff_pdf(f, size, 0)
+    if header.startswith((b'PK\x03\x04', b'PK\x05\x06')):
+        return _sniff_zip(f)
+    if header.startswith(CFB_SIGNATURE):
+        return _sniff_ole(f)
+    if header.startswith(b'{\\rtf'):
+        return SniffResult('rtf')
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return SniffResult('png')
+    if header.startswith(b'\xff\xd8\xff'):
+        return SniffResult('jpeg')
+    if header.startswith((b'GIF87a', b'GIF89a')):
+        return SniffResult('gif')
+    if header.startswith((b'II*\x00', b'MM\x00*')):
+        return SniffResult('tiff')
+    if header.startswith(b'BM') and len(header) >= 26:
+        return SniffResult('bmp')
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return SniffResult('webp')
+    if not header:
+        return SniffResult(None, detail="empty file")
+    # The PDF header may follow a little junk (mail gateways, some scanners); checked
+    # last because a ZIP can store a PDF uncompressed near its start
+    pdf_offset = header.find(b'%PDF-', 0, 1024)
+    if pdf_offset >= 0:
+        return _sniff_pdf(f, size, pdf_offset)
+    return SniffResult(None)
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+stats = {'hits': 0, 'misses': 0}
+
+def sniff(path):
+    """
+    The real type of a file from its header (and, for PDFs, its tail), whatever its extension.
+
+    Results are cached per path, size and modification time, so every stage of the
+    pipeline can ask again for free. Raises OSError if the file cannot be read.
+    """
+    stat = os.stat(path)
+    key = (os.path.normcase(os.path.abspath(path)), stat.st_size, stat.st_mtime_ns)
+    with _cache_lock:
+        result = _cache.get(key)
+        if result is not None:
+            _cache.move_to_end(key)
+            stats['hits'] += 1
+            return result
+    with open(path, 'rb') as f:
+        result = _sniff_stream(f, stat.st_size)
+    if result.damaged or result.kind is None:
+        logging.debug(f"Sniffed {path} as {result.describe()}")
+    with _cache_lock:
+        stats['misses'] += 1
+        _cache[key] = result
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+def sniff_bytes(data):
+    """sniff() for a file still in memory, such as a mail attachment; not cached."""
+    return _sniff_stream(io.BytesIO(data), len(data))
+
+def typed_path(path, result, directory, move=False):
+    """
+    path itself if its extension matches its sniffed kind, otherwise a copy (or with move, the file
+    itself) in directory under the right extension.
+
+    Office and the converters pick their import filter by extension, so a Word file
+    saved as '.tmp' or a spreadsheet called '.docx' must be renamed before it reaches them.
+    """
+    if result.matches(path) or not result.extension:
+        return path
+    base = os.path.splitext(os.path.basename(path))[0] or "document"
+    target = name_index.reserve(directory, f"{base}{result.extension}")
+    try:
+        mtime = os.path.getmtime(path)
+        if move:
+            fast_copy.move_file(path, target, mtime)
+        else:
+            fast_copy.copy_file(path, target, mtime)
+    except Exception:
+        name_index.release(target, written=False)
+        raise
+    name_index.release(target)
+    logging.info(f"{os.path.basename(path)} is a {result.kind.upper()} file; using it as {os.path.basename(target)}")
+    return target
@@ -0,0 +1,194 @@
+# conversion_cache.py
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+class ConversionCache:
+    """
+    Content-addressed cache of converted documents.
+
+    Entries are keyed by (source content hash, backend, target format, options), so a
+    quote converted once for a merge is reused when it is saved individually or dropped
+    again, regardless of its path. Artifacts are copied out of the cache, or hard-linked
+    into scratch locations whose files are never handed to the user as-is (a shared inode
+    would let an in-place edit of one saved PDF change the cache and every other copy).
+    The index lives in SQLite (WAL mode) and the least recently used artifacts are
+    evicted once the cache exceeds max_bytes.
+    """
+
+    OFFICE_BACKENDS = {'office-com'}
+
+    def __init__(self, cache_dir, max_bytes=1024 ** 3):
+        self.cache_dir = str(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._hashes = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(
+            os.path.join(self.cache_dir, 'index.db'), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                backend TEXT NOT NULL,
+                artifact_hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                seconds REAL NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value REAL NOT NULL)")
+        logging.info(f"Conversion cache opened: {self.cache_dir}")
+
+    def _execute(self, sql, params=()):
+        """Run sql and return all its rows; fetching inside the lock keeps worker threads apart."""
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _bump(self, name, amount=1):
+        self._execute(
+            "INSERT INTO stats (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + ?",
+            (name, amount, amount)
+        )
+
+    @staticmethod
+    def _file_hash(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def content_hash(self, path):
+        """SHA-256 of path's content, remembered while its size and mtime are unchanged."""
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._hashes.get(memo_key)
+        if cached is None:
+            cached = self._file_hash(path)
+            with self._lock:
+                self._hashes[memo_key] = cached
+        return cached
+
+    def key(self, src, target, backend, options=None):
+        material = json.dumps(
+            [self.content_hash(src), backend, target, options or {}], sort_keys=True, default=str
+        )
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _artifact_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    @staticmethod
+    def _place(src, dst, link):
+        """Copy src to dst, or hard-link it when allowed, falling back to a copy across volumes."""
+        if os.path.exists(dst):
+            os.remove(dst)
+        if link:
+            try:
+                os.link(src, dst)
+                return
+            except OSError:
+                pass
+        shutil.copyfile(src, dst)
+
+    def fetch(self, src, dst, target, backends, options=None, link=False):
+        """
+        Place a cached conversion of src at dst, trying backends in order.
+
+        Returns the name of the backend whose conversion was reused, or None on a miss.
+        link=True hard-links instead of copying; only use it for scratch destinations.
+        """
+        try:
+            for backend in backends:
+                key = self.key(src, target, backend, options)
+                rows = self._execute("SELECT artifact_hash, seconds FROM entries WHERE key = ?", (key,))
+                artifact = self._artifact_path(key)
+                if not rows or not os.path.exists(artifact):
+                    continue
+                artifact_hash, seconds = rows[0]
+                # A hard-linked copy edited in place would change the cached artifact too
+                if self._file_hash(artifact) != artifact_hash:
+                    logging.warning(f"Cached conversion {key} was modified; discarding it")
+                    self._evict(key)
+                    continue
+                self._place(artifact, dst, link)
+                self._execute(
+                    "UPDATE entries SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key)
+                )
+                self._bump('hits')
+                self._bump('seconds_saved', seconds)
+                if backend in self.OFFICE_BACKENDS:
+                    self._bump('office_launches_saved')
+                logging.info(f"Conversion cache hit for {os.path.basename(src)} ({backend})")
+                return backend
+            self._bump('misses')
+        except Exception as e:
+            logging.warning(f"Conversion cache lookup failed for {src}: {e}")
+        return None
+
+    def store(self, src, converted, target, backend, seconds, options=None):
+        """Add a finished conversion of src (the file at converted) to the cache."""
+        try:
+            key = self.key(src, target, backend, options)
+            artifact = self._artifact_path(key)
+            os.makedirs(os.path.dirname(artifact), exist_ok=True)
+            staging = f"{artifact}.{threading.get_ident()}.tmp"
+            shutil.copyfile(converted, staging)
+            os.replace(staging, artifact)
+            now = time.time()
+            self._execute(
+                "INSERT OR REPLACE INTO entries (key, backend, artifact_hash, size, seconds, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, backend, self._file_hash(artifact), os.path.getsize(artifact), seconds, now, now)
+            )
+            self._bump('stores')
+            self._enforce_budget()
+        except Exception as e:
+            logging.warning(f"Could not cache conversion of {src}: {e}")
+
+    def _evict(self, key):
+        self._execute("DELETE FROM entries WHERE key = ?", (key,))
+        try:
+            os.remove(self._artifact_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _enforce_budget(self):
+        """Evict least recently used artifacts until the cache fits in max_bytes."""
+        total = self._execute("SELECT COALESCE(SUM(size), 0) FROM entries")[0][0]
+        if total <= self.max_bytes:
+            return
+        rows = self._execute("SELECT key, size FROM entries ORDER BY last_used")
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._evict(key)
+            total -= size
+            self._bump('evictions')
+            logging.debug(f"Evicted cached conversion {key}")
+
+    def stats(self):
+        """Counters since the cache was created, plus its current size."""
+        stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0,
+                 'office_launches_saved': 0, 'seconds_saved': 0.0}
+        stats.update(dict(self._execute("SELECT name, value FROM stats")))
+        entries, size = self._execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries")[0]
+        stats.update(entries=entries, bytes=size)
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
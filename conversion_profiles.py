@@ -0,0 +1,127 @@
+# conversion_profiles.py
+
+import json
+import logging
+import os
+import platform
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+class UnknownProfileError(ValueError):
+    """Raised for a profile name that is not in PROFILES."""
+    pass
+
+@dataclass(frozen=True)
+class ConversionProfile:
+    """
+    Export settings shared by every converter backend.
+
+    Backends apply what they support: Word and Excel through Documents.Open/
+    Workbooks.Open and ExportAsFixedFormat, LibreOffice through PDF filter options.
+    The in-process renderers have nothing to tune and ignore them.
+    """
+    name: str
+    description: str
+    # Opening options
+    read_only: bool = True
+    add_to_recent: bool = False
+    update_fields: bool = False
+    update_links: bool = False
+    # PDF export options
+    optimize_for: str = 'print'  # 'print' or 'screen'
+    bitmap_missing_fonts: bool = True
+    include_doc_props: bool = True
+    create_bookmarks: bool = False
+    pdfa: bool = False
+    lossless_images: bool = False
+    jpeg_quality: int = 90
+    max_image_dpi: Optional[int] = 300
+
+    def options(self):
+        """The options dict passed to BackendSelector.convert; it also keys the conversion cache."""
+        options = asdict(self)
+        options.pop('description')
+        options['profile'] = options.pop('name')
+        return options
+
+PROFILES = {
+    'fast': ConversionProfile(
+        name='fast',
+        description="Smallest, quickest output for reading on screen: images downsampled to 150 dpi, no bookmarks",
+        optimize_for='screen',
+        include_doc_props=False,
+        jpeg_quality=75,
+        max_image_dpi=150,
+    ),
+    'balanced': ConversionProfile(
+        name='balanced',
+        description="Print-quality output without refreshing fields or links; the default",
+    ),
+    'archival': ConversionProfile(
+        name='archival',
+        description="PDF/A with fields and links refreshed, heading bookmarks and full-resolution lossless images",
+        update_fields=True,
+        update_links=True,
+        bitmap_missing_fonts=False,
+        create_bookmarks=True,
+        pdfa=True,
+        lossless_images=True,
+        jpeg_quality=100,
+        max_image_dpi=None,
+    ),
+}
+
+DEFAULT_PROFILE = 'balanced'
+
+def get_profile(name=None):
+    """Look up a profile by name (None gives the default)."""
+    name = (name or DEFAULT_PROFILE).lower()
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise UnknownProfileError(f"Unknown conversion profile '{name}' (choose from {', '.join(PROFILES)})")
+
+def profile_options(options):
+    """Resolve the options a backend received (None, a profile name or an options dict) to a profile."""
+    if options is None or isinstance(options, str):
+        return get_profile(options)
+    if isinstance(options, ConversionProfile):
+        return options
+    base = get_profile(options.get('profile'))
+    fields = {k: v for k, v in options.items() if k in base.__dataclass_fields__ and k not in ('name', 'description')}
+    return ConversionProfile(**{**asdict(base), **fields})
+
+_measurements_lock = threading.Lock()
+
+def load_measurements(path):
+    """Throughput and size recorded per profile and backend by `benchmark.py profiles`."""
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logging.warning(f"Ignoring unreadable profile measurements: {e}")
+        return {}
+
+def record_measurement(path, profile, backend, documents, seconds, output_bytes, input_bytes):
+    """Store one benchmark run so the trade-off between profiles is measured, not guessed."""
+    with _measurements_lock:
+        measurements = load_measurements(path)
+        measurements.setdefault(profile, {})[backend] = {
+            'documents': documents,
+            'seconds': round(seconds, 3),
+            'docs_per_minute': round(documents * 60 / seconds, 1) if seconds else None,
+            'output_bytes': output_bytes,
+            'output_to_input': round(output_bytes / input_bytes, 3) if input_bytes else None,
+            'measured_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'machine': platform.node(),
+        }
+        os.makedirs(os.path.dirname(str(path)), exist_ok=True)
+        staging = f"{path}.tmp"
+        with open(staging, 'w', encoding='utf-8') as f:
+            json.dump(measurements, f, indent=2)
+        os.replace(staging, path)
+    return measurements
@@ -0,0 +1,275 @@
+# conversion_watchdog.py
+
+import hashlib
+import json
+import logging
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+class ConversionTimeoutError(TimeoutError):
+    """Raised when a conversion missed its deadline and its converter process was killed."""
+    pass
+
+class DocumentQuarantined(Exception):
+    """Raised instead of converting a document that has already hung or failed repeatedly."""
+    pass
+
+def kill_process(pid):
+    """Kill pid outright (TerminateProcess on Windows). Returns False if it was already gone."""
+    try:
+        os.kill(pid, getattr(signal, 'SIGKILL', signal.SIGTERM))
+        return True
+    except (ProcessLookupError, PermissionError, OSError) as e:
+        logging.warning(f"Could not kill converter process {pid}: {e}")
+        return False
+
+_local = threading.local()
+
+def _current_watch():
+    stack = getattr(_local, 'watches', None)
+    return stack[-1] if stack else None
+
+def attach_process(pid):
+    """Register a converter process for this thread's supervised conversion; it is killed on timeout."""
+    watch = _current_watch()
+    if watch and pid:
+        with watch.lock:
+            watch.pids.add(pid)
+
+def checkpoint(document=None, documents=1):
+    """
+    Start the deadline for the next document of a supervised batch.
+
+    Backends that convert several documents under one supervision call this before
+    each one (and attach its converter process after it), so each gets the full
+    deadline and a hang is blamed on the right file. documents > 1 gives a single
+    call that converts several files a longer deadline.
+    """
+    watch = _current_watch()
+    if watch:
+        watch.restart(document, documents)
+
+def as_timeout(error):
+    """Return a ConversionTimeoutError in place of error if the current document was killed for hanging."""
+    watch = _current_watch()
+    if not watch or not watch.expired or isinstance(error, ConversionTimeoutError):
+        return error
+    timeout = ConversionTimeoutError(
+        f"{os.path.basename(watch.document or 'Conversion')} did not finish within {watch.deadline}s"
+    )
+    timeout.__cause__ = error
+    return timeout
+
+class _Watch:
+    def __init__(self, watchdog, document, deadline):
+        self.watchdog = watchdog
+        self.deadline = deadline
+        self.lock = threading.Lock()
+        self.pids = set()
+        self.document = document
+        self.expires_at = time.monotonic() + deadline
+        self.expired = False
+
+    def restart(self, document, documents=1):
+        with self.lock:
+            self.pids.clear()
+        with self.watchdog._condition:
+            self.document = document
+            self.expires_at = time.monotonic() + self.deadline * max(1, documents)
+            self.expired = False
+            self.watchdog._condition.notify()
+
+class ConversionWatchdog:
+    """
+    Enforces a deadline on every conversion and quarantines documents that keep failing.
+
+    A hung Office call cannot be interrupted from Python, so a monitor thread kills the
+    converter processes attached to an overdue conversion; the blocked call then fails,
+    the pool retires the dead instance and the next checkout starts a fresh one.
+    Documents are identified by content hash; after max_failures timeouts or failed
+    conversions they are refused until released, and the list survives restarts.
+    """
+
+    def __init__(self, deadline=120, max_failures=2, quarantine_path=None):
+        self.deadline = deadline
+        self.max_failures = max_failures
+        self.quarantine_path = str(quarantine_path) if quarantine_path else None
+        self._condition = threading.Condition()
+        self._watches = []
+        self._monitor = None
+        self._stopped = False
+        self._hashes = {}
+        self._quarantine = self._load_quarantine()
+        self.stats = {'supervised': 0, 'timeouts': 0, 'kills': 0, 'refused': 0}
+
+    # Quarantine
+
+    def _load_quarantine(self):
+        if not self.quarantine_path or not os.path.exists(self.quarantine_path):
+            return {}
+        try:
+            with open(self.quarantine_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable quarantine list: {e}")
+            return {}
+
+    def _save_quarantine(self):
+        if not self.quarantine_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.quarantine_path), exist_ok=True)
+            staging = f"{self.quarantine_path}.tmp"
+            with open(staging, 'w', encoding='utf-8') as f:
+                json.dump(self._quarantine, f, indent=2)
+            os.replace(staging, self.quarantine_path)
+        except Exception as e:
+            logging.warning(f"Could not save quarantine list: {e}")
+
+    def _document_key(self, path):
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self._condition:
+            digest = self._hashes.get(memo_key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    sha.update(chunk)
+            digest = sha.hexdigest()
+            with self._condition:
+                self._hashes[memo_key] = digest
+        return digest
+
+    def check(self, path):
+        """Raise DocumentQuarantined if path's content has been quarantined."""
+        if not self._quarantine:
+            return
+        try:
+            key = self._document_key(path)
+        except OSError:
+            return
+        with self._condition:
+            entry = self._quarantine.get(key)
+            if not entry or entry['failures'] < self.max_failures:
+                return
+            self.stats['refused'] += 1
+        raise DocumentQuarantined(
+            f"{os.path.basename(path)} is quarantined after {entry['failures']} failed conversions "
+            f"(last: {entry['last_error']})"
+        )
+
+    def record_failure(self, path, error):
+        try:
+            key = self._document_key(path)
+        except OSError:
+            return
+        with self._condition:
+            entry = self._quarantine.setdefault(key, {'name': os.path.basename(path), 'failures': 0})
+            entry['failures'] += 1
+            entry['last_error'] = str(error)[:500]
+            entry['last_failure'] = time.time()
+            failures = entry['failures']
+            self._save_quarantine()
+        if failures >= self.max_failures:
+            logging.error(f"Quarantined {os.path.basename(path)} after {failures} failed conversions")
+
+    def record_success(self, path):
+        if not self._quarantine:
+            return
+        try:
+            key = self._document_key(path)
+        except OSError:
+            return
+        with self._condition:
+            if self._quarantine.pop(key, None) is not None:
+                self._save_quarantine()
+
+    def release(self, path):
+        """Let a quarantined document be converted again (e.g. after the user repaired it)."""
+        self.record_success(path)
+
+    def quarantined(self):
+        """Entries currently refused, as dicts with name, failures and last_error."""
+        with self._condition:
+            return [dict(e) for e in self._quarantine.values() if e['failures'] >= self.max_failures]
+
+    # Deadlines
+
+    @contextmanager
+    def supervise(self, document=None, deadline=None):
+        """
+        Run the block under a deadline; converter processes attached inside it are killed when it passes.
+
+        An exception raised after the deadline (typically the COM error from the killed
+        process) is replaced by ConversionTimeoutError.
+        """
+        watch = _Watch(self, document, deadline or self.deadline)
+        stack = getattr(_local, 'watches', None)
+        if stack is None:
+            stack = _local.watches = []
+        stack.append(watch)
+        with self._condition:
+            self._watches.append(watch)
+            self.stats['supervised'] += 1
+            self._ensure_monitor()
+            self._condition.notify()
+        try:
+            yield watch
+        except Exception as e:
+            timeout = as_timeout(e)
+            if timeout is not e:
+                raise timeout from e
+            raise
+        finally:
+            stack.pop()
+            with self._condition:
+                self._watches.remove(watch)
+
+    def _ensure_monitor(self):
+        if self._monitor is None or not self._monitor.is_alive():
+            self._stopped = False
+            self._monitor = threading.Thread(target=self._run, name="conversion-watchdog", daemon=True)
+            self._monitor.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+                now = time.monotonic()
+                overdue = [w for w in self._watches if not w.expired and w.expires_at <= now]
+                for watch in overdue:
+                    watch.expired = True
+                if not overdue:
+                    pending = [w.expires_at - now for w in self._watches if not w.expired]
+                    self._condition.wait(min(pending) if pending else None)
+                    continue
+            for watch in overdue:
+                self._expire(watch)
+
+    def _expire(self, watch):
+        with watch.lock:
+            pids = list(watch.pids)
+            watch.pids.clear()
+        self.stats['timeouts'] += 1
+        name = os.path.basename(watch.document) if watch.document else "A conversion"
+        if not pids:
+            logging.error(f"{name} passed its {watch.deadline}s deadline but has no converter process to kill")
+        for pid in pids:
+            logging.error(f"{name} passed its {watch.deadline}s deadline; killing converter process {pid}")
+            if kill_process(pid):
+                self.stats['kills'] += 1
+        if watch.document:
+            self.record_failure(watch.document, f"timed out after {watch.deadline}s")
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._monitor:
+            self._monitor.join(timeout=5)
+            self._monitor = None
@@ -0,0 +1,767 @@
+# converter_backends.py
+
+import json
+import logging
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from background_processor import TaskCancelledError
+from conversion_profiles import profile_options
+from conversion_watchdog import ConversionTimeoutError, as_timeout, attach_process, checkpoint
+
+# Higher is more faithful to the source document's layout
+FIDELITY_LEVELS = {'draft': 1, 'standard': 2, 'exact': 3}
+
+class ConversionError(Exception):
+    """Raised when no backend could convert a document."""
+    pass
+
+class DocumentRejected(ConversionError):
+    """Raised by a working backend for a particular document it cannot handle faithfully."""
+    pass
+
+class ConverterBackend:
+    """
+    One way of turning office documents into PDF (or another office format).
+
+    formats maps a source extension to the target extensions the backend can produce;
+    the target of a conversion is taken from the destination path's extension.
+    """
+
+    name = "base"
+    formats = {}
+    fidelity = 'draft'
+
+    def is_available(self):
+        return True
+
+    def accepts(self, path, target='.pdf'):
+        return target in self.formats.get(os.path.splitext(path)[1].lower(), ())
+
+    def start(self):
+        """Warm up anything the backend keeps running between conversions."""
+        pass
+
+    def convert(self, src, dst, options=None):
+        """Convert src into dst, overwriting dst. Returns dst."""
+        raise NotImplementedError
+
+    def convert_many(self, pairs, options=None, cancel_tokens=None):
+        """
+        Convert several (src, dst) pairs; backends with a per-session cost override this.
+
+        :return: List aligned with pairs holding dst or the Exception for that pair.
+        """
+        cancel_tokens = cancel_tokens or [None] * len(pairs)
+        results = []
+        for (src, dst), token in zip(pairs, cancel_tokens):
+            try:
+                if token:
+                    token.raise_if_cancelled()
+                checkpoint(src)
+                results.append(self.convert(src, dst, options))
+            except Exception as e:
+                results.append(as_timeout(e))
+        return results
+
+    def close(self):
+        pass
+
+class OfficeComBackend(ConverterBackend):
+    """Microsoft Word/Excel through COM, using the warm instance pools from PDFOperations."""
+
+    name = "office-com"
+    fidelity = 'exact'
+    WORD_FORMATS = {'.doc': ('.pdf', '.docx'), '.docx': ('.pdf', '.docx'), '.rtf': ('.pdf', '.docx')}
+    EXCEL_FORMATS = {'.xls': ('.pdf',), '.xlsx': ('.pdf',), '.xlsm': ('.pdf',)}
+    formats = {**WORD_FORMATS, **EXCEL_FORMATS}
+    # Word SaveAs FileFormat constants
+    WORD_FILE_FORMATS = {'.pdf': 17, '.docx': 16}
+    # WdExportOptimizeFor and XlFixedFormatQuality constants
+    WORD_OPTIMIZE_FOR = {'print': 0, 'screen': 1}
+    EXCEL_QUALITY = {'print': 0, 'screen': 1}
+
+    def __init__(self, word_pool, excel_pool):
+        self.word_pool = word_pool
+        self.excel_pool = excel_pool
+        self._available = None
+
+    def is_available(self):
+        if self._available is None:
+            self._available = sys.platform == 'win32' and self._prog_id_registered('Word.Application')
+        return self._available
+
+    @staticmethod
+    def _prog_id_registered(prog_id):
+        try:
+            import win32com.client  # noqa: F401
+            import winreg
+            winreg.CloseKey(winreg.OpenKey(winreg.HKEY_CLASSES_ROOT, prog_id))
+            return True
+        except (ImportError, OSError):
+            return False
+
+    def _save_with_word(self, word, src, dst, profile):
+        # Word refreshes fields and links while "printing" to PDF unless told not to
+        word.Options.UpdateFieldsAtPrint = profile.update_fields
+        word.Options.UpdateLinksAtPrint = profile.update_links
+        doc = word.Documents.Open(
+            os.path.abspath(src), ConfirmConversions=False, ReadOnly=profile.read_only,
+            AddToRecentFiles=profile.add_to_recent, Visible=False, NoEncodingDialog=True
+        )
+        try:
+            target = os.path.splitext(dst)[1].lower()
+            if target == '.pdf':
+                if profile.update_fields:
+                    doc.Fields.Update()
+                    for toc in doc.TablesOfContents:
+                        toc.Update()
+                doc.ExportAsFixedFormat(
+                    OutputFileName=os.path.abspath(dst), ExportFormat=self.WORD_FILE_FORMATS[target],
+                    OpenAfterExport=False, OptimizeFor=self.WORD_OPTIMIZE_FOR[profile.optimize_for],
+                    IncludeDocProps=profile.include_doc_props, KeepIRM=True,
+                    CreateBookmarks=1 if profile.create_bookmarks else 0,  # 1 = wdExportCreateHeadingBookmarks
+                    DocStructureTags=profile.pdfa, BitmapMissingFonts=profile.bitmap_missing_fonts,
+                    UseISO19005_1=profile.pdfa
+                )
+            else:
+                doc.SaveAs2(os.path.abspath(dst), FileFormat=self.WORD_FILE_FORMATS[target], AddToRecentFiles=False)
+        finally:
+            doc.Close(SaveChanges=False)
+        self.word_pool.record_document(word)
+
+    def convert(self, src, dst, options=None):
+        profile = profile_options(options)
+        if os.path.splitext(src)[1].lower() in self.EXCEL_FORMATS:
+            with self.excel_pool.checkout() as excel:
+                attach_process(self.excel_pool.process_id(excel))
+                excel.AskToUpdateLinks = False
+                wb = excel.Workbooks.Open(
+                    os.path.abspath(src), UpdateLinks=3 if profile.update_links else 0,
+                    ReadOnly=profile.read_only, AddToMru=profile.add_to_recent
+                )
+                try:
+                    wb.ExportAsFixedFormat(
+                        0, os.path.abspath(dst), Quality=self.EXCEL_QUALITY[profile.optimize_for],  # 0 = xlTypePDF
+                        IncludeDocProperties=profile.include_doc_props, IgnorePrintAreas=False,
+                        OpenAfterPublish=False
+                    )
+                finally:
+                    wb.Close(False)
+            return dst
+        with self.word_pool.checkout() as word:
+            attach_process(self.word_pool.process_id(word))
+            self._save_with_word(word, src, dst, profile)
+        return dst
+
+    def convert_many(self, pairs, options=None, cancel_tokens=None):
+        """Word documents share one checked-out instance; anything else goes one by one."""
+        cancel_tokens = cancel_tokens or [None] * len(pairs)
+        profile = profile_options(options)
+        word_items = [i for i, (src, _) in enumerate(pairs)
+                      if os.path.splitext(src)[1].lower() in self.WORD_FORMATS]
+        results = [None] * len(pairs)
+        pending = list(word_items)
+        while pending:
+            try:
+                with self.word_pool.checkout() as word:
+                    while pending:
+                        i = pending.pop(0)
+                        src, dst = pairs[i]
+                        try:
+                            if cancel_tokens[i]:
+                                cancel_tokens[i].raise_if_cancelled()
+                            checkpoint(src)
+                            attach_process(self.word_pool.process_id(word))
+                            self._save_with_word(word, src, dst, profile)
+                            results[i] = dst
+                        except Exception as e:
+                            results[i] = as_timeout(e)
+                            if results[i] is e:
+                                continue
+                            # The watchdog killed this Word; retire it and carry on with a fresh one
+                            raise results[i]
+            except ConversionTimeoutError:
+                continue
+            except Exception as e:
+                # Word itself failed; every document not yet converted fails with it
+                for i in pending:
+                    results[i] = e
+                pending = []
+        others = [i for i in range(len(pairs)) if i not in word_items]
+        if others:
+            converted = super().convert_many([pairs[i] for i in others], options, [cancel_tokens[i] for i in others])
+            for i, result in zip(others, converted):
+                results[i] = result
+        return results
+
+class LibreOfficeBackend(ConverterBackend):
+    """
+    Headless LibreOffice. A persistent listener owns the profile; each `soffice --convert-to`
+    call started with the same -env:UserInstallation hands its work to that running
+    instance instead of booting a new office, which removes most of the startup cost.
+    """
+
+    name = "libreoffice"
+    fidelity = 'standard'
+    formats = {
+        '.doc': ('.pdf', '.docx'), '.docx': ('.pdf', '.docx'), '.rtf': ('.pdf', '.docx'),
+        '.odt': ('.pdf', '.docx'), '.xls': ('.pdf',), '.xlsx': ('.pdf',), '.xlsm': ('.pdf',),
+        '.ods': ('.pdf',),
+    }
+    FILTERS = {'.pdf': 'pdf', '.docx': 'docx:MS Word 2007 XML'}
+    CALC_FORMATS = ('.xls', '.xlsx', '.xlsm', '.ods')
+
+    def __init__(self, profile_dir, soffice_path=None, port=2002, timeout=120):
+        self.profile_uri = Path(profile_dir).resolve().as_uri()
+        self.soffice_path = soffice_path
+        self.port = port
+        self.timeout = timeout
+        self._listener = None
+        self._lock = threading.Lock()
+        self._searched = soffice_path is not None
+
+    def _find_soffice(self):
+        if not self._searched:
+            self._searched = True
+            candidates = [shutil.which('soffice'), shutil.which('libreoffice')]
+            if sys.platform == 'win32':
+                for root in (os.environ.get('PROGRAMFILES'), os.environ.get('PROGRAMFILES(X86)')):
+                    if root:
+                        candidates.append(os.path.join(root, 'LibreOffice', 'program', 'soffice.exe'))
+            self.soffice_path = next((c for c in candidates if c and os.path.isfile(c)), None)
+        return self.soffice_path
+
+    def is_available(self):
+        return self._find_soffice() is not None
+
+    def _listener_ready(self):
+        try:
+            with socket.create_connection(('127.0.0.1', self.port), timeout=0.5):
+                return True
+        except OSError:
+            return False
+
+    def start(self):
+        """Start the listener once; reuse one already running on the port (e.g. from another PDFOperations)."""
+        with self._lock:
+            if self._listener_ready():
+                return
+            if self._listener is None or self._listener.poll() is not None:
+                self._listener = subprocess.Popen(
+                    [self._find_soffice(), '--headless', '--invisible', '--nologo', '--norestore',
+                     '--nodefault', f'-env:UserInstallation={self.profile_uri}',
+                     f'--accept=socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext'],
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                )
+                logging.info(f"Started LibreOffice listener (pid {self._listener.pid})")
+            deadline = time.monotonic() + 30
+            while not self._listener_ready():
+                if time.monotonic() > deadline or self._listener.poll() is not None:
+                    raise ConversionError("LibreOffice listener did not start")
+                time.sleep(0.2)
+
+    def _filter(self, src, target, options):
+        """The --convert-to argument, with the profile as PDF export filter options (LibreOffice 7.4+)."""
+        if target != '.pdf':
+            return self.FILTERS[target]
+        profile = profile_options(options)
+        settings = {
+            'Quality': ('long', profile.jpeg_quality),
+            'UseLosslessCompression': ('boolean', profile.lossless_images),
+            'ReduceImageResolution': ('boolean', profile.max_image_dpi is not None),
+            'MaxImageResolution': ('long', profile.max_image_dpi or 300),
+            'SelectPdfVersion': ('long', 1 if profile.pdfa else 0),  # 1 = PDF/A-1b
+            'ExportBookmarks': ('boolean', profile.create_bookmarks),
+        }
+        encoded = json.dumps({
+            key: {'type': kind, 'value': str(value).lower() if kind == 'boolean' else str(value)}
+            for key, (kind, value) in settings.items()
+        }, separators=(',', ':'))
+        app = 'calc' if os.path.splitext(src)[1].lower() in self.CALC_FORMATS else 'writer'
+        return f"pdf:{app}_pdf_Export:{encoded}"
+
+    def _run_convert(self, sources, convert_filter, out_dir):
+        self.start()
+        # A hung conversion wedges the listener, so the watchdog kills it too; start() replaces it
+        checkpoint(sources[0] if len(sources) == 1 else None, documents=len(sources))
+        if self._listener is not None:
+            attach_process(self._listener.pid)
+        command = [self._find_soffice(), f'-env:UserInstallation={self.profile_uri}', '--headless',
+                   '--convert-to', convert_filter, '--outdir', out_dir]
+        completed = subprocess.run(
+            command + [os.path.abspath(s) for s in sources],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=self.timeout * len(sources)
+        )
+        if completed.returncode != 0:
+            raise ConversionError(completed.stderr.decode(errors='replace').strip() or "soffice failed")
+
+    def convert(self, src, dst, options=None):
+        target = os.path.splitext(dst)[1].lower()
+        with tempfile.TemporaryDirectory(prefix="dochandler_lo_") as out_dir:
+            self._run_convert([src], self._filter(src, target, options), out_dir)
+            produced = os.path.join(out_dir, Path(src).stem + target)
+            if not os.path.exists(produced):
+                raise ConversionError(f"LibreOffice produced no output for {src}")
+            shutil.move(produced, dst)
+        return dst
+
+    def convert_many(self, pairs, options=None, cancel_tokens=None):
+        """Hand all documents with the same target to one soffice call; stems must be unique per call."""
+        cancel_tokens = cancel_tokens or [None] * len(pairs)
+        results = [None] * len(pairs)
+        remaining = []
+        for i, token in enumerate(cancel_tokens):
+            if token and token.cancelled:
+                results[i] = TaskCancelledError("Task was cancelled")
+            else:
+                remaining.append(i)
+
+        while remaining:
+            round_items, seen, deferred = [], set(), []
+            for i in remaining:
+                src, dst = pairs[i]
+                key = (Path(src).stem.lower(), os.path.splitext(dst)[1].lower())
+                (deferred if key in seen else round_items).append(i)
+                seen.add(key)
+            remaining = deferred
+
+            by_filter = {}
+            for i in round_items:
+                src, dst = pairs[i]
+                target = os.path.splitext(dst)[1].lower()
+                by_filter.setdefault((target, self._filter(src, target, options)), []).append(i)
+            for (target, convert_filter), items in by_filter.items():
+                with tempfile.TemporaryDirectory(prefix="dochandler_lo_") as out_dir:
+                    try:
+                        self._run_convert([pairs[i][0] for i in items], convert_filter, out_dir)
+                    except Exception as e:
+                        for i in items:
+                            results[i] = e
+                        continue
+                    for i in items:
+                        src, dst = pairs[i]
+                        produced = os.path.join(out_dir, Path(src).stem + target)
+                        if os.path.exists(produced):
+                            shutil.move(produced, dst)
+                            results[i] = dst
+                        else:
+                            results[i] = ConversionError(f"LibreOffice produced no output for {src}")
+        return results
+
+    def close(self):
+        if self._listener and self._listener.poll() is None:
+            self._listener.terminate()
+            try:
+                self._listener.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._listener.kill()
+            logging.info("LibreOffice listener stopped")
+        self._listener = None
+
+class PurePythonBackend(ConverterBackend):
+    """Text-and-tables rendering of .docx/.txt with python-docx and reportlab; no layout fidelity."""
+
+    name = "pure-python"
+    fidelity = 'draft'
+    formats = {'.docx': ('.pdf',), '.txt': ('.pdf',)}
+
+    def is_available(self):
+        try:
+            import docx  # noqa: F401
+            import reportlab  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def convert(self, src, dst, options=None):
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table
+
+        styles = getSampleStyleSheet()
+        story = []
+        if os.path.splitext(src)[1].lower() == '.txt':
+            with open(src, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    story.append(Paragraph(escape(line.rstrip()) or '&nbsp;', styles['Normal']))
+        else:
+            from docx import Document
+            document = Document(src)
+            for paragraph in document.paragraphs:
+                style = paragraph.style.name.replace(' ', '') if paragraph.style is not None else 'Normal'
+                story.append(Paragraph(escape(paragraph.text) or '&nbsp;', styles[style] if style in styles else styles['Normal']))
+            for table in document.tables:
+                rows = [[escape(cell.text) for cell in row.cells] for row in table.rows]
+                if rows:
+                    story.extend([Spacer(1, 6), Table(rows, repeatRows=1), Spacer(1, 6)])
+
+        SimpleDocTemplate(dst, pagesize=letter).build(story or [Spacer(1, 1)])
+        return dst
+
+class XlsxFastBackend(ConverterBackend):
+    """
+    Streams simple single-sheet .xlsx workbooks straight to reportlab.
+
+    Only workbooks that pass xlsx_renderer.assess_workbook are accepted; anything with
+    charts, macros, images or merged layouts is left to Excel. The layout is its own, not
+    Excel's, so it only competes when CONVERSION_FIDELITY allows 'standard' output.
+    """
+
+    name = "xlsx-fast"
+    fidelity = 'standard'
+    formats = {'.xlsx': ('.pdf',)}
+
+    def __init__(self):
+        self._assessments = {}
+        self._lock = threading.Lock()
+
+    def is_available(self):
+        try:
+            import reportlab  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def accepts(self, path, target='.pdf'):
+        if not super().accepts(path, target):
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            reasons = self._assessments.get(key)
+        if reasons is None:
+            from xlsx_renderer import assess_workbook
+            reasons = assess_workbook(path)
+            with self._lock:
+                self._assessments[key] = reasons
+            if reasons:
+                logging.info(f"{os.path.basename(path)} routed to Excel: {', '.join(reasons)}")
+        return not reasons
+
+    def convert(self, src, dst, options=None):
+        from xlsx_renderer import XlsxComplexityError, render_xlsx_to_pdf
+        if not self.accepts(src, os.path.splitext(dst)[1].lower()):
+            raise DocumentRejected(f"{os.path.basename(src)} needs Excel")
+        try:
+            return render_xlsx_to_pdf(src, dst, check_complexity=False)
+        except XlsxComplexityError as e:
+            raise DocumentRejected(str(e))
+
+class DocxFastBackend(ConverterBackend):
+    """
+    Lays out plain Word letters (paragraphs, lists, basic tables, headers/footers, inline
+    images) with python-docx and reportlab instead of launching Word.
+
+    Documents are screened by docx_renderer.classify_docx; text boxes, floating shapes,
+    multi-column or multi-section layouts and unusual fields are left to Word or
+    LibreOffice. The layout is reportlab's, not Word's, so it only competes when
+    CONVERSION_FIDELITY allows 'standard' output.
+    """
+
+    name = "docx-fast"
+    fidelity = 'standard'
+    formats = {'.docx': ('.pdf',)}
+
+    def __init__(self):
+        self._assessments = {}
+        self._lock = threading.Lock()
+
+    def is_available(self):
+        try:
+            import docx  # noqa: F401
+            import reportlab  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def accepts(self, path, target='.pdf'):
+        if not super().accepts(path, target):
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            reasons = self._assessments.get(key)
+        if reasons is None:
+            from docx_renderer import classify_docx
+            reasons = classify_docx(path)
+            with self._lock:
+                self._assessments[key] = reasons
+            if reasons:
+                logging.info(f"{os.path.basename(path)} routed to Word: {', '.join(reasons)}")
+        return not reasons
+
+    def convert(self, src, dst, options=None):
+        from docx_renderer import DocxComplexityError, render_docx_to_pdf
+        if not self.accepts(src, os.path.splitext(dst)[1].lower()):
+            raise DocumentRejected(f"{os.path.basename(src)} needs Word")
+        try:
+            return render_docx_to_pdf(src, dst, check_complexity=False)
+        except DocxComplexityError as e:
+            raise DocumentRejected(str(e))
+
+class BackendSelector:
+    """
+    Routes each conversion to the fastest available backend that meets the fidelity setting.
+
+    Candidates are tried in their configured order until every one of them has been timed
+    for a source/target format pair; from then on the fastest goes first. Timings come from
+    benchmark() (run by `python benchmark.py backends`), never from a document the user is
+    waiting on, and are cached on disk for later app starts.
+    With a ConversionWatchdog every backend call runs under its deadline, and
+    quarantined documents are refused before any converter is started.
+    """
+
+    def __init__(self, backends, fidelity='exact', cache_path=None, cache=None, watchdog=None):
+        self.backends = list(backends)
+        self.fidelity = fidelity
+        self.cache_path = str(cache_path) if cache_path else None
+        self.cache = cache  # Optional ConversionCache of finished outputs
+        self.watchdog = watchdog  # Optional ConversionWatchdog
+        self._lock = threading.Lock()
+        self._available = {}
+        self._timings = self._load_timings()
+
+    def _load_timings(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('timings', {})
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable converter benchmark cache: {e}")
+            return {}
+
+    def _save_timings(self):
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(self.cache_path, 'w', encoding='utf-8') as f:
+                json.dump({'timings': self._timings}, f, indent=2)
+        except Exception as e:
+            logging.warning(f"Could not save converter benchmark cache: {e}")
+
+    def _supervise(self, document=None):
+        return self.watchdog.supervise(document) if self.watchdog else nullcontext()
+
+    def _record_outcome(self, src, error=None):
+        """Tell the watchdog how a document fared; timeouts were already counted when they fired."""
+        if not self.watchdog:
+            return
+        if error is None:
+            self.watchdog.record_success(src)
+        elif not isinstance(error, (ConversionTimeoutError, TaskCancelledError, OSError)):
+            self.watchdog.record_failure(src, error)
+
+    @staticmethod
+    def _route(src, target):
+        return f"{os.path.splitext(src)[1].lower()}>{target}"
+
+    def _is_available(self, backend):
+        if backend.name not in self._available:
+            try:
+                self._available[backend.name] = bool(backend.is_available())
+            except Exception as e:
+                logging.warning(f"Converter backend {backend.name} availability check failed: {e}")
+                self._available[backend.name] = False
+            logging.info(f"Converter backend {backend.name}: {'available' if self._available[backend.name] else 'unavailable'}")
+        return self._available[backend.name]
+
+    def candidates(self, src, target='.pdf'):
+        """Available backends for this route that meet the fidelity setting, fastest measured first."""
+        required = FIDELITY_LEVELS.get(self.fidelity, FIDELITY_LEVELS['exact'])
+        eligible = [
+            b for b in self.backends
+            if FIDELITY_LEVELS.get(b.fidelity, 0) >= required and b.accepts(src, target) and self._is_available(b)
+        ]
+        timings = self._timings.get(self._route(src, target), {})
+        measured = all(b.name in timings for b in eligible)
+
+        def speed(backend):
+            seconds = timings.get(backend.name, 0.0)
+            if seconds is None:
+                # Failed the benchmark: last resort
+                return float('inf')
+            # Until every candidate is timed the configured order stands (sorted() is stable)
+            return seconds if measured else 0.0
+
+        return sorted(eligible, key=speed)
+
+    def select(self, src, target='.pdf'):
+        candidates = self.candidates(src, target)
+        if not candidates:
+            raise ConversionError(
+                f"No converter available for {os.path.splitext(src)[1]} -> {target} at '{self.fidelity}' fidelity"
+            )
+        return candidates[0]
+
+    def benchmark(self, src, dst=None, force=False, options=None):
+        """
+        Time every candidate on src once and record the results.
+
+        With dst, the fastest successful output is moved there and returned.
+        """
+        target = os.path.splitext(dst)[1].lower() if dst else '.pdf'
+        route = self._route(src, target)
+        best = None
+        with tempfile.TemporaryDirectory(prefix="dochandler_bench_") as workspace:
+            for backend in self.candidates(src, target):
+                with self._lock:
+                    if not force and backend.name in self._timings.get(route, {}):
+                        continue
+                out = os.path.join(workspace, f"{backend.name}{target}")
+                try:
+                    backend.start()
+                    started = time.perf_counter()
+                    with self._supervise(src):
+                        backend.convert(src, out, options)
+                    seconds = time.perf_counter() - started
+                    logging.info(f"Benchmarked {backend.name} for {route}: {seconds:.2f}s")
+                    if best is None or seconds < best[1]:
+                        best = (out, seconds, backend.name)
+                except DocumentRejected as e:
+                    # Says nothing about the backend's speed; it is timed on another sample
+                    logging.info(f"Converter backend {backend.name} skipped benchmark document: {e}")
+                    continue
+                except Exception as e:
+                    seconds = None
+                    logging.warning(f"Converter backend {backend.name} failed benchmark for {route}: {e}")
+                with self._lock:
+                    self._timings.setdefault(route, {})[backend.name] = seconds
+            with self._lock:
+                self._save_timings()
+            if dst and best:
+                if self.cache:
+                    self.cache.store(src, best[0], target, best[2], best[1], options)
+                shutil.move(best[0], dst)
+                return dst
+        return None
+
+    def timings(self):
+        with self._lock:
+            return json.loads(json.dumps(self._timings))
+
+    def _from_cache(self, src, dst, options, scratch):
+        """Reuse an earlier conversion of identical content by any current candidate."""
+        if not self.cache:
+            return False
+        target = os.path.splitext(dst)[1].lower()
+        backends = [b.name for b in self.candidates(src, target)]
+        return bool(backends) and self.cache.fetch(src, dst, target, backends, options, link=scratch) is not None
+
+    def convert(self, src, dst, options=None, exclude=(), scratch=False):
+        """
+        Convert src to dst (target format from dst's extension), falling back across candidates.
+
+        scratch=True marks dst as a working file the caller copies elsewhere, so a cached
+        result may be hard-linked there instead of copied.
+        """
+        if not exclude and self._from_cache(src, dst, options, scratch):
+            return dst
+        if self.watchdog:
+            self.watchdog.check(src)
+        target = os.path.splitext(dst)[1].lower()
+        candidates = [b for b in self.candidates(src, target) if b.name not in exclude]
+        if not candidates:
+            raise ConversionError(
+                f"No converter available for {os.path.splitext(src)[1]} -> {target} at '{self.fidelity}' fidelity"
+            )
+        errors = []
+        for backend in candidates:
+            try:
+                started = time.perf_counter()
+                with self._supervise(src):
+                    backend.convert(src, dst, options)
+                if self.cache:
+                    self.cache.store(src, dst, target, backend.name, time.perf_counter() - started, options)
+                self._record_outcome(src)
+                return dst
+            except Exception as e:
+                logging.warning(f"Converter backend {backend.name} failed on {src}: {e}")
+                errors.append((backend.name, e))
+        timed_out_once = any(isinstance(e, ConversionTimeoutError) for _, e in errors)
+        error = ConversionError(f"Could not convert {src}: {'; '.join(f'{name}: {e}' for name, e in errors)}")
+        if not timed_out_once:
+            self._record_outcome(src, error)
+        raise error
+
+    def convert_many(self, pairs, options=None, cancel_tokens=None, scratch=False):
+        """
+        Convert (src, dst) pairs, handing each backend its whole share in one convert_many call.
+
+        :return: List aligned with pairs holding dst or the Exception for that pair.
+        """
+        cancel_tokens = cancel_tokens or [None] * len(pairs)
+        results = [None] * len(pairs)
+        groups = {}
+        for i, (src, dst) in enumerate(pairs):
+            try:
+                if cancel_tokens[i]:
+                    cancel_tokens[i].raise_if_cancelled()
+                if self._from_cache(src, dst, options, scratch):
+                    results[i] = dst
+                    continue
+                if self.watchdog:
+                    self.watchdog.check(src)
+                backend = self.select(src, os.path.splitext(dst)[1].lower())
+                groups.setdefault(backend.name, (backend, []))[1].append(i)
+            except Exception as e:
+                results[i] = e
+
+        for backend, items in groups.values():
+            started = time.perf_counter()
+            with self._supervise():
+                converted = backend.convert_many(
+                    [pairs[i] for i in items], options, [cancel_tokens[i] for i in items]
+                )
+            seconds_each = (time.perf_counter() - started) / len(items)
+            for i, result in zip(items, converted):
+                src, dst = pairs[i]
+                if self.cache and not isinstance(result, Exception):
+                    self.cache.store(src, dst, os.path.splitext(dst)[1].lower(), backend.name, seconds_each, options)
+                fallbacks = [b for b in self.candidates(src, os.path.splitext(dst)[1].lower()) if b is not backend]
+                if isinstance(result, Exception) and not isinstance(result, TaskCancelledError) and fallbacks:
+                    # Give the remaining candidates a chance at documents this backend rejected
+                    try:
+                        result = self.convert(*pairs[i], options, exclude=(backend.name,))
+                    except Exception as e:
+                        result = e
+                elif not isinstance(result, Exception):
+                    self._record_outcome(src)
+                elif not fallbacks:
+                    self._record_outcome(src, result)
+                results[i] = result
+        return results
+
+    def close(self):
+        for backend in self.backends:
+            try:
+                backend.close()
+            except Exception as e:
+                logging.warning(f"Error closing converter backend {backend.name}: {e}")
+
+def default_backends(word_pool, excel_pool, libreoffice_profile):
+    """Backends in preference order for when nothing has been measured yet."""
+    return [
+        XlsxFastBackend(),
+        DocxFastBackend(),
+        OfficeComBackend(word_pool, excel_pool),
+        LibreOfficeBackend(libreoffice_profile),
+        PurePythonBackend(),
+    ]
@@ -3,10 +3,10 @@ import sys
 import logging
 import shutil
 import subprocess
-import tempfile
 import json
 from pathlib import Path
-from contextlib import contextmanager
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
 
 from PyQt6.QtGui import QCursor, QGuiApplication, QIcon
 from PyQt6.QtWidgets import (
@@ -26,22 +26,41 @@ from PyQt6.QtCore import Qt, QTimer, QThread, pyqtSignal
 
 # Local modules
 from ui_components import UIComponents
-from background_processor import TaskType
-from file_operations import FileOperations
-from pdf_operations import PDFOperations
+from background_processor import TaskType, TaskCancelledError
+from file_operations import FileOperations, extract_text_in_worker
+from pdf_operations import PDFOperations, ConversionResult
 from outlook_handler import OutlookHandler
-from outlook_handler import OutlookWorker
+from outlook_handler import OutlookWorker, OutlookDrop, MsgFileWorker
+from sender_companies import SenderCompanyMap, normalize_sender, sender_domain
+from duplicate_index import DuplicateIndex
+import content_sniffer
+from content_sniffer import DOCUMENT_KINDS, IMAGE_KINDS
 from edit_list_dialog import EditListDialog
 from resource_manager import ResourceManager
 from config import CONFIG
+import fast_copy
 
 from workers import WordToPDFWorker 
 
+@dataclass
+class DropBatch:
+    """Documents dropped together; every duplicate check comes back before any of them is named."""
+    files: list  # (path, extension) in drop order
+    save_dir: object
+    share_name: bool = False  # name them all after the first one's company
+    done_label: str = None  # status text once the batch has been handled
+    matches: dict = field(default_factory=dict)  # index in files -> DuplicateMatch or None
+
 class RetryableError(Exception):
     """Custom exception for handling retryable COM server errors."""
     pass
 
 class DocHandlerApp(QWidget):
+    # DropBatch, index of the file in it and its DuplicateMatch (or None), from the io lane
+    duplicate_checked = pyqtSignal(object, int, object)
+    # Continuation and ConversionResults of pending files converted on the COM lane
+    pending_converted = pyqtSignal(object, object)
+
     def __init__(self):
         super().__init__()
         try:
@@ -119,6 +138,15 @@ class DocHandlerApp(QWidget):
             self.dark_mode = False
             self.location_dialog_open = False
             self.processed_files = set()  # Move here from __init__
+            self._prefetched_text = {}  # file_path -> text extracted in the background
+            self._prefetch_handles = {}  # file_path -> TaskHandle of the running extraction
+            self._sharing_names = False  # True while shared_naming() is active
+            self._shared_company_name = None
+            self._file_senders = {}  # file_path -> sender address of the email it came from
+            self._ready_batches = []  # DropBatches whose duplicate checks are all back
+            self._processing_batches = False
+            self._saving = False  # True while pending files are converted for saving
+            self.sender_companies = SenderCompanyMap(CONFIG['SENDER_COMPANIES_PATH'])
             
             config_dir = Path.home() / '.dochandler'
             config_dir.mkdir(parents=True, exist_ok=True)
@@ -156,6 +184,14 @@ class DocHandlerApp(QWidget):
             # Initialize file operations and handlers
             self.file_ops = FileOperations()
             self.pdf_ops = PDFOperations(self.file_ops, self.resource_manager)
+            try:
+                self.duplicate_index = DuplicateIndex(CONFIG['DUPLICATE_INDEX_PATH'])
+            except Exception as e:
+                logging.error(f"Duplicate index unavailable, resent documents will not be detected: {e}")
+                self.duplicate_index = None
+            self.file_ops.duplicate_index = self.duplicate_index
+            self.duplicate_checked.connect(self._on_duplicate_checked)
+            self.pending_converted.connect(self._on_pending_converted)
             self.outlook_handler = OutlookHandler(self.file_ops, self.pdf_ops, self.resource_manager)
 
         except Exception as e:
@@ -204,6 +240,17 @@ class DocHandlerApp(QWidget):
         self.setAcceptDrops(True)
         self.hide()  # Keep the window hidden until fully initialized
 
+        # Quit warm Office instances left idle by conversions run on the GUI thread
+        self.office_reap_timer = QTimer(self)
+        self.office_reap_timer.timeout.connect(self.pdf_ops.reap_idle_office_instances)
+        self.office_reap_timer.start(30000)
+
+        # Attachments staged by a session that crashed or closed before saving them
+        try:
+            self.file_ops.cleanup_partial_files(str(self.default_save_dir))
+        except Exception as e:
+            logging.warning(f"Could not clean up staged files: {e}")
+
 
     def init_ui(self):
         """Initialize the UI components and layout."""
@@ -252,6 +299,24 @@ class DocHandlerApp(QWidget):
             # Save application state
             self.save_config(self.default_save_dir)
 
+            # Stop background lanes before their resources go away
+            processor = getattr(self, 'background_processor', None)
+            if processor:
+                processor.stop()
+
+            # Quit pooled Office instances owned by the GUI thread and any converter processes
+            self.pdf_ops.shutdown_office_instances()
+            self.pdf_ops.close_converters()
+
+            # Release the Outlook session once queued drops are done
+            self.outlook_handler.session.stop()
+
+            if self.duplicate_index:
+                self.duplicate_index.close()
+
+            # Unsaved attachments staged in the save folder go with the pending list
+            self._clear_pending_files()
+
             # Clean up all managed resources
             self.resource_manager.cleanup_all()
 
@@ -630,7 +695,7 @@ class DocHandlerApp(QWidget):
         
         # Clear pending files when enabling auto-convert
         if enabled:
-            self.pending_files.clear()
+            self._clear_pending_files()
             self.ui_components.update_pending_files_list([])
         
         # Show save button when auto-convert is OFF
@@ -660,6 +725,9 @@ class DocHandlerApp(QWidget):
 
     def save_current_file(self):
         """Handle save button click with support for multiple files and Save Quotes mode."""
+        if self._saving:
+            self.ui_components.set_label_text("Still saving the previous files... Please wait.")
+            return
         if not self.pending_files and not self.current_file:
             self.ui_components.show_warning_message("No Files", "No files available to save.")
             self.update_drag_drop_text("Drag and drop an Outlook email attachment, PDFs, or Word documents here.")
@@ -668,151 +736,232 @@ class DocHandlerApp(QWidget):
         try:
             self.update_drag_drop_text("Processing files... Please wait.")
             active_save_dir = self.session_save_dir or self.default_save_dir
+            # Files dropped while these are converted stay pending
+            files = list(self.pending_files)
 
             # Check if we have multiple files to merge
-            if len(self.pending_files) > 1:
-                # Convert all files to PDF first if needed
+            if len(files) > 1:
+                # Name every non-PDF file first, then convert them all in one converter session
                 pdf_files = []
-                for file_path in self.pending_files:
+                to_convert = []
+                temp_names = []
+                for file_path in files:
                     try:
                         if file_path.lower().endswith('.pdf'):
                             pdf_files.append(file_path)
                         else:
-                            # Convert non-PDF files to PDF first
                             if self.filename_portions_enabled:
-                                company_name = self.scan_document_for_company_names(file_path)
-                                if not company_name:
-                                    company_name = self.prompt_for_company_name()
-                                    if not company_name:  # User canceled
-                                        continue
+                                company_name = self._company_name_for(file_path)
+                                if not company_name:  # User canceled
+                                    continue
                                 temp_name = f"{self.filename_portion} - {company_name}.pdf"
                             else:
                                 temp_name = os.path.splitext(os.path.basename(file_path))[0] + '.pdf'
-                            
-                            temp_dir = self.file_ops.create_temp_folder()
-                            temp_pdf = self.pdf_ops.convert_to_pdf(file_path, temp_dir, temp_name)
-                            pdf_files.append(temp_pdf)
+                            # Keep the merge order of the pending list
+                            pdf_files.append(None)
+                            to_convert.append(file_path)
+                            temp_names.append(temp_name)
 
                     except Exception as e:
                         logging.error(f"Error processing file {file_path}: {str(e)}")
                         self.ui_components.show_error_message(
-                            "Processing Error", 
+                            "Processing Error",
                             f"Could not process {os.path.basename(file_path)}: {str(e)}"
                         )
 
-                if pdf_files:
-                    try:
-                        # Generate merged filename
-                        if self.filename_portions_enabled:
-                            company_name = self.prompt_for_company_name()
-                            if company_name:
-                                merged_name = f"{self.filename_portion} - {company_name}_merged.pdf"
-                            else:
-                                merged_name = "merged_document.pdf"
-                        else:
-                            merged_name = "merged_document.pdf"
-
-                        # Get unique filename
-                        output_path = self.file_ops.get_unique_filename(active_save_dir, merged_name)
+                temp_dir = self.file_ops.create_temp_folder() if to_convert else None
+                self._convert_pending(
+                    to_convert, temp_dir, temp_names,
+                    lambda results: self._save_merged(files, pdf_files, results, active_save_dir)
+                )
 
-                        # Merge PDFs
-                        merged_path = self.pdf_ops.merge_pdfs(pdf_files, output_path)
+            else:
+                # Single file processing (existing code for single file)
+                file_path = files[0]
+                if self.filename_portions_enabled:
+                    company_name = self._company_name_for(file_path)
+                    if not company_name:  # User canceled
+                        return
 
-                        # Update UI
-                        self.ui_components.update_recent_files(merged_path)
-                        self.ui_components.set_label_text(f"Merged file saved: {merged_path}")
+                    new_file_name = f"{self.filename_portion} - {company_name}.pdf"
+                else:
+                    new_file_name = os.path.basename(file_path)
+                    if not new_file_name.lower().endswith('.pdf'):
+                        new_file_name = os.path.splitext(new_file_name)[0] + '.pdf'
 
-                        logging.info(f"Successfully merged files to: {merged_path}")
+                self._convert_pending(
+                    [file_path], active_save_dir, [new_file_name],
+                    lambda results: self._save_single(files, results[0])
+                )
 
-                    except Exception as e:
-                        logging.error(f"Error merging PDFs: {str(e)}")
-                        self.ui_components.show_error_message("Merge Error", f"Error merging PDFs: {str(e)}")
+        except Exception as e:
+            logging.error(f"Error saving files: {str(e)}", exc_info=True)
+            self.ui_components.show_error_message("Save Error", f"Error saving files: {str(e)}")
+        finally:
+            self.ui_components.hide_progress()
 
-                # Clean up temporary files
-                for pdf_file in pdf_files:
-                    if pdf_file not in self.pending_files:  # Only delete temporary conversions
-                        try:
-                            os.remove(pdf_file)
-                        except Exception as e:
-                            logging.warning(f"Failed to clean up temporary file {pdf_file}: {str(e)}")
+    def _convert_pending(self, paths, save_dir, names, then):
+        """
+        Convert pending files with pdf_ops.convert_many on the COM lane, then call then(results) here.
 
-            else:
-                # Single file processing (existing code for single file)
-                file_path = self.pending_files[0]
-                try:
-                    if self.filename_portions_enabled:
-                        company_name = self.scan_document_for_company_names(file_path)
-                        if not company_name:
-                            company_name = self.prompt_for_company_name()
-                            if not company_name:  # User canceled
-                                return
-                        
-                        new_file_name = f"{self.filename_portion} - {company_name}.pdf"
-                    else:
-                        new_file_name = os.path.basename(file_path)
-                        if not new_file_name.lower().endswith('.pdf'):
-                            new_file_name = os.path.splitext(new_file_name)[0] + '.pdf'
+        Office never runs on the GUI thread, so the window stays responsive through a long
+        batch; Save is refused until then has run. A batch that fails as a whole reports its
+        error for every file. Without a background processor the files are converted here.
+        """
+        self._saving = True
+        self.ui_components.save_button.setEnabled(False)
+        processor = getattr(self, 'background_processor', None)
+        if not paths or not processor:
+            try:
+                results = self.pdf_ops.convert_many(paths, save_dir, names) if paths else []
+            except Exception as e:
+                results = [ConversionResult(path, error=e) for path in paths]
+            self._on_pending_converted(then, results)
+            return
 
-                    saved_path = self.pdf_ops.convert_to_pdf(file_path, active_save_dir, new_file_name)
-                    self.ui_components.update_recent_files(saved_path)
-                    self.ui_components.set_label_text(f"File saved: {saved_path}")
-                    self.ui_components.drag_drop_area.set_status("Done! Let's save another file.")
+        def report(results):
+            self.pending_converted.emit(then, results)
 
-                except Exception as e:
-                    logging.error(f"Error processing file: {str(e)}")
-                    self.ui_components.show_error_message(
-                        "Processing Error",
-                        f"Could not process {os.path.basename(file_path)}: {str(e)}"
-                    )
+        def report_error(error):
+            if isinstance(error, TaskCancelledError):
+                # Stopped on exit: the files stay pending, and staged ones are cleaned up at the next start
+                logging.info(f"Saving {len(paths)} file(s) was cancelled")
+                return
+            self.pending_converted.emit(then, [ConversionResult(path, error=error) for path in paths])
 
-            # Clear pending files after processing
-            self.pending_files.clear()
-            self.ui_components.update_pending_files_list([])
+        processor.add_task(
+            1, TaskType.BATCH_CONVERSION, self.pdf_ops.convert_many,
+            paths=list(paths), save_dir=save_dir, names=list(names), callback=report, errback=report_error
+        )
+        self.ui_components.set_label_text(f"Converting {len(paths)} file(s)... Please wait.")
 
+    def _on_pending_converted(self, then, results):
+        """Carry on saving with the results of _convert_pending, back on the GUI thread."""
+        try:
+            then(results)
         except Exception as e:
             logging.error(f"Error saving files: {str(e)}", exc_info=True)
             self.ui_components.show_error_message("Save Error", f"Error saving files: {str(e)}")
         finally:
+            self._saving = False
+            self.ui_components.save_button.setEnabled(True)
             self.ui_components.hide_progress()
 
-    def _handle_merged_files(self, active_save_dir):
-        """Handle merging multiple files into a single PDF."""
-        try:
-            # Convert all files to PDF first
-            pdf_files = []
-            temp_files = []  # Track temporary files for cleanup
+    def _save_merged(self, files, pdf_files, results, active_save_dir):
+        """Merge the PDFs of save_current_file's files once their conversions are back."""
+        results = iter(results)
+        for position, pdf_file in enumerate(pdf_files):
+            if pdf_file is None:
+                result = next(results)
+                pdf_files[position] = result.pdf_path
+                if not result.ok:
+                    logging.error(f"Error processing file {result.source}: {str(result.error)}")
+                    self.ui_components.show_error_message(
+                        "Processing Error",
+                        f"Could not process {os.path.basename(result.source)}: {str(result.error)}"
+                    )
+        pdf_files = [pdf_file for pdf_file in pdf_files if pdf_file]
 
-            # Show progress
-            self.ui_components.show_progress(0)
-            total_files = len(self.pending_files)
+        if pdf_files:
+            try:
+                # Generate merged filename
+                if self.filename_portions_enabled:
+                    company_name = self.prompt_for_company_name()
+                    if company_name:
+                        merged_name = f"{self.filename_portion} - {company_name}_merged.pdf"
+                    else:
+                        merged_name = "merged_document.pdf"
+                else:
+                    merged_name = "merged_document.pdf"
 
-            for index, file_path in enumerate(self.pending_files):
+                # Get unique filename
+                output_path = self.file_ops.get_unique_filename(active_save_dir, merged_name)
+
+                # Merge PDFs
                 try:
-                    # Update progress
-                    progress = int((index / total_files) * 50)  # First 50% for conversion
-                    self.ui_components.show_progress(progress)
-                    
-                    if file_path.lower().endswith('.pdf'):
-                        pdf_files.append(file_path)
-                    else:
-                        # Create temporary file for conversion
-                        temp_dir = self.file_ops.create_temp_folder()
-                        temp_name = f"temp_{index}_{os.path.basename(file_path)}"
-                        temp_pdf = self.pdf_ops.convert_to_pdf(
-                            file_path,
-                            temp_dir,
-                            temp_name
-                        )
-                        pdf_files.append(temp_pdf)
-                        temp_files.append(temp_pdf)
+                    merged_path = self.pdf_ops.merge_pdfs(pdf_files, output_path)
+                except Exception:
+                    self.file_ops.release_filename(output_path, written=False)
+                    raise
+                self.file_ops.release_filename(output_path)
+
+                # Update UI
+                self.ui_components.update_recent_files(merged_path)
+                self.ui_components.set_label_text(f"Merged file saved: {merged_path}")
+
+                logging.info(f"Successfully merged files to: {merged_path}")
+
+            except Exception as e:
+                logging.error(f"Error merging PDFs: {str(e)}")
+                self.ui_components.show_error_message("Merge Error", f"Error merging PDFs: {str(e)}")
 
+        # Clean up temporary files
+        for pdf_file in pdf_files:
+            if pdf_file not in files:  # Only delete temporary conversions
+                try:
+                    os.remove(pdf_file)
                 except Exception as e:
-                    logging.error(f"Error converting file {file_path}: {str(e)}")
+                    logging.warning(f"Failed to clean up temporary file {pdf_file}: {str(e)}")
+
+        # Clear the saved files from the pending list
+        self._clear_pending_files(files)
+        self.ui_components.update_pending_files_list(self.pending_files)
+
+    def _save_single(self, files, result):
+        """Report the one file save_current_file converted or copied into the save folder."""
+        if result.ok:
+            self.ui_components.update_recent_files(result.pdf_path)
+            self.ui_components.set_label_text(f"File saved: {result.pdf_path}")
+            self.ui_components.drag_drop_area.set_status("Done! Let's save another file.")
+        else:
+            logging.error(f"Error processing file: {str(result.error)}")
+            self.ui_components.show_error_message(
+                "Processing Error",
+                f"Could not process {os.path.basename(result.source)}: {str(result.error)}"
+            )
+
+        # Clear the saved file from the pending list
+        self._clear_pending_files(files)
+        self.ui_components.update_pending_files_list(self.pending_files)
+
+    def _handle_merged_files(self, active_save_dir):
+        """Handle merging multiple files into a single PDF; the conversions run on the COM lane."""
+        files = list(self.pending_files)
+
+        # Show progress
+        self.ui_components.show_progress(0)
+
+        # Convert every non-PDF file in one converter session (first 50% of progress)
+        to_convert = [(index, file_path) for index, file_path in enumerate(files)
+                      if not file_path.lower().endswith('.pdf')]
+        temp_dir = self.file_ops.create_temp_folder() if to_convert else None
+        self._convert_pending(
+            [file_path for _, file_path in to_convert],
+            temp_dir,
+            [f"temp_{index}_{os.path.basename(file_path)}" for index, file_path in to_convert],
+            lambda results: self._merge_converted_files(files, to_convert, results, active_save_dir)
+        )
+
+    def _merge_converted_files(self, files, to_convert, results, active_save_dir):
+        """Merge the pending files once _handle_merged_files' conversions are back."""
+        pdf_files = []
+        temp_files = []  # Track temporary files for cleanup
+        try:
+            converted = {index: result for (index, _), result in zip(to_convert, results)}
+            self.ui_components.show_progress(50)
+
+            for index, file_path in enumerate(files):
+                if index not in converted:
+                    pdf_files.append(file_path)
+                elif converted[index].ok:
+                    pdf_files.append(converted[index].pdf_path)
+                    temp_files.append(converted[index].pdf_path)
+                else:
+                    logging.error(f"Error converting file {file_path}: {str(converted[index].error)}")
                     self.ui_components.show_warning_message(
                         "Conversion Warning",
                         f"Could not convert {os.path.basename(file_path)}. Skipping file."
                     )
-                    continue
 
             if not pdf_files:
                 raise ValueError("No valid PDF files to merge")
@@ -832,15 +981,20 @@ class DocHandlerApp(QWidget):
 
             # Merge the PDFs
             self.ui_components.show_progress(75)  # Show merge progress
-            merged_path = self.pdf_ops.merge_pdfs(pdf_files, output_path)
+            try:
+                merged_path = self.pdf_ops.merge_pdfs(pdf_files, output_path)
+            except Exception:
+                self.file_ops.release_filename(output_path, written=False)
+                raise
+            self.file_ops.release_filename(output_path)
 
             # Update UI and recent files
             self.ui_components.update_recent_files(merged_path)
             self.ui_components.set_label_text(f"Merged file saved: {merged_path}")
-            
+
             # Clear pending files
-            self.pending_files.clear()
-            self.ui_components.update_pending_files_list([])
+            self._clear_pending_files(files)
+            self.ui_components.update_pending_files_list(self.pending_files)
             self.ui_components.show_progress(100)
 
             logging.info(f"Successfully merged files to: {merged_path}")
@@ -858,37 +1012,33 @@ class DocHandlerApp(QWidget):
                     logging.warning(f"Failed to clean up temporary file {temp_file}: {str(e)}")
 
     def _handle_individual_files(self, active_save_dir):
-        """Handle saving files individually."""
-        total_files = len(self.pending_files)
-        
-        for index, file_path in enumerate(self.pending_files):
+        """Handle saving files individually; the conversions run on the COM lane."""
+        files = list(self.pending_files)
+        total_files = len(files)
+        to_save = []
+        new_file_names = []
+
+        # Work out every file name first (this may prompt), then convert them in one session
+        for index, file_path in enumerate(files):
             try:
                 # Update progress
-                progress = int((index / total_files) * 100)
+                progress = int((index / total_files) * 50)
                 self.ui_components.show_progress(progress)
 
                 if self.filename_portions_enabled:
                     # Save Quotes mode - scan for company name
-                    company_name = self.scan_document_for_company_names(file_path)
-                    if not company_name:
-                        company_name = self.prompt_for_company_name()
-                        if not company_name:  # User canceled
-                            continue
-                    
+                    company_name = self._company_name_for(file_path)
+                    if not company_name:  # User canceled
+                        continue
+
                     new_file_name = f"{self.filename_portion} - {company_name}.pdf"
                 else:
                     new_file_name = os.path.basename(file_path)
                     if not new_file_name.lower().endswith('.pdf'):
                         new_file_name = os.path.splitext(new_file_name)[0] + '.pdf'
 
-                # Convert and save the file
-                saved_path = self.pdf_ops.convert_to_pdf(file_path, active_save_dir, new_file_name)
-
-                # Update recent files and UI
-                self.ui_components.update_recent_files(saved_path)
-                self.ui_components.set_label_text(f"File saved: {saved_path}")
-
-                logging.info(f"Processed file saved to {saved_path}")
+                to_save.append(file_path)
+                new_file_names.append(new_file_name)
 
             except Exception as e:
                 logging.error(f"Error processing file {file_path}: {str(e)}", exc_info=True)
@@ -897,9 +1047,28 @@ class DocHandlerApp(QWidget):
                     f"Could not process {os.path.basename(file_path)}: {str(e)}"
                 )
 
+        self._convert_pending(
+            to_save, active_save_dir, new_file_names, lambda results: self._report_saved_files(files, results)
+        )
+
+    def _report_saved_files(self, files, results):
+        """Report each file _handle_individual_files converted and saved."""
+        for result in results:
+            if result.ok:
+                # Update recent files and UI
+                self.ui_components.update_recent_files(result.pdf_path)
+                self.ui_components.set_label_text(f"File saved: {result.pdf_path}")
+                logging.info(f"Processed file saved to {result.pdf_path}")
+            else:
+                logging.error(f"Error processing file {result.source}: {str(result.error)}")
+                self.ui_components.show_error_message(
+                    "Processing Error",
+                    f"Could not process {os.path.basename(result.source)}: {str(result.error)}"
+                )
+
         # Clear pending files after processing
-        self.pending_files.clear()
-        self.ui_components.update_pending_files_list([])
+        self._clear_pending_files(files)
+        self.ui_components.update_pending_files_list(self.pending_files)
         self.ui_components.show_progress(100)
 
     def toggle_debug_mode(self):
@@ -920,7 +1089,7 @@ class DocHandlerApp(QWidget):
         if enabled:
             self.ui_components.set_label_text("Select a filename portion and add files.")
         else:
-            self.pending_files.clear()
+            self._clear_pending_files()
             self.ui_components.update_pending_files_list([])
 
         logging.info(f"Save Quotes {'enabled' if enabled else 'disabled'}.")
@@ -1053,19 +1222,11 @@ class DocHandlerApp(QWidget):
                 raise ValueError("Invalid drop data")
 
             if self.file_ops.is_outlook_item(mime_data):
-                temp_file_path = self.outlook_handler.get_outlook_item(mime_data)
-                if temp_file_path and os.path.exists(temp_file_path):
-                    self.process_dropped_file(temp_file_path)
+                # Extraction runs on the Outlook session thread; the result comes back via on_outlook_processed
+                self.handle_outlook_drop(mime_data)
             else:
                 # Handle regular file drops
-                for url in mime_data.urls():
-                    file_path = url.toLocalFile()
-                    if file_path:
-                        file_ext = os.path.splitext(file_path)[1].lower()
-                        if file_ext in ['.pdf', '.doc', '.docx']:
-                            self.process_dropped_file(file_path)
-                        else:
-                            logging.warning(f"Skipping unsupported file type: {file_path}")
+                self.process_local_files([url.toLocalFile() for url in mime_data.urls() if url.toLocalFile()])
 
             event.acceptProposedAction()
 
@@ -1077,23 +1238,11 @@ class DocHandlerApp(QWidget):
     def handle_file_drop(self, mime_data, temp_folder):
         try:
             if self.file_ops.is_outlook_item(mime_data):
-                temp_file_path = self.outlook_handler.get_outlook_item(mime_data)
-                if temp_file_path and os.path.exists(temp_file_path):
-                    self.process_dropped_file(temp_file_path)  # Changed from process_single_file
-                    try:
-                        os.remove(temp_file_path)
-                    except Exception as e:
-                        logging.warning(f"Error removing temp file: {str(e)}")
+                # on_outlook_processed handles and removes the temporary file
+                self.handle_outlook_drop(mime_data)
                 return
 
-            for url in mime_data.urls():
-                file_path = url.toLocalFile()
-                if file_path:
-                    file_ext = os.path.splitext(file_path)[1].lower()
-                    if file_ext in ['.pdf', '.doc', '.docx']:
-                        self.process_dropped_file(file_path)  # Changed from process_single_file
-                    else:
-                        logging.warning(f"Skipping unsupported file type: {file_path}")
+            self.process_local_files([url.toLocalFile() for url in mime_data.urls() if url.toLocalFile()])
 
         except Exception as e:
             logging.error(f"Error handling dropped files: {str(e)}", exc_info=True)
@@ -1114,29 +1263,198 @@ class DocHandlerApp(QWidget):
             return True
         return False
 
+    def sort_by_content(self, paths):
+        """
+        Sort files by what their contents say they are, whatever their extension.
+
+        Returns (documents, images, emails, skipped). Documents come back named with
+        the extension their contents call for; a truncated or corrupt PDF is only kept
+        if the user chooses to save it anyway.
+        """
+        active_save_dir = self.session_save_dir or self.default_save_dir
+        documents, image_paths, msg_paths, skipped = [], [], [], []
+        for path in paths:
+            try:
+                sniffed = content_sniffer.sniff(path)
+                if sniffed.kind in DOCUMENT_KINDS:
+                    if self._keep_damaged(path, sniffed):
+                        documents.append(self.file_ops.stage_typed_file(path, sniffed, active_save_dir))
+                        continue
+                elif sniffed.kind in IMAGE_KINDS:
+                    image_paths.append(path)
+                    continue
+                elif sniffed.kind == 'msg':
+                    msg_paths.append(path)
+                    continue
+                logging.warning(f"Skipping {path}: {sniffed.describe()}")
+            except OSError as e:
+                logging.warning(f"Skipping unreadable file {path}: {e}")
+            skipped.append(path)
+        return documents, image_paths, msg_paths, skipped
+
+    def _keep_damaged(self, path, sniffed):
+        """True unless the file is damaged and the user chose not to save it."""
+        if not sniffed.damaged:
+            return True
+        return self.ui_components.get_confirmation(
+            "Damaged File",
+            f"'{os.path.basename(path)}' looks incomplete or damaged: {sniffed.detail}.\n\n"
+            f"Save it anyway?"
+        )
+
+    def process_local_files(self, paths):
+        """Send dropped files down the document, image or email path by their real type."""
+        documents, image_paths, msg_paths, _ = self.sort_by_content(paths)
+        for path in documents:
+            self.process_dropped_file(path)
+        if image_paths:
+            self.process_dropped_images(image_paths)
+        if msg_paths:
+            self.handle_msg_files(msg_paths)
+
+    def _typed_document(self, file_path, save_dir):
+        """(path, extension) of a document to name and convert; a mislabelled file gets a correctly named copy."""
+        sniffed = content_sniffer.sniff(file_path)
+        if sniffed.kind not in DOCUMENT_KINDS:
+            raise ValueError(f"Unsupported file type: {sniffed.describe()}")
+        return self.file_ops.stage_typed_file(file_path, sniffed, save_dir), sniffed.extension
+
+    def process_dropped_images(self, image_paths):
+        """Combine dropped photos or scans into one PDF, then handle it like a dropped PDF."""
+        pdf_path = self._combine_images(image_paths)
+        if pdf_path:
+            self.process_dropped_file(pdf_path)
+
+    def _combine_images(self, image_paths):
+        """
+        The PDF made from image_paths, one page per image, or None if it failed and the user was told.
+
+        The PDF is staged like a dropped attachment, so saving it renames it into place and
+        skipping or merging it discards it along with its staging folder.
+        """
+        staging_dir = None
+        try:
+            with self.busy_cursor():
+                self.ui_components.set_label_text(f"Combining {len(image_paths)} image(s) into a PDF")
+                staging_dir = self.file_ops.create_partial_directory(self.session_save_dir or self.default_save_dir)
+                name = os.path.splitext(os.path.basename(image_paths[0]))[0]
+                return self.pdf_ops.convert_images_to_pdf(image_paths, staging_dir, name)
+        except Exception as e:
+            if staging_dir:
+                self.file_ops.discard_partial_directory(staging_dir)
+            logging.error(f"Error converting dropped images: {str(e)}", exc_info=True)
+            self.ui_components.show_error_message("Processing Error", str(e))
+            self.update_drag_drop_text("An error occurred. Please try again.")
+            return None
+
     def process_dropped_file(self, file_path):
         """Process a dropped file, ensuring filename conventions apply correctly in auto-convert mode."""
-        if file_path in self.processed_files:
-            logging.info(f"File already processed: {file_path}")
+        self.process_dropped_documents([file_path])
+
+    def process_dropped_documents(self, paths, share_name=False, done_label=None):
+        """
+        Check dropped documents for duplicates, then name, save or convert the ones to keep.
+
+        The duplicate lookups hash files, so they run on the io lane; the batch carries on
+        in _on_duplicate_checked once all of them are back. With share_name the documents
+        are named together inside shared_naming().
+        """
+        active_save_dir = self.session_save_dir or self.default_save_dir
+        files = []
+        for file_path in paths:
+            if file_path in self.processed_files:
+                logging.info(f"File already processed: {file_path}")
+                continue
+            try:
+                with self.busy_cursor():
+                    logging.info(f"Processing dropped file: {file_path}")
+                    self.ui_components.show_progress(0)
+                    self.ui_components.set_label_text(f"Processing: {file_path}")
+
+                    if not os.path.exists(file_path):
+                        raise FileNotFoundError(f"File not found: {file_path}")
+
+                    typed_path, file_ext = self._typed_document(file_path, active_save_dir)
+                    if typed_path != file_path and file_path in self._file_senders:
+                        self._file_senders[typed_path] = self._file_senders.pop(file_path)
+                    files.append((typed_path, file_ext))
+            except Exception as e:
+                logging.error(f"Error processing dropped file: {str(e)}", exc_info=True)
+                self.ui_components.show_error_message("Processing Error", str(e))
+                self.update_drag_drop_text("An error occurred. Please try again.")
+            finally:
+                self.ui_components.hide_progress()
+        if not files:
+            return
+
+        # A resent quote is recognised before it is named, converted or written
+        batch = DropBatch(files, active_save_dir, share_name=share_name, done_label=done_label)
+        processor = getattr(self, 'background_processor', None)
+        if not self.duplicate_index or not processor:
+            for index, (file_path, _) in enumerate(files):
+                batch.matches[index] = self._find_duplicate(file_path, active_save_dir) if self.duplicate_index else None
+            self._batch_ready(batch)
+            return
+
+        for index, (file_path, _) in enumerate(files):
+            def report(match, index=index):
+                self.duplicate_checked.emit(batch, index, match)
+
+            def report_error(error, index=index, path=file_path):
+                # The check is only a safeguard: a lookup that did not finish lets the file through
+                logging.warning(f"Duplicate check for {path} did not finish: {error}")
+                self.duplicate_checked.emit(batch, index, None)
+
+            processor.add_task(
+                1, TaskType.DUPLICATE_CHECK, self._find_duplicate,
+                path=file_path, save_dir=active_save_dir, callback=report, errback=report_error
+            )
+        names = ", ".join(os.path.basename(path) for path, _ in files)
+        self.ui_components.set_label_text(f"Checking: {names}")
+
+    def _on_duplicate_checked(self, batch, index, match):
+        """Record one duplicate lookup that came back from the io lane; the last one carries on with the batch."""
+        batch.matches[index] = match
+        if len(batch.matches) == len(batch.files):
+            self._batch_ready(batch)
+
+    def _batch_ready(self, batch):
+        """Process batches one at a time: a dialog shown for one lets the next one's signal through."""
+        self._ready_batches.append(batch)
+        if self._processing_batches:
             return
+        self._processing_batches = True
+        try:
+            while self._ready_batches:
+                self._process_batch(self._ready_batches.pop(0))
+        finally:
+            self._processing_batches = False
 
+    def _process_batch(self, batch):
+        """Name and save or convert every document of a checked batch the user does not skip."""
+        with self.shared_naming() if batch.share_name else nullcontext():
+            for index, (file_path, file_ext) in enumerate(batch.files):
+                if self._skip_duplicate(file_path, batch.save_dir, batch.matches.get(index)):
+                    continue
+                self._process_typed_file(file_path, file_ext, batch.save_dir)
+                if file_path not in self.pending_files:
+                    # Named and saved, or queued for conversion under its name; the sender is not needed again
+                    self._file_senders.pop(file_path, None)
+        if batch.done_label:
+            self.ui_components.set_label_text(batch.done_label)
+
+    def _process_typed_file(self, file_path, file_ext, active_save_dir):
+        """Queue, save or convert a dropped document that has passed the duplicate check."""
         try:
             with self.busy_cursor():
-                logging.info(f"Processing dropped file: {file_path}")
                 self.ui_components.show_progress(0)
-                self.ui_components.set_label_text(f"Processing: {file_path}")
-
-                if not os.path.exists(file_path):
-                    raise FileNotFoundError(f"File not found: {file_path}")
-
-                active_save_dir = self.session_save_dir or self.default_save_dir
-                file_ext = os.path.splitext(file_path)[1].lower()
 
                 # Handle non-auto-convert mode
                 if not self.auto_convert_enabled:
                     if file_ext in ['.pdf', '.doc', '.docx']:
                         if file_path not in self.pending_files:
                             self.pending_files.append(file_path)
+                            self._prefetch_document_text(file_path)
                         self.ui_components.update_pending_files_list(self.pending_files)
                         self.ui_components.set_label_text(f"Ready to save: {len(self.pending_files)} files")
                         return
@@ -1152,19 +1470,32 @@ class DocHandlerApp(QWidget):
                             raise ValueError("Filename portion is required in Save Quotes mode.")
 
                         # Extract or prompt for company name
-                        company_name = self.scan_document_for_company_names(file_path)
+                        company_name = self._company_name_for(file_path)
                         if not company_name:
-                            company_name = self.prompt_for_company_name()
-                            if not company_name:
-                                return  # User canceled
+                            return  # User canceled
 
                         # Format filename correctly
                         new_filename = f"{self.filename_portion} - {company_name}.pdf"
 
                     # Convert Word files to PDF
                     if file_ext in ['.doc', '.docx']:
-                        converted_path = self.pdf_ops.convert_to_pdf(file_path, active_save_dir, new_filename)
-                        self._on_file_processed(converted_path)
+                        processor = getattr(self, 'background_processor', None)
+                        if processor:
+                            # Runs on the COM lane; completion is reported through handle_task_completed
+                            handle = processor.add_task(
+                                1, TaskType.FILE_CONVERSION, self.pdf_ops.convert_to_pdf,
+                                file_path, str(active_save_dir), new_filename,
+                                replay_name='convert_to_pdf', coalesce_key='word_to_pdf'
+                            )
+                            if handle:
+                                self.ui_components.set_label_text(f"Converting: {os.path.basename(file_path)}")
+                            else:
+                                self.ui_components.set_label_text(
+                                    f"Not converted: {os.path.basename(file_path)} is already being converted"
+                                )
+                        else:
+                            converted_path = self.pdf_ops.convert_to_pdf(file_path, active_save_dir, new_filename)
+                            self._on_file_processed(converted_path)
                     else:  # PDF files
                         saved_path = self.file_ops.save_file(file_path, active_save_dir, new_filename)
                         self._on_file_processed(saved_path)
@@ -1179,6 +1510,116 @@ class DocHandlerApp(QWidget):
         finally:
             self.ui_components.hide_progress()
 
+    def _find_duplicate(self, path, save_dir, cancel_token=None):
+        """The indexed document in save_dir that path duplicates, or None (also if the lookup fails)."""
+        try:
+            return self.duplicate_index.find_duplicate(path, save_dir, cancel_token=cancel_token)
+        except TaskCancelledError:
+            raise
+        except Exception as e:
+            logging.warning(f"Duplicate check failed for {path}: {e}")
+            return None
+
+    def _skip_duplicate(self, file_path, save_dir, match):
+        """True if match shows the document is already in save_dir and the user chose to skip it."""
+        if not match:
+            return False
+        how = "identical to" if match.exact else "the same document as (only its metadata differs)"
+        if not self.ui_components.get_confirmation(
+            "Duplicate Document",
+            f"{os.path.basename(file_path)} is {how}\n{os.path.basename(match.path)}\n"
+            f"which is already in {save_dir}.\n\nSkip saving it again?"
+        ):
+            return False
+        logging.info(f"Skipped {file_path}: duplicate of {match.path}")
+        self.file_ops.discard_partial_file(file_path)
+        self._file_senders.pop(file_path, None)
+        self.ui_components.set_label_text(f"Already saved: {os.path.basename(match.path)}")
+        return True
+
+    @contextmanager
+    def shared_naming(self):
+        """Within the block every file is named with the company found or entered for the first one."""
+        self._shared_company_name = None
+        self._sharing_names = True
+        try:
+            yield
+        finally:
+            self._sharing_names = False
+            self._shared_company_name = None
+
+    def _company_name_for(self, file_path):
+        """
+        The company to name a file after; None or "" if the user cancels.
+
+        Files from a known email sender resolve from the sender table without reading
+        the document; otherwise the document is scanned and, failing that, the user is
+        asked. Whatever is settled on for an emailed file is learned for its sender.
+        """
+        if self._sharing_names and self._shared_company_name:
+            return self._shared_company_name
+        sender = self._file_senders.get(file_path)
+        company_name = self._company_name_from_sender(sender) if sender else None
+        if not company_name:
+            company_name = self.scan_document_for_company_names(file_path)
+            if not company_name:
+                company_name = self.prompt_for_company_name()
+        if company_name and sender:
+            self.sender_companies.learn(sender, company_name)
+        if self._sharing_names:
+            self._shared_company_name = company_name
+        return company_name
+
+    def _company_name_from_sender(self, sender):
+        """The learned company of an email sender; a match on the domain alone is confirmed first."""
+        company_name, source = self.sender_companies.lookup(sender)
+        if not company_name:
+            return None
+        if source == 'domain' and not self.ui_components.get_confirmation(
+            "Confirm Company Name",
+            f"Emails from {sender_domain(normalize_sender(sender))} are from: {company_name}\nIs this correct?"
+        ):
+            return None
+        logging.info(f"Company name '{company_name}' resolved from sender {sender}")
+        return company_name
+
+    def _prefetch_document_text(self, file_path):
+        """Start extracting text for a pending file so the company scan at save time is instant."""
+        processor = getattr(self, 'background_processor', None)
+        if not processor or not self.filename_portions_enabled or file_path in self._prefetch_handles:
+            return
+
+        def store_text(text, path=file_path):
+            self._prefetched_text[path] = text
+            self._prefetch_handles.pop(path, None)
+
+        handle = processor.add_task(
+            2, TaskType.TEXT_EXTRACTION, extract_text_in_worker, file_path,
+            callback=store_text
+        )
+        if handle:
+            self._prefetch_handles[file_path] = handle
+
+    def _clear_pending_files(self, files=None):
+        """Take files (by default all) off the pending list, deleting staged attachments that were not saved."""
+        files = list(self.pending_files if files is None else files)
+        for file_path in files:
+            self.file_ops.discard_partial_file(file_path)
+            self._file_senders.pop(file_path, None)
+        self.pending_files[:] = [path for path in self.pending_files if path not in files]
+
+    def cancel_file_tasks(self, file_path):
+        """Stop any background work for a file that was removed from the pending list."""
+        self.file_ops.discard_partial_file(file_path)
+        self._prefetched_text.pop(file_path, None)
+        self._file_senders.pop(file_path, None)
+        handle = self._prefetch_handles.pop(file_path, None)
+        if handle:
+            handle.cancel()
+        processor = getattr(self, 'background_processor', None)
+        if processor:
+            processor.cancel_file(file_path)
+
     def process_single_file(self, file_path):
         """Process a single file with correct naming conventions in auto-convert mode."""
         try:
@@ -1190,7 +1631,7 @@ class DocHandlerApp(QWidget):
                 raise FileNotFoundError(f"File not found: {file_path}")
 
             active_save_dir = self.session_save_dir or self.default_save_dir
-            file_ext = os.path.splitext(file_path)[1].lower()
+            file_path, file_ext = self._typed_document(file_path, active_save_dir)
 
             # Handle non-auto-convert mode
             if not self.auto_convert_enabled:
@@ -1219,11 +1660,9 @@ class DocHandlerApp(QWidget):
                         raise ValueError("Filename portion is required in Save Quotes mode.")
 
                     # Extract or prompt for company name
-                    company_name = self.scan_document_for_company_names(file_path)
+                    company_name = self._company_name_for(file_path)
                     if not company_name:
-                        company_name = self.prompt_for_company_name()
-                        if not company_name:
-                            return  # User canceled
+                        return  # User canceled
 
                     # Format filename correctly
                     new_filename = f"{self.filename_portion} - {company_name}.pdf"
@@ -1280,7 +1719,7 @@ class DocHandlerApp(QWidget):
                 raise FileNotFoundError(f"Source file does not exist: {source_path}")
 
             target_path = os.path.join(self.default_save_dir, target_file_name)
-            shutil.copy(source_path, target_path)
+            fast_copy.copy_file(source_path, target_path)
             logging.info(f"File copied to save directory: {target_path}")
             return target_path
         except Exception as e:
@@ -1301,9 +1740,9 @@ class DocHandlerApp(QWidget):
 
             if os.path.exists(target_path):
                 logging.info(f"Replacing file: {target_path}")
-                os.remove(target_path)
 
-            shutil.copy(source_path, target_path)
+            # The old file stays in place until the new one is complete, then is swapped in one rename
+            fast_copy.copy_file(source_path, target_path)
             logging.info(f"File replaced successfully at: {target_path}")
         except Exception as e:
             logging.error(f"Error replacing file: {str(e)}", exc_info=True)
@@ -1316,18 +1755,25 @@ class DocHandlerApp(QWidget):
             self.ui_components.set_label_text("Processing Outlook item...")
             self.setCursor(Qt.CursorShape.BusyCursor)
 
-            # Ensure the worker is cleaned up after use
-            if hasattr(self, "outlook_worker") and self.outlook_worker.isRunning():
-                self.outlook_worker.terminate()
-                self.outlook_worker.wait()
+            # QMimeData is only valid on this thread during the drop, so copy the payload now
+            drop = OutlookDrop.from_mime(mime_data)
+
+            # Earlier drops keep running; their requests are queued on the same Outlook session
+            self.outlook_workers = [
+                worker for worker in getattr(self, "outlook_workers", []) if worker.isRunning()
+            ]
 
             # Initialize the worker thread
             self.outlook_worker = OutlookWorker(
-                mime_data=mime_data,
+                mime_data=drop,
                 file_ops=self.file_ops,
                 pdf_ops=self.pdf_ops,
                 resource_manager=self.resource_manager,
+                session=self.outlook_handler.session,
+                # Attachments are staged in the destination so saving them is a rename, not a copy
+                save_dir=str(self.session_save_dir or self.default_save_dir),
             )
+            self.outlook_workers.append(self.outlook_worker)
 
             # Connect signals to handle results
             self.outlook_worker.finished.connect(self.on_outlook_processed)
@@ -1340,29 +1786,63 @@ class DocHandlerApp(QWidget):
         except Exception as e:
             logging.error(f"Error initializing Outlook drop processing: {str(e)}", exc_info=True)
             self.ui_components.show_error_message("Error", f"Unable to process Outlook item: {str(e)}")
-        finally:
-            # Restore cursor to default
+            # On success the worker's signals restore the cursor
             self.setCursor(Qt.CursorShape.ArrowCursor)
 
 
-    def on_outlook_processed(self, temp_file_path):
-        """Handle successful processing of Outlook items."""
+    def handle_msg_files(self, paths):
+        """Extract saved .msg files in the background; each message arrives at on_outlook_processed."""
         try:
-            if not temp_file_path or not os.path.exists(temp_file_path):
-                raise ValueError("Temporary file does not exist or could not be processed")
+            self.ui_components.set_label_text(f"Reading {len(paths)} email file(s)...")
+            self.setCursor(Qt.CursorShape.BusyCursor)
 
-            # Process the temporary file
-            self.process_dropped_file(temp_file_path)
+            self.outlook_workers = [
+                worker for worker in getattr(self, "outlook_workers", []) if worker.isRunning()
+            ]
+            worker = MsgFileWorker(
+                paths,
+                file_ops=self.file_ops,
+                pdf_ops=self.pdf_ops,
+                resource_manager=self.resource_manager,
+                save_dir=str(self.session_save_dir or self.default_save_dir),
+            )
+            self.outlook_workers.append(worker)
+            worker.finished.connect(self.on_outlook_processed)
+            worker.error.connect(self.on_outlook_error)
+            worker.start()
+            logging.info(f"MsgFileWorker started for {len(paths)} message file(s).")
 
-            # Clean up temporary file
-            try:
-                os.remove(temp_file_path)
-                logging.info(f"Temporary file removed: {temp_file_path}")
-            except Exception as e:
-                logging.warning(f"Error cleaning up temporary file: {str(e)}")
+        except Exception as e:
+            logging.error(f"Error initializing message file processing: {str(e)}", exc_info=True)
+            self.ui_components.show_error_message("Error", f"Unable to read email files: {str(e)}")
+            self.setCursor(Qt.CursorShape.ArrowCursor)
 
-            # Update the UI to show success
-            self.ui_components.set_label_text(f"File saved: {temp_file_path}")
+    def on_outlook_processed(self, batch):
+        """Feed every file saved from a dropped email through the pipeline as one batch."""
+        try:
+            documents, image_paths, msg_paths, skipped = self.sort_by_content(batch.paths)
+            # An email attached to this one as a .msg file is not opened in turn
+            for path in msg_paths + skipped:
+                self.file_ops.discard_partial_file(path)
+            if not documents and not image_paths:
+                raise ValueError("The email has no PDF, Word or image attachments")
+            done_label = f"Processed {len(documents) + len(image_paths)} attachment(s) from {batch.subject or 'Outlook'}"
+
+            if image_paths:
+                combined = self._combine_images(image_paths)
+                for path in image_paths:
+                    self.file_ops.discard_partial_file(path)
+                if combined:
+                    documents.append(combined)
+
+            # The sender names the company without reading the attachment once it has been learned
+            if batch.sender:
+                for path in documents:
+                    self._file_senders[path] = batch.sender
+
+            # Attachments of one email come from one company: ask for its name once. Documents
+            # stay staged while pending or converting; saving renames them into place
+            self.process_dropped_documents(documents, share_name=True, done_label=done_label)
 
         except Exception as e:
             logging.error(f"Error during post-processing: {str(e)}", exc_info=True)
@@ -1421,7 +1901,13 @@ class DocHandlerApp(QWidget):
             if not self.filename_portions_enabled:
                 return None
 
-            text_content = self.file_ops.extract_text_from_file(file_path)
+            text_content = self._prefetched_text.pop(file_path, None)
+            if text_content is None:
+                # Extract synchronously, cancelling any unfinished prefetch so the work isn't done twice
+                handle = self._prefetch_handles.pop(file_path, None)
+                if handle:
+                    handle.cancel()
+                text_content = self.file_ops.extract_text_from_file(file_path)
             company_names = self.file_ops.load_company_names()
 
             # Match extracted text against known company names
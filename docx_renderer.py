@@ -0,0 +1,753 @@
+# docx_renderer.py
+
+import logging
+import os
+import re
+import sys
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+def _w(name):
+    return f"{{{W_NS}}}{name}"
+
+EMU_PER_POINT = 12700
+
+class DocxComplexityError(Exception):
+    """Raised when a document needs Word (or LibreOffice) to be rendered faithfully."""
+    pass
+
+# --- layout-complexity classifier ----------------------------------------------------------
+
+# Markup in document, header and footer parts that the fast renderer cannot lay out
+_COMPLEX_MARKERS = [
+    (b'<w:txbxContent', 'text boxes'),
+    (b'<wp:anchor', 'floating objects'),
+    (b'<w:object', 'embedded objects'),
+    (b'<m:oMath', 'equations'),
+    (b'<w:ins ', 'tracked changes'),
+    (b'<w:del ', 'tracked changes'),
+    (b'<w:vMerge', 'vertically merged cells'),
+    (b'<w:footnoteReference', 'footnotes'),
+    (b'<w:endnoteReference', 'endnotes'),
+    (b'<w:commentReference', 'comments'),
+    (b'<v:shape ', 'VML shapes'),
+]
+_MULTI_COLUMN = re.compile(rb'<w:cols\b[^>]*w:num="([2-9]|\d\d)"')
+_FIELD_INSTRUCTIONS = re.compile(rb'<w:instrText[^>]*>([^<]*)</w:instrText>|w:instr="([^"]*)"')
+SUPPORTED_FIELDS = {'PAGE', 'NUMPAGES'}
+SUPPORTED_IMAGE_TYPES = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
+
+def _nested_tables(xml_bytes):
+    depth = 0
+    for event, element in ET.iterparse(BytesIO(xml_bytes), events=('start', 'end')):
+        if element.tag == _w('tbl'):
+            depth += 1 if event == 'start' else -1
+            if depth > 1:
+                return True
+    return False
+
+def classify_docx(path):
+    """
+    Return the reasons a .docx needs Word or LibreOffice (empty if the fast renderer can handle it).
+
+    Plain letters - paragraphs, lists, basic tables, headers/footers with page numbers and
+    inline pictures - pass; floating or vector graphics, text boxes, multi-column or
+    multi-section layouts, fields other than page numbers, notes, comments and tracked
+    changes do not.
+    """
+    reasons = []
+    try:
+        with zipfile.ZipFile(path) as zf:
+            names = zf.namelist()
+            document = zf.read('word/document.xml')
+            parts = [document] + [
+                zf.read(n) for n in names
+                if re.fullmatch(r'word/(header|footer)\d*\.xml', n)
+            ]
+            for part in parts:
+                for marker, reason in _COMPLEX_MARKERS:
+                    if marker in part and reason not in reasons:
+                        reasons.append(reason)
+                for match in _FIELD_INSTRUCTIONS.finditer(part):
+                    instruction = (match.group(1) or match.group(2) or b'').decode('utf-8', 'replace').split()
+                    if instruction and instruction[0].upper() not in SUPPORTED_FIELDS:
+                        reason = f'{instruction[0].upper()} field'
+                        if reason not in reasons:
+                            reasons.append(reason)
+            if _MULTI_COLUMN.search(document):
+                reasons.append('multiple columns')
+            if document.count(b'<w:sectPr') > 1:
+                reasons.append('multiple sections')
+            if _nested_tables(document):
+                reasons.append('nested tables')
+            if any(n.startswith(('word/charts/', 'word/diagrams/', 'word/embeddings/')) for n in names):
+                reasons.append('charts, SmartArt or embedded files')
+            media = [n for n in names if n.startswith('word/media/')]
+            if any(not n.lower().endswith(SUPPORTED_IMAGE_TYPES) for n in media):
+                reasons.append('vector images')
+            if 'word/settings.xml' in names and b'<w:evenAndOddHeaders' in zf.read('word/settings.xml'):
+                reasons.append('even/odd headers')
+    except (zipfile.BadZipFile, KeyError, ET.ParseError, OSError) as e:
+        reasons.append(f'unreadable: {e}')
+    return reasons
+
+# --- fonts ---------------------------------------------------------------------------------
+
+# Regular, bold, italic, bold-italic TrueType files for the fonts quote letters actually use
+FONT_FILES = {
+    'calibri': ('calibri.ttf', 'calibrib.ttf', 'calibrii.ttf', 'calibriz.ttf'),
+    'arial': ('arial.ttf', 'arialbd.ttf', 'ariali.ttf', 'arialbi.ttf'),
+    'times new roman': ('times.ttf', 'timesbd.ttf', 'timesi.ttf', 'timesbi.ttf'),
+    'verdana': ('verdana.ttf', 'verdanab.ttf', 'verdanai.ttf', 'verdanaz.ttf'),
+    'georgia': ('georgia.ttf', 'georgiab.ttf', 'georgiai.ttf', 'georgiaz.ttf'),
+    'tahoma': ('tahoma.ttf', 'tahomabd.ttf', 'tahoma.ttf', 'tahomabd.ttf'),
+    'segoe ui': ('segoeui.ttf', 'segoeuib.ttf', 'segoeuii.ttf', 'segoeuiz.ttf'),
+    'aptos': ('aptos.ttf', 'aptos-bold.ttf', 'aptos-italic.ttf', 'aptos-bold-italic.ttf'),
+}
+SERIF_HINTS = ('times', 'cambria', 'georgia', 'garamond', 'book antiqua', 'palatino', 'serif')
+MONO_HINTS = ('courier', 'consolas', 'mono', 'lucida console')
+
+class _FontRegistry:
+    """Registers the document's TrueType fonts with reportlab when installed, else maps to the base 14."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._families = {}
+        self._font_dirs = None
+
+    def _search_dirs(self):
+        if self._font_dirs is None:
+            if sys.platform == 'win32':
+                dirs = [os.path.join(os.environ.get('WINDIR', r'C:\Windows'), 'Fonts'),
+                        os.path.join(os.environ.get('LOCALAPPDATA', ''), 'Microsoft', 'Windows', 'Fonts')]
+            elif sys.platform == 'darwin':
+                dirs = ['/Library/Fonts', os.path.expanduser('~/Library/Fonts')]
+            else:
+                dirs = ['/usr/share/fonts/truetype/msttcorefonts', os.path.expanduser('~/.fonts')]
+            self._font_dirs = [d for d in dirs if d and os.path.isdir(d)]
+        return self._font_dirs
+
+    def _find(self, filename):
+        for directory in self._search_dirs():
+            for candidate in (filename, filename.upper(), filename.capitalize()):
+                path = os.path.join(directory, candidate)
+                if os.path.exists(path):
+                    return path
+        return None
+
+    def family(self, name):
+        """Return (family name for markup, is_unicode) for a Word font name."""
+        key = (name or 'calibri').strip().lower()
+        with self._lock:
+            if key in self._families:
+                return self._families[key]
+            result = self._fallback(key)
+            files = FONT_FILES.get(key)
+            if files:
+                paths = [self._find(f) for f in files]
+                if paths[0]:
+                    try:
+                        from reportlab.pdfbase import pdfmetrics
+                        from reportlab.pdfbase.ttfonts import TTFont
+                        from reportlab.lib.fonts import addMapping
+                        base = f"docx-{key.replace(' ', '-')}"
+                        variants = []
+                        for suffix, path in zip(('', '-Bold', '-Italic', '-BoldItalic'), paths):
+                            variant = base + suffix
+                            pdfmetrics.registerFont(TTFont(variant, path or paths[0]))
+                            variants.append(variant)
+                        for (bold, italic), variant in zip(((0, 0), (1, 0), (0, 1), (1, 1)), variants):
+                            addMapping(base, bold, italic, variant)
+                        result = (base, True)
+                    except Exception as e:
+                        logging.debug(f"Could not register font {name}: {e}")
+            self._families[key] = result
+            return result
+
+    @staticmethod
+    def _fallback(key):
+        if any(hint in key for hint in MONO_HINTS):
+            return 'Courier', False
+        if any(hint in key for hint in SERIF_HINTS):
+            return 'Times-Roman', False
+        return 'Helvetica', False
+
+FONTS = _FontRegistry()
+
+# --- numbering -------------------------------------------------------------------------------
+
+def _roman(number):
+    numerals = [(1000, 'm'), (900, 'cm'), (500, 'd'), (400, 'cd'), (100, 'c'), (90, 'xc'),
+                (50, 'l'), (40, 'xl'), (10, 'x'), (9, 'ix'), (5, 'v'), (4, 'iv'), (1, 'i')]
+    text = ''
+    for value, letters in numerals:
+        while number >= value:
+            text += letters
+            number -= value
+    return text
+
+def _letters(number):
+    text = ''
+    while number > 0:
+        number, remainder = divmod(number - 1, 26)
+        text = chr(97 + remainder) + text
+    return text
+
+class _Numbering:
+    """Produces list labels ("1.", "a)", bullets) from numbering.xml as paragraphs are laid out."""
+
+    def __init__(self, document):
+        self.levels = {}
+        self.counters = {}
+        try:
+            root = document.part.numbering_part.element
+        except Exception:
+            return
+        abstract = {}
+        for node in root.findall(_w('abstractNum')):
+            levels = {}
+            for lvl in node.findall(_w('lvl')):
+                fmt = lvl.find(_w('numFmt'))
+                text = lvl.find(_w('lvlText'))
+                start = lvl.find(_w('start'))
+                ind = lvl.find(f"{_w('pPr')}/{_w('ind')}")
+                levels[int(lvl.get(_w('ilvl')))] = {
+                    'format': fmt.get(_w('val')) if fmt is not None else 'decimal',
+                    'text': text.get(_w('val')) if text is not None else '%1.',
+                    'start': int(start.get(_w('val'))) if start is not None else 1,
+                    'left': _twips(ind.get(_w('left')) or ind.get(_w('start'))) if ind is not None else None,
+                    'hanging': _twips(ind.get(_w('hanging'))) if ind is not None else None,
+                }
+            abstract[node.get(_w('abstractNumId'))] = levels
+        for num in root.findall(_w('num')):
+            ref = num.find(_w('abstractNumId'))
+            if ref is not None:
+                self.levels[num.get(_w('numId'))] = abstract.get(ref.get(_w('val')), {})
+
+    def label(self, num_id, ilvl):
+        """Advance the counter for (num_id, ilvl) and return (label, level properties) or (None, None)."""
+        levels = self.levels.get(num_id)
+        if not levels or ilvl not in levels:
+            return None, None
+        counters = self.counters.setdefault(num_id, {})
+        counters[ilvl] = counters.get(ilvl, levels[ilvl]['start'] - 1) + 1
+        for deeper in [lvl for lvl in counters if lvl > ilvl]:
+            del counters[deeper]
+        level = levels[ilvl]
+        if level['format'] == 'bullet':
+            return '\u2022', level
+        text = level['text']
+        for lvl in range(ilvl + 1):
+            value = counters.get(lvl, levels.get(lvl, {}).get('start', 1))
+            fmt = levels.get(lvl, {}).get('format', 'decimal')
+            if fmt == 'lowerLetter':
+                rendered = _letters(value)
+            elif fmt == 'upperLetter':
+                rendered = _letters(value).upper()
+            elif fmt == 'lowerRoman':
+                rendered = _roman(value)
+            elif fmt == 'upperRoman':
+                rendered = _roman(value).upper()
+            else:
+                rendered = str(value)
+            text = text.replace(f'%{lvl + 1}', rendered)
+        return text, level
+
+def _twips(value):
+    return int(value) / 20.0 if value not in (None, '') else None
+
+# --- renderer --------------------------------------------------------------------------------
+
+class _DocxRenderer:
+    """Turns a python-docx Document into reportlab flowables, page by page for headers/footers."""
+
+    PAGE_TOKEN = '\x00PAGE\x00'
+    PAGES_TOKEN = '\x00NUMPAGES\x00'
+
+    def __init__(self, document):
+        from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT, TA_RIGHT
+        self.document = document
+        self.numbering = _Numbering(document)
+        self.alignments = {0: TA_LEFT, 1: TA_CENTER, 2: TA_RIGHT, 3: TA_JUSTIFY}
+        self.default_size, self.default_font, self.default_after, self.default_line = self._doc_defaults()
+        self._load_styles()
+        self.uses_page_count = False
+
+    def _doc_defaults(self):
+        size, font, after, line = 11.0, 'Calibri', 0.0, 1.0
+        try:
+            defaults = self.document.styles.element.find(_w('docDefaults'))
+            rpr = defaults.find(f"{_w('rPrDefault')}/{_w('rPr')}") if defaults is not None else None
+            if rpr is not None:
+                sz = rpr.find(_w('sz'))
+                if sz is not None:
+                    size = int(sz.get(_w('val'))) / 2
+                fonts = rpr.find(_w('rFonts'))
+                if fonts is not None and fonts.get(_w('ascii')):
+                    font = fonts.get(_w('ascii'))
+            spacing = defaults.find(f"{_w('pPrDefault')}/{_w('pPr')}/{_w('spacing')}") if defaults is not None else None
+            if spacing is not None:
+                after = _twips(spacing.get(_w('after'))) or 0.0
+                if spacing.get(_w('line')) and spacing.get(_w('lineRule'), 'auto') == 'auto':
+                    line = int(spacing.get(_w('line'))) / 240
+        except Exception as e:
+            logging.debug(f"Could not read document defaults: {e}")
+        return size, font, after, line
+
+    # Style inheritance helpers
+
+    def _load_styles(self):
+        """Resolve every style's base-style chain once; python-docx looks styles up by linear scan."""
+        from docx.enum.style import WD_STYLE_TYPE
+        styles = {}
+        defaults = {}
+        for style in self.document.styles:
+            styles[style.style_id] = style
+            if style.element.default and style.type not in defaults:
+                defaults[style.type] = style.style_id
+        chains = {}
+        for style_id, style in styles.items():
+            chain, seen = [], set()
+            while style is not None and style.style_id not in seen:
+                seen.add(style.style_id)
+                chain.append(style)
+                base = style.element.basedOn_val
+                style = styles.get(base) if base else None
+            chains[style_id] = tuple(chain)
+        self._chains = chains
+        self._default_paragraph_style = defaults.get(WD_STYLE_TYPE.PARAGRAPH)
+        self._inherited = {}
+
+    def _paragraph_chain(self, paragraph):
+        style_id = paragraph._p.style
+        if style_id not in self._chains:
+            style_id = self._default_paragraph_style
+        return self._chains.get(style_id, ())
+
+    def _style_value(self, chain, group, attr):
+        key = (tuple(s.style_id for s in chain), group, attr)
+        if key not in self._inherited:
+            value = None
+            for style in chain:
+                value = getattr(getattr(style, group), attr)
+                if value is not None:
+                    break
+            self._inherited[key] = value
+        return self._inherited[key]
+
+    def _paragraph_format(self, paragraph, attr):
+        value = getattr(paragraph.paragraph_format, attr)
+        if value is not None:
+            return value
+        return self._style_value(self._paragraph_chain(paragraph), 'paragraph_format', attr)
+
+    def _run_font(self, run, paragraph, attr):
+        value = getattr(run.font, attr)
+        if value is not None:
+            return value
+        chain = self._chains.get(run._r.style, ()) + self._paragraph_chain(paragraph)
+        return self._style_value(chain, 'font', attr)
+
+    def _numbering_props(self, paragraph):
+        for element in [paragraph._p] + [s.element for s in self._paragraph_chain(paragraph)]:
+            num_pr = element.find(f"{_w('pPr')}/{_w('numPr')}")
+            if num_pr is not None:
+                num_id = num_pr.find(_w('numId'))
+                ilvl = num_pr.find(_w('ilvl'))
+                if num_id is not None and num_id.get(_w('val')) != '0':
+                    return num_id.get(_w('val')), int(ilvl.get(_w('val'))) if ilvl is not None else 0
+                return None
+        return None
+
+    # Paragraphs
+
+    def _run_markup(self, run, paragraph, text):
+        markup = escape(text)
+        if not markup:
+            return ''
+        size = self._run_font(run, paragraph, 'size')
+        name = self._run_font(run, paragraph, 'name')
+        colour = run.font.color.rgb if run.font.color is not None and run.font.color.type is not None else None
+        attributes = []
+        if size is not None:
+            attributes.append(f'size="{size.pt:g}"')
+        if name and name.lower() != (self.default_font or '').lower():
+            family, _ = FONTS.family(name)
+            attributes.append(f'face="{family}"')
+        if colour is not None and str(colour) not in ('000000', 'None'):
+            attributes.append(f'color="#{colour}"')
+        if attributes:
+            markup = f"<font {' '.join(attributes)}>{markup}</font>"
+        if self._run_font(run, paragraph, 'bold'):
+            markup = f"<b>{markup}</b>"
+        if self._run_font(run, paragraph, 'italic'):
+            markup = f"<i>{markup}</i>"
+        if self._run_font(run, paragraph, 'underline'):
+            markup = f"<u>{markup}</u>"
+        if self._run_font(run, paragraph, 'strike'):
+            markup = f"<strike>{markup}</strike>"
+        if self._run_font(run, paragraph, 'superscript'):
+            markup = f"<super>{markup}</super>"
+        elif self._run_font(run, paragraph, 'subscript'):
+            markup = f"<sub>{markup}</sub>"
+        if self._run_font(run, paragraph, 'all_caps'):
+            markup = markup.upper()
+        return markup
+
+    def _inline_image(self, drawing, paragraph):
+        from reportlab.platypus import Image
+        blip = drawing.find('.//{http://schemas.openxmlformats.org/drawingml/2006/main}blip')
+        extent = drawing.find('.//{http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing}extent')
+        if blip is None:
+            return None
+        rel_id = blip.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
+        part = paragraph.part.related_parts.get(rel_id)
+        if part is None:
+            return None
+        width = int(extent.get('cx')) / EMU_PER_POINT if extent is not None else None
+        height = int(extent.get('cy')) / EMU_PER_POINT if extent is not None else None
+        return Image(BytesIO(part.blob), width=width, height=height)
+
+    def _walk_runs(self, element, paragraph, state):
+        """Collect markup and images from runs in document order, resolving PAGE/NUMPAGES fields."""
+        from docx.text.run import Run
+        for child in element:
+            tag = child.tag
+            if tag == _w('r'):
+                run = Run(child, paragraph)
+                for item in child:
+                    item_tag = item.tag
+                    if item_tag == _w('fldChar'):
+                        kind = item.get(_w('fldCharType'))
+                        if kind == 'begin':
+                            state['instr'] = ''
+                            state['in_field'] = 'instr'
+                        elif kind == 'separate':
+                            state['in_field'] = 'result'
+                            self._emit_field(state)
+                        elif kind == 'end':
+                            state['in_field'] = None
+                    elif item_tag == _w('instrText'):
+                        state['instr'] += item.text or ''
+                    elif state.get('in_field') == 'result' and state.get('field_token'):
+                        continue  # cached page numbers are replaced by the live value
+                    elif item_tag == _w('t'):
+                        state['parts'].append(self._run_markup(run, paragraph, item.text or ''))
+                    elif item_tag == _w('tab'):
+                        state['parts'].append('&nbsp;' * 6)
+                    elif item_tag in (_w('br'), _w('cr')):
+                        if item.get(_w('type')) == 'page':
+                            state['page_break'] = 'before' if not ''.join(state['parts']).strip() else 'after'
+                        else:
+                            state['parts'].append('<br/>')
+                    elif item_tag == _w('noBreakHyphen'):
+                        state['parts'].append('-')
+                    elif item_tag == _w('drawing'):
+                        image = self._inline_image(item, paragraph)
+                        if image is not None:
+                            state['images'].append(image)
+            elif tag == _w('fldSimple'):
+                state['instr'] = child.get(_w('instr'), '')
+                if self._emit_field(state):
+                    continue
+                self._walk_runs(child, paragraph, state)
+            elif tag in (_w('hyperlink'), _w('sdt'), _w('sdtContent'), _w('smartTag'), _w('customXml')):
+                self._walk_runs(child, paragraph, state)
+
+    def _emit_field(self, state):
+        name = (state.get('instr') or '').split()
+        token = None
+        if name and name[0].upper() == 'PAGE':
+            token = self.PAGE_TOKEN
+        elif name and name[0].upper() == 'NUMPAGES':
+            token = self.PAGES_TOKEN
+            self.uses_page_count = True
+        state['field_token'] = token
+        if token:
+            state['parts'].append(token)
+        return token is not None
+
+    def paragraph_flowables(self, paragraph, width):
+        from reportlab.lib.styles import ParagraphStyle
+        from reportlab.platypus import PageBreak, Paragraph, Spacer
+
+        state = {'parts': [], 'images': [], 'instr': '', 'in_field': None, 'field_token': None, 'page_break': None}
+        self._walk_runs(paragraph._p, paragraph, state)
+        markup = ''.join(state['parts'])
+
+        chain = self._paragraph_chain(paragraph)
+        family, unicode_ok = FONTS.family(self._style_value(chain, 'font', 'name') or self.default_font)
+        size = self._style_value(chain, 'font', 'size')
+        size = size.pt if size is not None else self.default_size
+
+        plain = re.sub(r'<[^>]+>', '', markup)
+        if not unicode_ok:
+            try:
+                plain.replace(self.PAGE_TOKEN, '').replace(self.PAGES_TOKEN, '').encode('cp1252')
+            except UnicodeEncodeError:
+                raise DocxComplexityError("text outside the standard PDF fonts and the document's font is not installed")
+
+        def points(value, default=0.0):
+            return value.pt if value is not None else default
+
+        line_spacing = self._paragraph_format(paragraph, 'line_spacing')
+        if line_spacing is None:
+            leading = size * 1.2 * self.default_line
+        elif isinstance(line_spacing, float):
+            leading = size * 1.2 * line_spacing
+        else:
+            leading = line_spacing.pt
+
+        alignment = self._paragraph_format(paragraph, 'alignment')
+        left = points(self._paragraph_format(paragraph, 'left_indent'))
+        first_line = points(self._paragraph_format(paragraph, 'first_line_indent'))
+        after = self._paragraph_format(paragraph, 'space_after')
+
+        numbering = self._numbering_props(paragraph)
+        if numbering:
+            label, level = self.numbering.label(*numbering)
+            if label:
+                if level.get('left') is not None:
+                    left = level['left']
+                    first_line = -(level.get('hanging') or 18.0)
+                markup = f"{escape(label)}&nbsp;&nbsp;{markup}"
+
+        style = ParagraphStyle(
+            f'p{id(paragraph)}',
+            fontName=family,
+            fontSize=size,
+            leading=leading,
+            alignment=self.alignments.get(int(alignment) if alignment is not None else 0, self.alignments[0]),
+            leftIndent=left,
+            rightIndent=points(self._paragraph_format(paragraph, 'right_indent')),
+            firstLineIndent=first_line,
+            spaceBefore=points(self._paragraph_format(paragraph, 'space_before')),
+            spaceAfter=after.pt if after is not None else self.default_after,
+        )
+
+        flowables = []
+        if state['page_break'] == 'before' or self._paragraph_format(paragraph, 'page_break_before'):
+            flowables.append(PageBreak())
+        for image in state['images']:
+            if image.drawWidth > width:
+                ratio = width / image.drawWidth
+                image.drawWidth, image.drawHeight = width, image.drawHeight * ratio
+            image.hAlign = {1: 'CENTER', 2: 'RIGHT'}.get(int(alignment) if alignment is not None else 0, 'LEFT')
+            flowables.append(image)
+        if plain.strip() or not state['images']:
+            if plain.strip():
+                flowables.append(Paragraph(markup, style))
+            else:
+                # Empty paragraphs still take a line in Word
+                flowables.append(Spacer(1, leading + style.spaceBefore + style.spaceAfter))
+        if state['page_break'] == 'after':
+            flowables.append(PageBreak())
+        return flowables
+
+    # Tables
+
+    def table_flowables(self, table, width):
+        from reportlab.lib import colors
+        from docx.table import _Cell
+        from reportlab.platypus import Table, TableStyle
+
+        tbl = table._tbl
+        grid = [(_twips(col.get(_w('w'))) or 0.0) for col in tbl.iter(_w('gridCol'))]
+        columns = len(grid) or max((len(row.tr.tc_lst) for row in table.rows), default=1)
+        if not grid or not sum(grid):
+            grid = [width / columns] * columns
+        scale = min(1.0, width / sum(grid))
+        widths = [w * scale for w in grid]
+
+        data, commands, header_rows = [], [], 0
+        tbl_pr = tbl.find(_w('tblPr'))
+        borders = tbl_pr.find(_w('tblBorders')) if tbl_pr is not None else None
+        style_id = tbl_pr.style if tbl_pr is not None else None
+        style_name = self._chains[style_id][0].name if style_id in self._chains else ''
+        has_grid = 'grid' in (style_name or '').lower()
+        if borders is not None:
+            for side in borders:
+                if side.get(_w('val')) not in (None, 'nil', 'none'):
+                    has_grid = True
+        if has_grid:
+            commands.append(('GRID', (0, 0), (-1, -1), 0.5, colors.black))
+
+        for y, row in enumerate(table.rows):
+            tr = row._tr
+            tr_pr = tr.find(_w('trPr'))
+            if tr_pr is not None and tr_pr.find(_w('tblHeader')) is not None and header_rows == y:
+                header_rows += 1
+            cells = [''] * columns
+            x = 0
+            for tc in tr.tc_lst:
+                if x >= columns:
+                    break
+                span = tc.grid_span
+                cell_width = sum(widths[x:x + span])
+                cell = _Cell(tc, table)
+                content = []
+                for block in self._iter_block_items(cell, cell_width - 10.8):
+                    content.extend(block)
+                cells[x] = content
+                if span > 1:
+                    commands.append(('SPAN', (x, y), (x + span - 1, y)))
+                tc_pr = tc.tcPr
+                if tc_pr is not None:
+                    shading = tc_pr.find(_w('shd'))
+                    fill = shading.get(_w('fill')) if shading is not None else None
+                    if fill and fill.lower() != 'auto':
+                        commands.append(('BACKGROUND', (x, y), (x + span - 1, y), colors.HexColor(f'#{fill}')))
+                    valign = tc_pr.find(_w('vAlign'))
+                    if valign is not None:
+                        commands.append(('VALIGN', (x, y), (x, y),
+                                         {'center': 'MIDDLE', 'bottom': 'BOTTOM'}.get(valign.get(_w('val')), 'TOP')))
+                    tc_borders = tc_pr.find(_w('tcBorders'))
+                    if tc_borders is not None:
+                        for side, command in (('top', 'LINEABOVE'), ('bottom', 'LINEBELOW'),
+                                              ('left', 'LINEBEFORE'), ('start', 'LINEBEFORE'),
+                                              ('right', 'LINEAFTER'), ('end', 'LINEAFTER')):
+                            node = tc_borders.find(_w(side))
+                            if node is not None and node.get(_w('val')) not in (None, 'nil', 'none'):
+                                weight = int(node.get(_w('sz'), 4)) / 8
+                                commands.append((command, (x, y), (x + span - 1, y), weight, colors.black))
+                x += span
+            data.append(cells)
+
+        if not data:
+            return []
+        commands += [
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 5.4),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 5.4),
+            ('TOPPADDING', (0, 0), (-1, -1), 0),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+        ]
+        # Cell-specific VALIGN commands must come after the default
+        commands.sort(key=lambda c: c[0] == 'VALIGN' and c[1] != (0, 0))
+        jc = tbl_pr.find(_w('jc')) if tbl_pr is not None else None
+        h_align = {'center': 'CENTER', 'right': 'RIGHT', 'end': 'RIGHT'}.get(jc.get(_w('val')) if jc is not None else '', 'LEFT')
+        rendered = Table(data, colWidths=widths, repeatRows=header_rows, hAlign=h_align)
+        rendered.setStyle(TableStyle(commands))
+        return [rendered]
+
+    # Block-level iteration
+
+    def _iter_block_items(self, parent, width):
+        """Yield flowable lists for paragraphs and tables in order, descending into content controls."""
+        from docx.table import Table as DocxTable
+        from docx.text.paragraph import Paragraph as DocxParagraph
+
+        container = parent._element
+        if container.tag == _w('document'):
+            container = container.body
+
+        def walk(element):
+            for child in element:
+                if child.tag == _w('p'):
+                    yield self.paragraph_flowables(DocxParagraph(child, parent), width)
+                elif child.tag == _w('tbl'):
+                    yield self.table_flowables(DocxTable(child, parent), width)
+                elif child.tag in (_w('sdt'), _w('sdtContent'), _w('customXml')):
+                    yield from walk(child)
+
+        yield from walk(container)
+
+    def story(self, width):
+        flowables = []
+        for block in self._iter_block_items(self.document, width):
+            flowables.extend(block)
+        return flowables
+
+    def header_footer_flowables(self, header_footer, width, page, pages):
+        """Build flowables for a header or footer with page numbers filled in for this page."""
+        from reportlab.platypus import Paragraph
+        flowables = []
+        if header_footer is None or header_footer.is_linked_to_previous:
+            return flowables
+        for block in self._iter_block_items(header_footer, width):
+            for flowable in block:
+                if isinstance(flowable, Paragraph) and (self.PAGE_TOKEN in flowable.text or self.PAGES_TOKEN in flowable.text):
+                    text = flowable.text.replace(self.PAGE_TOKEN, str(page)).replace(self.PAGES_TOKEN, str(pages or page))
+                    flowable = Paragraph(text, flowable.style)
+                flowables.append(flowable)
+        return flowables
+
+def render_docx_to_pdf(docx_path, pdf_path, check_complexity=True):
+    """
+    Lay out a simple Word document with reportlab.
+
+    Covers paragraphs with run formatting, numbered and bulleted lists, basic tables
+    (column spans, shading, borders, header rows), headers and footers with PAGE and
+    NUMPAGES fields, inline images and page breaks. Raises DocxComplexityError for
+    documents that should go to Word or LibreOffice instead.
+    """
+    from docx import Document
+    from reportlab.platypus import SimpleDocTemplate
+
+    if check_complexity:
+        reasons = classify_docx(docx_path)
+        if reasons:
+            raise DocxComplexityError(f"{os.path.basename(docx_path)} needs Word: {', '.join(reasons)}")
+
+    document = Document(docx_path)
+    section = document.sections[0]
+    page_width = section.page_width.pt if section.page_width else 612
+    page_height = section.page_height.pt if section.page_height else 792
+    left = section.left_margin.pt if section.left_margin is not None else 72
+    right = section.right_margin.pt if section.right_margin is not None else 72
+    top = section.top_margin.pt if section.top_margin is not None else 72
+    bottom = section.bottom_margin.pt if section.bottom_margin is not None else 72
+    header_distance = section.header_distance.pt if section.header_distance is not None else 36
+    footer_distance = section.footer_distance.pt if section.footer_distance is not None else 36
+    text_width = page_width - left - right
+    first_page_special = section.different_first_page_header_footer
+
+    def draw_page(renderer, total_pages):
+        def on_page(canvas, doc):
+            page = canvas.getPageNumber()
+            use_first = first_page_special and page == 1
+            header = section.first_page_header if use_first else section.header
+            footer = section.first_page_footer if use_first else section.footer
+            canvas.saveState()
+            y = page_height - header_distance
+            for flowable in renderer.header_footer_flowables(header, text_width, page, total_pages):
+                _, height = flowable.wrap(text_width, page_height)
+                y -= height
+                flowable.drawOn(canvas, left, y)
+            blocks = [(f, f.wrap(text_width, page_height)[1])
+                      for f in renderer.header_footer_flowables(footer, text_width, page, total_pages)]
+            y = footer_distance + sum(height for _, height in blocks)
+            for flowable, height in blocks:
+                y -= height
+                flowable.drawOn(canvas, left, y)
+            canvas.restoreState()
+        return on_page
+
+    def build(target, total_pages):
+        renderer = _DocxRenderer(document)
+        story = renderer.story(text_width)
+        template = SimpleDocTemplate(
+            target, pagesize=(page_width, page_height),
+            leftMargin=left, rightMargin=right, topMargin=top, bottomMargin=bottom,
+            title=os.path.splitext(os.path.basename(docx_path))[0]
+        )
+        on_page = draw_page(renderer, total_pages)
+        template.build(story, onFirstPage=on_page, onLaterPages=on_page)
+        return template, renderer
+
+    # NUMPAGES needs the page count, so lay out once off-screen when a header/footer uses it
+    probe = _DocxRenderer(document)
+    for part in (section.header, section.footer, section.first_page_header, section.first_page_footer):
+        probe.header_footer_flowables(part, text_width, 1, 1)
+    total_pages = None
+    if probe.uses_page_count:
+        template, _ = build(BytesIO(), None)
+        total_pages = template.page
+    build(pdf_path, total_pages)
+    logging.debug(f"Rendered {docx_path} with reportlab")
+    return pdf_path
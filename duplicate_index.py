@@ -0,0 +1,278 @@
+# duplicate_index.py
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from staging import LEGACY_DIR_NAMES
+
+INDEXED_EXTENSIONS = {'.pdf', '.doc', '.docx', '.xls', '.xlsx', '.xlsm'}
+SAMPLE_SIZE = 64 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+@dataclass
+class DuplicateMatch:
+    path: str
+    exact: bool  # False: the same pages, but the file differs (metadata, IDs, incremental saves)
+
+def quick_hash(path, size):
+    """Hash of the size and the first and last 64 KiB: tells most different files apart with two reads."""
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, 'rb') as f:
+        digest.update(f.read(SAMPLE_SIZE))
+        if size > SAMPLE_SIZE:
+            f.seek(max(SAMPLE_SIZE, size - SAMPLE_SIZE))
+            digest.update(f.read(SAMPLE_SIZE))
+    return digest.hexdigest()
+
+def file_hash(path, cancel_token=None):
+    """BLAKE2b of the whole file, read in 1 MiB chunks."""
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def content_fingerprint(path):
+    """
+    Hash of a PDF's pages (size, content streams and the raw image streams they draw).
+
+    Two exports of the same quote differ in their info dictionary, XMP, /ID and object
+    layout but not in these, so they share a fingerprint. None for other files or a
+    PDF that cannot be read.
+    """
+    if os.path.splitext(path)[1].lower() != '.pdf':
+        return None
+    try:
+        import fitz
+        digest = hashlib.blake2b(digest_size=32)
+        with fitz.open(path) as doc:
+            digest.update(str(doc.page_count).encode())
+            for page in doc:
+                digest.update(repr(tuple(page.rect)).encode())
+                digest.update(page.read_contents())
+                # Scans draw every page with the same "/Im0 Do", so the images decide
+                for image in page.get_images(full=True):
+                    digest.update(doc.xref_stream_raw(image[0]) or b'')
+        return digest.hexdigest()
+    except Exception as e:
+        logging.debug(f"No content fingerprint for {path}: {e}")
+        return None
+
+def _directory_key(directory):
+    return os.path.normcase(os.path.abspath(str(directory)))
+
+class DuplicateIndex:
+    """
+    Persistent fingerprints of the documents in save directories, kept in SQLite (WAL mode).
+
+    Files are keyed on size and a sampled hash, confirmed with a full BLAKE2b, and PDFs
+    also carry a content fingerprint that ignores metadata. index_directory() brings a
+    directory up to date incrementally (only new or changed files are hashed, a bounded
+    number per call) and runs in the background; files we save are recorded as they are
+    written, with the sampled hash only. find_duplicate() then answers from the index with
+    one query, reading whole files only when their size and sampled hash already match.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                directory TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                quick TEXT NOT NULL,
+                digest TEXT,
+                content TEXT,
+                indexed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS files_size ON files(directory, size)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS files_content ON files(directory, content)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS directories (
+                directory TEXT PRIMARY KEY,
+                indexed_at REAL NOT NULL
+            )
+        """)
+        self.stats = {'lookups': 0, 'exact': 0, 'content': 0, 'hashed': 0}
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _store(self, path, stat, quick, digest=None, content=None):
+        self._execute(
+            "INSERT OR REPLACE INTO files (path, directory, size, mtime_ns, quick, digest, content, indexed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, _directory_key(os.path.dirname(path)), stat.st_size, stat.st_mtime_ns, quick, digest,
+             content, time.time())
+        )
+        self.stats['hashed'] += 1
+
+    def record(self, path):
+        """Index a file we have just written by its sampled hash (full hashes and fingerprints come later)."""
+        path = os.path.abspath(path)
+        if os.path.splitext(path)[1].lower() not in INDEXED_EXTENSIONS:
+            return
+        try:
+            stat = os.stat(path)
+            self._store(path, stat, quick_hash(path, stat.st_size))
+        except Exception as e:
+            # Never let the index get in the way of the save that called this
+            logging.warning(f"Could not index {path}: {e}")
+
+    def forget_directory(self, directory):
+        key = _directory_key(directory)
+        self._execute("DELETE FROM files WHERE directory = ?", (key,))
+        self._execute("DELETE FROM directories WHERE directory = ?", (key,))
+
+    def index_directory(self, directory, max_files=200, cancel_token=None):
+        """
+        Hash new and changed documents in directory, at most max_files per call, and drop vanished ones.
+
+        Returns how many files were hashed; call again until it returns 0 to finish a large folder.
+        """
+        directory = os.path.abspath(str(directory))
+        key = _directory_key(directory)
+        if not os.path.isdir(directory):
+            return 0
+        known = {
+            path: (size, mtime_ns, content)
+            for path, size, mtime_ns, content in self._execute(
+                "SELECT path, size, mtime_ns, content FROM files WHERE directory = ?", (key,)
+            )
+        }
+        seen = set()
+        hashed = 0
+        started = time.perf_counter()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or entry.name in LEGACY_DIR_NAMES:
+                    continue
+                if os.path.splitext(entry.name)[1].lower() not in INDEXED_EXTENSIONS:
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    path = os.path.abspath(entry.path)
+                    seen.add(path)
+                    stat = entry.stat()
+                    row = known.get(path)
+                    pdf = entry.name.lower().endswith('.pdf')
+                    if row and row[:2] == (stat.st_size, stat.st_mtime_ns) and (row[2] is not None or not pdf):
+                        continue
+                    if hashed >= max_files:
+                        continue
+                    if cancel_token:
+                        cancel_token.raise_if_cancelled()
+                    self._store(
+                        path, stat, quick_hash(path, stat.st_size), file_hash(path, cancel_token),
+                        # '' marks a PDF that cannot be fingerprinted, so it isn't retried every pass
+                        (content_fingerprint(path) or '') if pdf else None
+                    )
+                    hashed += 1
+                except OSError as e:
+                    logging.debug(f"Skipping {entry.path} while indexing: {e}")
+        for path in set(known) - seen:
+            self._execute("DELETE FROM files WHERE path = ?", (path,))
+        self._execute("INSERT OR REPLACE INTO directories (directory, indexed_at) VALUES (?, ?)", (key, time.time()))
+        if hashed:
+            logging.info(f"Indexed {hashed} document(s) in {directory} in {time.perf_counter() - started:.1f}s")
+        return hashed
+
+    def _indexed(self, key):
+        return bool(self._execute("SELECT 1 FROM directories WHERE directory = ?", (key,)))
+
+    def _index_same_size(self, directory, size):
+        """For a directory not indexed yet: hash just the files whose size matches."""
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if os.path.splitext(entry.name)[1].lower() not in INDEXED_EXTENSIONS:
+                        continue
+                    if entry.is_file() and entry.stat().st_size == size:
+                        self.record(entry.path)
+        except OSError as e:
+            logging.debug(f"Could not list {directory}: {e}")
+
+    def _current(self, path, size, mtime_ns):
+        """The indexed file is still there and unchanged."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._execute("DELETE FROM files WHERE path = ?", (path,))
+            return False
+        if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+            self.record(path)
+            return False
+        return True
+
+    def _digest(self, path, digest, cancel_token=None):
+        """The indexed file's full hash, computed and stored the first time it is needed."""
+        if digest is None:
+            digest = file_hash(path, cancel_token)
+            self._execute("UPDATE files SET digest = ? WHERE path = ?", (digest, path))
+        return digest
+
+    def _has_fingerprints(self, key):
+        return bool(self._execute(
+            "SELECT 1 FROM files WHERE directory = ? AND content IS NOT NULL AND content != '' LIMIT 1", (key,)
+        ))
+
+    def find_duplicate(self, path, directory, cancel_token=None):
+        """An indexed document in directory identical to path, or None. Hashes files, so keep it off the GUI thread."""
+        self.stats['lookups'] += 1
+        path = os.path.abspath(path)
+        directory = os.path.abspath(str(directory))
+        key = _directory_key(directory)
+        size = os.path.getsize(path)
+        if not self._indexed(key):
+            self._index_same_size(directory, size)
+
+        candidates = self._execute(
+            "SELECT path, size, mtime_ns, quick, digest FROM files WHERE directory = ? AND size = ? AND path != ?",
+            (key, size, path)
+        )
+        if candidates:
+            quick = quick_hash(path, size)
+            digest = None
+            for other, other_size, mtime_ns, other_quick, other_digest in candidates:
+                if other_quick != quick or not self._current(other, other_size, mtime_ns):
+                    continue
+                digest = digest or file_hash(path, cancel_token)
+                if self._digest(other, other_digest, cancel_token) == digest:
+                    self.stats['exact'] += 1
+                    return DuplicateMatch(other, exact=True)
+
+        # Fingerprinting reads every page, so only when there is something to compare it with
+        if not self._has_fingerprints(key):
+            return None
+        if cancel_token:
+            cancel_token.raise_if_cancelled()
+        content = content_fingerprint(path)
+        if content:
+            for other, other_size, mtime_ns in self._execute(
+                "SELECT path, size, mtime_ns FROM files WHERE directory = ? AND content = ? AND path != ?",
+                (key, content, path)
+            ):
+                if self._current(other, other_size, mtime_ns):
+                    self.stats['content'] += 1
+                    return DuplicateMatch(other, exact=False)
+        return None
@@ -0,0 +1,176 @@
+# fast_copy.py
+
+import errno
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+
+COPY_BUFFER_SIZE = 1024 * 1024
+# OneDrive does not sync .tmp files, so the partial copy is never uploaded
+PARTIAL_SUFFIX = '.tmp'
+
+# Linux FICLONE ioctl: share the source's blocks (Btrfs, XFS, bcachefs)
+_FICLONE = 0x40049409
+
+_stats_lock = threading.Lock()
+stats = {'clone': 0, 'copyfile': 0, 'copy_file_range': 0, 'sendfile': 0, 'buffered': 0, 'rename': 0, 'bytes': 0}
+
+def _count(method, size=0):
+    with _stats_lock:
+        stats[method] += 1
+        stats['bytes'] += size
+
+def partial_path(target_path):
+    """A dot-file sibling of target_path to write to before it is published by rename."""
+    directory, name = os.path.split(target_path)
+    return os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}{PARTIAL_SUFFIX}")
+
+def _windows_copyfile(src, dst):
+    """CopyFileW: server-side copy on SMB shares and block cloning on ReFS."""
+    import ctypes
+    if not ctypes.windll.kernel32.CopyFileW(str(src), str(dst), False):
+        raise ctypes.WinError()
+
+def _macos_clonefile(src, dst):
+    import ctypes
+    import ctypes.util
+    libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    # clonefile refuses to replace an existing file
+    if os.path.exists(dst):
+        os.remove(dst)
+    if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+        error = ctypes.get_errno()
+        raise OSError(error, os.strerror(error))
+
+def _copy_descriptors(src_fd, dst_fd, size):
+    """Copy an open file's bytes with the cheapest primitive the platform offers; returns its name."""
+    if sys.platform.startswith('linux'):
+        try:
+            import fcntl
+            fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+            return 'clone'
+        except (ImportError, OSError):
+            pass
+    copy_file_range = getattr(os, 'copy_file_range', None)
+    if copy_file_range and size:
+        try:
+            copied = 0
+            while copied < size:
+                sent = copy_file_range(src_fd, dst_fd, size - copied)
+                if not sent:
+                    break
+                copied += sent
+            if copied == size:
+                return 'copy_file_range'
+            if copied:
+                # Partway through a copy, so finish it with the same byte stream below
+                return _finish_buffered(src_fd, dst_fd)
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM):
+                raise
+            _rewind(src_fd, dst_fd)
+    if hasattr(os, 'sendfile') and sys.platform.startswith('linux') and size:
+        try:
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(dst_fd, src_fd, offset, min(size - offset, 1 << 30))
+                if not sent:
+                    break
+                offset += sent
+            os.lseek(src_fd, offset, os.SEEK_SET)
+            os.lseek(dst_fd, offset, os.SEEK_SET)
+            if offset == size:
+                return 'sendfile'
+            return _finish_buffered(src_fd, dst_fd)
+        except OSError as e:
+            if e.errno not in (errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP):
+                raise
+            _rewind(src_fd, dst_fd)
+    return _finish_buffered(src_fd, dst_fd)
+
+def _rewind(src_fd, dst_fd):
+    """Start over after a primitive that is not supported here failed, possibly partway."""
+    os.lseek(src_fd, 0, os.SEEK_SET)
+    os.lseek(dst_fd, 0, os.SEEK_SET)
+    os.ftruncate(dst_fd, 0)
+
+def _finish_buffered(src_fd, dst_fd):
+    buffer = bytearray(COPY_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(src_fd, 'rb', buffering=0, closefd=False) as fsrc, open(dst_fd, 'wb', buffering=0, closefd=False) as fdst:
+        while True:
+            count = fsrc.readinto(buffer)
+            if not count:
+                break
+            fdst.write(view[:count])
+    return 'buffered'
+
+def _copy_data(src, dst):
+    size = os.path.getsize(src)
+    if sys.platform == 'win32':
+        _windows_copyfile(src, dst)
+        return 'copyfile', size
+    if sys.platform == 'darwin':
+        try:
+            _macos_clonefile(src, dst)
+            return 'clone', size
+        except OSError:
+            pass
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        return _copy_descriptors(fsrc.fileno(), fdst.fileno(), size), size
+
+def _publish(partial, target_path, mtime, copy_mode_from=None):
+    """Give the finished partial file its metadata, then rename it to its real name in one step."""
+    if copy_mode_from:
+        shutil.copymode(copy_mode_from, partial)
+    if mtime is not None:
+        os.utime(partial, (mtime, mtime))
+    os.replace(partial, target_path)
+
+def copy_file(source_path, target_path, mtime=None):
+    """
+    Copy source_path to target_path so the target only ever appears complete.
+
+    The data goes to a partial file beside the target, using a CoW clone,
+    a server-side/kernel copy or a 1 MiB buffered copy, whichever the platform
+    and file system support first. The modification time (now by default) is set
+    before the rename, so sync clients such as OneDrive see exactly one finished
+    file with its final timestamp.
+    """
+    mtime = time.time() if mtime is None else mtime
+    partial = partial_path(target_path)
+    try:
+        method, size = _copy_data(source_path, partial)
+        _publish(partial, target_path, mtime, copy_mode_from=source_path)
+    except BaseException:
+        try:
+            os.remove(partial)
+        except OSError:
+            pass
+        raise
+    _count(method, size)
+    return target_path
+
+def move_file(source_path, target_path, mtime=None):
+    """
+    Move source_path to target_path: a rename on the same volume, otherwise copy_file and delete.
+
+    For temporary and staged files whose contents are already complete; the source
+    gets its final timestamp first, so the rename publishes a finished file.
+    """
+    mtime = time.time() if mtime is None else mtime
+    try:
+        os.utime(source_path, (mtime, mtime))
+        os.replace(source_path, target_path)
+        _count('rename')
+        return target_path
+    except OSError as e:
+        # EXDEV on POSIX; Windows reports ERROR_NOT_SAME_DEVICE (17) for another drive
+        if e.errno != errno.EXDEV and getattr(e, 'winerror', None) != 17:
+            raise
+    copy_file(source_path, target_path, mtime)
+    os.remove(source_path)
+    return target_path
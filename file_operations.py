@@ -1,3 +1,4 @@
+import atexit
 import os
 import time
 import shutil
@@ -12,9 +13,13 @@ import subprocess
 from urllib.parse import unquote
 import tempfile
 from io import BytesIO
-from threading import Lock
-filename_lock = Lock()
+import fast_copy
+import content_sniffer
+import name_index
+import staging
 from pdf_operations import PDFOperations
+from background_processor import TaskCancelledError
+from filegroup_descriptor import DESCRIPTOR_FORMATS
 
 
 class FileOperations:
@@ -24,9 +29,28 @@ class FileOperations:
         # Ensure data directory exists
         os.makedirs(os.path.dirname(self.company_names_path), exist_ok=True)
         os.makedirs(os.path.dirname(self.file_name_portions_path), exist_ok=True)
-        # Initialize pdf_ops
-        self.pdf_ops = PDFOperations(self)
+        # The PDFOperations built on this object registers itself through use_pdf_ops(), so the
+        # app, the CLIs and text extraction share one set of Office pools and converters
+        self._pdf_ops = None
+        self._owns_pdf_ops = False
+        # Set by the app: files saved through place_file are fingerprinted as they are written
+        self.duplicate_index = None
     
+    def use_pdf_ops(self, pdf_ops):
+        """Use pdf_ops for .doc and scanned-PDF text extraction unless one is set already."""
+        if self._pdf_ops is None:
+            self._pdf_ops = pdf_ops
+
+    @property
+    def pdf_ops(self):
+        """The shared PDFOperations; one of our own is only built when nothing registered one (worker processes)."""
+        if self._pdf_ops is None:
+            self._pdf_ops = PDFOperations(self)
+            self._owns_pdf_ops = True
+            # Nothing else knows about this copy: stop its converter processes when the process exits
+            atexit.register(self._pdf_ops.close_converters)
+        return self._pdf_ops
+
     def load_file_name_portions(self):
         """Load filename portions from the data file."""
         try:
@@ -146,22 +170,77 @@ class FileOperations:
 
 
     def get_unique_filename(self, directory, filename):
-        with filename_lock:
-            base_name, ext = os.path.splitext(filename)
-            counter = 1
-            unique_filename = filename
-            file_path = os.path.join(directory, unique_filename)
+        """
+        Reserve a free name in directory: filename, else filename with the next free _N suffix.
 
-            while os.path.exists(file_path):
-                unique_filename = f"{base_name}_{counter}{ext}"
-                file_path = os.path.join(directory, unique_filename)
-                counter += 1
+        The name is held for the caller until release_filename(path, written) or, for
+        names that are written, for good; other threads asking meanwhile get another.
+        """
+        return name_index.reserve(directory, filename)
 
-            return file_path
+    def release_filename(self, file_path, written=True):
+        """Commit (written=True) or give back a name handed out by get_unique_filename."""
+        name_index.release(file_path, written)
+
+
+    def create_partial_directory(self, save_dir):
+        """
+        Make a private staging folder for files bound for save_dir whose final name is not decided yet.
+
+        It is kept outside save_dir, so a sync client never sees it, but on save_dir's volume
+        where possible so saving a file is a rename rather than a second full copy (see
+        staging.py). Each drop gets its own folder so names never collide.
+        """
+        return staging.create_directory(save_dir)
+
+    def is_partial_file(self, file_path):
+        """True for a file still waiting in a staging folder."""
+        return staging.is_staged(file_path)
+
+    def place_file(self, source_path, target_path, mtime=None, move=False):
+        """
+        Put source_path at target_path, complete and stamped with mtime (now by default).
+
+        Staged files, and temporary ones when move is True, are renamed into place (copied
+        and deleted across volumes); anything else is copied. Either way the target only
+        appears once it is finished, so sync clients upload it once.
+        """
+        staged = self.is_partial_file(source_path)
+        if not staged and not move:
+            fast_copy.copy_file(source_path, target_path, mtime)
+        else:
+            # Also covers a save directory that changed to another volume since the file was staged
+            fast_copy.move_file(source_path, target_path, mtime)
+            if staged:
+                self._remove_empty_partial_directory(os.path.dirname(source_path))
+        if self.duplicate_index and not self.is_partial_file(target_path):
+            self.duplicate_index.record(target_path)
+
+    def discard_partial_file(self, file_path):
+        """Delete a staged file that will not be saved (converted, merged or dropped from the list)."""
+        if not file_path or not self.is_partial_file(file_path):
+            return
+        try:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        except Exception as e:
+            logging.warning(f"Could not remove staged file {file_path}: {e}")
+        self._remove_empty_partial_directory(os.path.dirname(file_path))
 
+    def discard_partial_directory(self, directory):
+        """Delete a staging folder and everything written to it."""
+        shutil.rmtree(directory, ignore_errors=True)
+        self._remove_empty_partial_directory(directory)
 
-    def extract_text_from_file(self, file_path):
-        """Extract text content from a file."""
+    def _remove_empty_partial_directory(self, directory):
+        staging.remove_empty(directory)
+
+    def cleanup_partial_files(self, save_dir, max_age=24 * 3600):
+        """Remove staging folders for save_dir older than max_age seconds, left by a crash or an unsaved drop."""
+        return staging.cleanup(save_dir, max_age)
+
+    def extract_text_from_file(self, file_path, cancel_token=None, progress=None):
+        """Extract text content from a file, honouring an optional cancellation token and progress reporter."""
         try:
             logging.debug(f"Attempting to extract text from: {file_path}")
             file_ext = os.path.splitext(file_path)[1].lower()
@@ -169,42 +248,59 @@ class FileOperations:
             if file_ext == '.docx':
                 return self.extract_text_from_word(file_path)
             elif file_ext == '.pdf':
-                return self.extract_text_from_pdf(file_path)
+                return self.extract_text_from_pdf(file_path, cancel_token=cancel_token, progress=progress)
             elif file_ext == '.doc':
                 with tempfile.TemporaryDirectory() as temp_dir:
-                    docx_path = self.pdf_ops._convert_doc_to_docx(file_path)
+                    try:
+                        docx_path = self.pdf_ops._convert_doc_to_docx(file_path)
+                    finally:
+                        if self._owns_pdf_ops:
+                            # No COM lane reaps our own copy's pool: quit the Word instance just started
+                            self._pdf_ops.shutdown_office_instances()
                     if docx_path:
                         return self.extract_text_from_word(docx_path)
                     else:
                         raise RuntimeError("Failed to convert .doc to .docx.")
             else:
                 raise ValueError(f"Unsupported file type: {file_ext}")
+        except TaskCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Error extracting text from file: {str(e)}", exc_info=True)
             return f"Error extracting text: {str(e)}"
 
 
 
-    def extract_text_from_pdf(self, file_path):
+    def extract_text_from_pdf(self, file_path, cancel_token=None, progress=None):
         """Extract text from a PDF using PyMuPDF."""
         try:
             logging.debug(f"Opening PDF document: {file_path}")
             text_content = ""
 
             pdf_document = fitz.open(file_path)
+            if progress:
+                progress.set_total(pdf_document.page_count, unit="page")
             for page in pdf_document:
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
                 text_content += page.get_text() + "\n"
+                if progress:
+                    progress.advance()
 
             logging.debug(f"Extracted {len(text_content)} characters from PDF")
 
             # If no text content was extracted, fallback to OCR
             if not text_content.strip():
                 logging.info("No text content extracted from PDF, attempting OCR.")
-                text_content = self.pdf_ops.extract_text_from_image_pdf(file_path)
+                text_content = self.pdf_ops.extract_text_from_image_pdf(
+                    file_path, cancel_token=cancel_token, progress=progress
+                )
                 if not text_content.strip():
                     raise RuntimeError("Failed to extract text from PDF using both standard and OCR methods.")
 
             return text_content
+        except TaskCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Error extracting text from PDF: {e}", exc_info=True)
             return f"Error extracting text: {e}"
@@ -244,12 +340,14 @@ class FileOperations:
             # Generate a unique file path
             save_path = self.get_unique_filename(save_dir, new_file_name)
             
-            # Copy the file
-            shutil.copy(source_path, save_path)
-            
-            # Update modification time to current time
-            current_time = time.time()
-            os.utime(save_path, (current_time, current_time))
+            # Copy the file (a file staged in the destination is renamed instead)
+            # The copy gets the current time as its modification time before it appears
+            try:
+                self.place_file(source_path, save_path)
+            except Exception:
+                self.release_filename(save_path, written=False)
+                raise
+            self.release_filename(save_path)
             
             logging.info(f"File saved successfully: {save_path}")
             return save_path
@@ -269,10 +367,14 @@ class FileOperations:
 
     def is_valid_drop(self, mime_data):
         return mime_data.hasUrls() or \
-               mime_data.hasFormat("FileGroupDescriptor") or \
+               self._has_file_descriptor(mime_data) or \
                mime_data.hasFormat("FileContents") or \
                mime_data.hasFormat("application/x-qt-windows-mime;value=\"Ole Object\"")
 
+    def _has_file_descriptor(self, mime_data):
+        """True if the drop carries a FILEGROUPDESCRIPTOR in either variant (virtual files from Outlook)."""
+        return any(mime_data.hasFormat(fmt) for fmt, _ in DESCRIPTOR_FORMATS)
+
     def handle_mime_type(self, mime_data):
         """Process different MIME types based on their content."""
         try:
@@ -296,10 +398,7 @@ class FileOperations:
         return (
             mime_data.hasFormat("application/x-qt-windows-mime;value=\"Ole Object\"") or
             mime_data.hasFormat("application/x-qt-windows-mime;value=\"Outlook Message Format\"") or
-            (
-                mime_data.hasFormat("FileGroupDescriptor") and
-                mime_data.hasFormat("FileContents")
-            )
+            self._has_file_descriptor(mime_data)
         )
     
     def load_recent_filename_portions(self):
@@ -337,21 +436,29 @@ class FileOperations:
             raise
 
     def determine_file_type(self, file_path):
+        """The file's real kind ('pdf', 'docx', 'xlsx', 'doc', 'msg', 'png', ...) from its contents, or None."""
         try:
-            with open(file_path, 'rb') as f:
-                header = f.read(8)
-            
-            if header.startswith(b'%PDF'):
-                return 'pdf'
-            elif header.startswith(b'\x50\x4B\x03\x04'):  # ZIP archive (could be DOCX)
-                return 'docx'
-            else:
+            result = content_sniffer.sniff(file_path)
+            if result.kind is None:
                 logging.warning(f"Unable to determine file type for {file_path}")
-                return None
+            return result.kind
         except Exception as e:
             logging.error(f"Error determining file type: {str(e)}", exc_info=True)
             raise
 
+    def stage_typed_file(self, file_path, result, save_dir):
+        """
+        file_path, or a staged file named with the extension its contents call for.
+
+        A staged file is renamed in its own staging folder; anything else is copied
+        into a new staging folder for save_dir, so saving it later is still a rename.
+        """
+        if result.matches(file_path) or not result.extension:
+            return file_path
+        if self.is_partial_file(file_path):
+            return content_sniffer.typed_path(file_path, result, os.path.dirname(file_path), move=True)
+        return content_sniffer.typed_path(file_path, result, self.create_partial_directory(save_dir))
+
     def sanitize_filename(self, filename):
         # Remove invalid characters, but keep spaces
         valid_chars = "-_.() abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
@@ -407,4 +514,13 @@ class FileOperations:
             logging.error(f"Error getting file modification time: {str(e)}", exc_info=True)
             raise
 
-# Add any additional file operation methods as needed
\ No newline at end of file
+# Add any additional file operation methods as needed
+
+_worker_file_ops = None
+
+def extract_text_in_worker(file_path, cancel_token=None, progress=None):
+    """Process-pool entry point for text extraction; each worker keeps its own FileOperations."""
+    global _worker_file_ops
+    if _worker_file_ops is None:
+        _worker_file_ops = FileOperations()
+    return _worker_file_ops.extract_text_from_file(file_path, cancel_token=cancel_token, progress=progress)
\ No newline at end of file
@@ -0,0 +1,140 @@
+# filegroup_descriptor.py
+
+import struct
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+# FILEDESCRIPTOR.dwFlags: which of the optional fields are valid
+FD_CLSID = 0x00000001
+FD_SIZEPOINT = 0x00000002
+FD_ATTRIBUTES = 0x00000004
+FD_CREATETIME = 0x00000008
+FD_ACCESSTIME = 0x00000010
+FD_WRITESTIME = 0x00000020
+FD_FILESIZE = 0x00000040
+FD_PROGRESSUI = 0x00004000
+FD_LINKUI = 0x00008000
+FD_UNICODE = 0x80000000
+
+MAX_PATH = 260
+
+# dwFlags, clsid, sizel, pointl, dwFileAttributes, three FILETIMEs, nFileSizeHigh, nFileSizeLow
+_HEADER = struct.Struct('<I16s8s8sIQQQII')
+_COUNT = struct.Struct('<I')
+DESCRIPTOR_W_SIZE = _HEADER.size + MAX_PATH * 2  # 592
+DESCRIPTOR_A_SIZE = _HEADER.size + MAX_PATH      # 332
+
+def _windows_mime(value):
+    return f"application/x-qt-windows-mime;value=\"{value}\""
+
+# The Unicode descriptor first: the ANSI one mangles names outside the code page
+DESCRIPTOR_FORMATS = (
+    ("FileGroupDescriptorW", True),
+    (_windows_mime("FileGroupDescriptorW"), True),
+    ("FileGroupDescriptor", False),
+    (_windows_mime("FileGroupDescriptor"), False),
+)
+
+def file_contents_format(index):
+    """The mime format that carries the FileContents stream of the index-th described file."""
+    return f"{_windows_mime('FileContents')};index={index}"
+
+_FILETIME_EPOCH = datetime(1601, 1, 1, tzinfo=timezone.utc)
+
+def filetime_to_datetime(filetime):
+    """Convert a FILETIME (100 ns ticks since 1601) to an aware UTC datetime; None for 0."""
+    if not filetime:
+        return None
+    return _FILETIME_EPOCH + timedelta(microseconds=filetime // 10)
+
+class DescriptorError(ValueError):
+    """Raised for a FILEGROUPDESCRIPTOR that is truncated or inconsistent."""
+    pass
+
+@dataclass(frozen=True)
+class FileDescriptor:
+    index: int
+    name: str
+    flags: int
+    size: Optional[int] = None
+    attributes: Optional[int] = None
+    created: Optional[datetime] = None
+    accessed: Optional[datetime] = None
+    modified: Optional[datetime] = None
+
+def _decode_name(raw, unicode):
+    if unicode:
+        name = bytes(raw).decode('utf-16le', errors='replace')
+    else:
+        # ANSI descriptors use the sender's code page, which is the system one on Windows
+        name = bytes(raw).decode('mbcs' if sys.platform == 'win32' else 'cp1252', errors='replace')
+    return name.split('\x00', 1)[0]
+
+def parse_file_group_descriptor(data, unicode=None):
+    """
+    Parse FILEGROUPDESCRIPTOR(W) bytes into one FileDescriptor per described file.
+
+    data may be bytes, bytearray, a memoryview or a QByteArray; it is read through a
+    memoryview without copying. With unicode=None the variant is inferred from the
+    length of the data.
+    """
+    view = memoryview(data).cast('B')
+    if len(view) < _COUNT.size:
+        raise DescriptorError("File group descriptor is empty")
+    count = _COUNT.unpack_from(view, 0)[0]
+    body = len(view) - _COUNT.size
+
+    if unicode is None:
+        if not count:
+            return []
+        # An exact fit decides; otherwise the larger variant that fits (clipboard blocks may be padded)
+        if body == count * DESCRIPTOR_A_SIZE:
+            unicode = False
+        else:
+            unicode = body >= count * DESCRIPTOR_W_SIZE
+    entry_size = DESCRIPTOR_W_SIZE if unicode else DESCRIPTOR_A_SIZE
+    if body < count * entry_size:
+        raise DescriptorError(f"File group descriptor of {len(view)} bytes cannot hold {count} entries")
+
+    descriptors = []
+    for index in range(count):
+        offset = _COUNT.size + index * entry_size
+        (flags, _clsid, _sizel, _pointl, attributes, created, accessed, modified,
+         size_high, size_low) = _HEADER.unpack_from(view, offset)
+        name_start = offset + _HEADER.size
+        name = _decode_name(view[name_start:offset + entry_size], unicode)
+        descriptors.append(FileDescriptor(
+            index=index,
+            name=name,
+            flags=flags,
+            size=(size_high << 32 | size_low) if flags & FD_FILESIZE else None,
+            attributes=attributes if flags & FD_ATTRIBUTES else None,
+            created=filetime_to_datetime(created) if flags & FD_CREATETIME else None,
+            accessed=filetime_to_datetime(accessed) if flags & FD_ACCESSTIME else None,
+            modified=filetime_to_datetime(modified) if flags & FD_WRITESTIME else None,
+        ))
+    return descriptors
+
+def build_file_group_descriptor(files, unicode=True):
+    """
+    Encode (name, size, modified) tuples as a FILEGROUPDESCRIPTOR(W).
+
+    The inverse of parse_file_group_descriptor, for exercising the drop path without
+    Outlook; size and modified (a datetime) may be None.
+    """
+    parts = [_COUNT.pack(len(files))]
+    for name, size, modified in files:
+        flags = FD_UNICODE if unicode else 0
+        write_time = 0
+        if size is not None:
+            flags |= FD_FILESIZE
+        if modified is not None:
+            flags |= FD_WRITESTIME
+            write_time = (modified - _FILETIME_EPOCH) // timedelta(microseconds=1) * 10
+        size = size or 0
+        parts.append(_HEADER.pack(flags, b'', b'', b'', 0, 0, 0, write_time, size >> 32, size & 0xFFFFFFFF))
+        encoded = name.encode('utf-16le' if unicode else 'cp1252')[:(MAX_PATH - 1) * (2 if unicode else 1)]
+        parts.append(encoded.ljust(MAX_PATH * (2 if unicode else 1), b'\x00'))
+    return b''.join(parts)
@@ -0,0 +1,424 @@
+# image_to_pdf.py
+
+import logging
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.jpe', '.tif', '.tiff', '.png', '.bmp', '.gif')
+
+DEFAULT_RESOLUTION = 300.0
+
+class ImageIntakeError(Exception):
+    """Raised when an image cannot be read or embedded."""
+    pass
+
+@dataclass
+class ImagePage:
+    """One image ready to be written as a PDF image XObject, with its data already encoded."""
+    width: int
+    height: int
+    colorspace: object
+    bits: int
+    filter: Optional[str]
+    data: bytes
+    dpi: Optional[tuple] = None
+    decode_parms: Optional[dict] = None
+    decode: Optional[list] = None
+    smask: Optional['ImagePage'] = None
+    rotate: int = 0
+    source: str = ''
+
+# --- JPEG: embedded as-is with DCTDecode ---------------------------------------------------
+
+# Baseline, extended and progressive Huffman-coded JPEGs are what PDF readers decode reliably
+_PASSTHROUGH_SOF = {0xC0, 0xC1, 0xC2}
+_ALL_SOF = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# EXIF orientation -> clockwise page rotation; mirrored orientations need decoding
+_EXIF_ROTATION = {1: 0, 3: 180, 6: 90, 8: 270}
+
+def _exif_orientation(tiff):
+    try:
+        order = '<' if tiff[:2] == b'II' else '>'
+        ifd = struct.unpack(f'{order}I', tiff[4:8])[0]
+        count = struct.unpack(f'{order}H', tiff[ifd:ifd + 2])[0]
+        for n in range(count):
+            entry = tiff[ifd + 2 + n * 12: ifd + 14 + n * 12]
+            tag, kind = struct.unpack(f'{order}HH', entry[:4])
+            if tag == 0x0112 and kind == 3:
+                return struct.unpack(f'{order}H', entry[8:10])[0]
+    except struct.error:
+        pass
+    return 1
+
+def _jpeg_page(path, data):
+    """Describe a JPEG from its markers without decoding it; None if it must be decoded instead."""
+    if data[:2] != b'\xff\xd8':
+        raise ImageIntakeError(f"{os.path.basename(path)} is not a JPEG file")
+    dpi, orientation, adobe = None, 1, False
+    i = 2
+    while i + 4 <= len(data):
+        if data[i] != 0xFF:
+            raise ImageIntakeError(f"{os.path.basename(path)} has a corrupt JPEG header")
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        length = struct.unpack('>H', data[i + 2:i + 4])[0]
+        segment = data[i + 4:i + 2 + length]
+        if marker == 0xE0 and segment[:5] == b'JFIF\x00' and len(segment) >= 12:
+            units = segment[7]
+            x_density, y_density = struct.unpack('>HH', segment[8:12])
+            if units == 1 and x_density > 1 and y_density > 1:
+                dpi = (float(x_density), float(y_density))
+            elif units == 2 and x_density > 1 and y_density > 1:
+                dpi = (x_density * 2.54, y_density * 2.54)
+        elif marker == 0xE1 and segment[:6] == b'Exif\x00\x00':
+            orientation = _exif_orientation(segment[6:])
+        elif marker == 0xEE and segment[:5] == b'Adobe':
+            adobe = True
+        elif marker in _ALL_SOF:
+            if marker not in _PASSTHROUGH_SOF or segment[0] != 8 or orientation not in _EXIF_ROTATION:
+                return None
+            height, width = struct.unpack('>HH', segment[1:5])
+            components = segment[5]
+            colorspace = {1: '/DeviceGray', 3: '/DeviceRGB', 4: '/DeviceCMYK'}.get(components)
+            if colorspace is None or not width or not height:
+                return None
+            return ImagePage(
+                width=width, height=height, colorspace=colorspace, bits=8, filter='/DCTDecode',
+                data=data, dpi=dpi, rotate=_EXIF_ROTATION[orientation], source=path,
+                # Photoshop writes CMYK JPEGs inverted
+                decode=[1, 0] * 4 if components == 4 and adobe else None,
+            )
+        elif marker == 0xDA:
+            break
+        i += 2 + length
+    return None
+
+# --- PNG: IDAT data embedded as-is with the PNG predictor ----------------------------------
+
+def _png_page(path, data):
+    """Reuse the zlib stream of an opaque, non-interlaced PNG; None if it must be decoded instead."""
+    if data[:8] != b'\x89PNG\r\n\x1a\n':
+        raise ImageIntakeError(f"{os.path.basename(path)} is not a PNG file")
+    pos, idat, palette, dpi, header = 8, [], None, None, None
+    while pos + 8 <= len(data):
+        length, kind = struct.unpack('>I4s', data[pos:pos + 8])
+        chunk = data[pos + 8:pos + 8 + length]
+        if kind == b'IHDR':
+            header = struct.unpack('>IIBBBBB', chunk)
+        elif kind == b'PLTE':
+            palette = chunk
+        elif kind == b'tRNS':
+            return None
+        elif kind == b'pHYs' and len(chunk) == 9:
+            x_ppu, y_ppu, unit = struct.unpack('>IIB', chunk)
+            if unit == 1 and x_ppu and y_ppu:
+                dpi = (x_ppu * 0.0254, y_ppu * 0.0254)
+        elif kind == b'IDAT':
+            idat.append(chunk)
+        elif kind == b'IEND':
+            break
+        pos += 12 + length
+    if header is None or not idat:
+        raise ImageIntakeError(f"{os.path.basename(path)} has no image data")
+    width, height, depth, color_type, _, _, interlace = header
+    if interlace or color_type not in (0, 2, 3):
+        return None
+    colors = 3 if color_type == 2 else 1
+    if color_type == 3:
+        if not palette:
+            return None
+        colorspace = ['/Indexed', '/DeviceRGB', len(palette) // 3 - 1, palette]
+    else:
+        colorspace = '/DeviceRGB' if color_type == 2 else '/DeviceGray'
+    return ImagePage(
+        width=width, height=height, colorspace=colorspace, bits=depth, filter='/FlateDecode',
+        data=b''.join(idat), dpi=dpi, source=path,
+        decode_parms={'/Predictor': 15, '/Colors': colors, '/BitsPerComponent': depth, '/Columns': width},
+    )
+
+# --- TIFF: CCITT Group 4 strips embedded as-is, other frames decoded losslessly ------------
+
+def _tiff_frame_page(path, image, handle):
+    """Reuse a single-strip Group 4 fax frame; None if the frame must be decoded instead."""
+    tags = image.tag_v2
+    offsets, counts = tags.get(273), tags.get(279)
+    if (image.info.get('compression') != 'group4' or image.mode != '1'
+            or not offsets or len(offsets) != 1 or tags.get(266, 1) != 1):
+        return None
+    handle.seek(offsets[0])
+    data = handle.read(counts[0])
+    width, height = image.size
+    return ImagePage(
+        width=width, height=height, colorspace='/DeviceGray', bits=1, filter='/CCITTFaxDecode',
+        data=data, dpi=_pil_dpi(image), source=path,
+        decode_parms={'/K': -1, '/Columns': width, '/Rows': height, '/BlackIs1': False},
+        # PhotometricInterpretation 1 (BlackIsZero) swaps the meaning of the coded runs
+        decode=[1, 0] if tags.get(262, 0) == 1 else None,
+    )
+
+# --- Anything else: decoded and stored with Flate, which is lossless ------------------------
+
+def _pil_dpi(image):
+    dpi = image.info.get('dpi')
+    try:
+        if dpi and float(dpi[0]) > 1 and float(dpi[1]) > 1:
+            return float(dpi[0]), float(dpi[1])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+def _decoded_page(path, image):
+    from PIL import ImageOps
+
+    dpi = _pil_dpi(image)
+    image = ImageOps.exif_transpose(image)
+    smask = None
+    if image.mode == 'P':
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    if image.mode in ('RGBA', 'LA', 'PA'):
+        alpha = image.getchannel('A')
+        smask = ImagePage(
+            width=image.width, height=image.height, colorspace='/DeviceGray', bits=8,
+            filter='/FlateDecode', data=zlib.compress(alpha.tobytes(), 6), source=path
+        )
+        image = image.convert('RGB' if image.mode != 'LA' else 'L')
+    if image.mode == '1':
+        colorspace, bits, raw = '/DeviceGray', 1, image.tobytes()
+    elif image.mode == 'L':
+        colorspace, bits, raw = '/DeviceGray', 8, image.tobytes()
+    elif image.mode.startswith('I;16'):
+        colorspace, bits, raw = '/DeviceGray', 16, image.tobytes('raw', 'I;16B')
+    elif image.mode == 'CMYK':
+        colorspace, bits, raw = '/DeviceCMYK', 8, image.tobytes()
+    else:
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        colorspace, bits, raw = '/DeviceRGB', 8, image.tobytes()
+    return ImagePage(
+        width=image.width, height=image.height, colorspace=colorspace, bits=bits,
+        filter='/FlateDecode', data=zlib.compress(raw, 6), dpi=dpi, smask=smask, source=path
+    )
+
+def load_image_pages(path):
+    """
+    Read one image file into pages ready for the PDF writer.
+
+    JPEG data, opaque PNG data and Group 4 TIFF frames are embedded without
+    re-encoding; every other frame of a multi-page TIFF and other formats are
+    decoded once and stored with lossless Flate compression.
+    """
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(8)
+            if head[:2] == b'\xff\xd8':
+                f.seek(0)
+                data = f.read()
+                page = _jpeg_page(path, data)
+                if page:
+                    return [page]
+            elif head == b'\x89PNG\r\n\x1a\n':
+                f.seek(0)
+                data = f.read()
+                page = _png_page(path, data)
+                if page:
+                    return [page]
+
+            from PIL import Image
+            f.seek(0)
+            with Image.open(f) as image:
+                pages = []
+                for frame in range(getattr(image, 'n_frames', 1)):
+                    image.seek(frame)
+                    page = _tiff_frame_page(path, image, f) if image.format == 'TIFF' else None
+                    pages.append(page or _decoded_page(path, image))
+                return pages
+    except ImageIntakeError:
+        raise
+    except Exception as e:
+        raise ImageIntakeError(f"Could not read image {os.path.basename(path)}: {e}") from e
+
+# --- PDF writer -------------------------------------------------------------------------------
+
+class _Ref:
+    def __init__(self, number):
+        self.number = number
+
+def _pdf_value(value):
+    if isinstance(value, _Ref):
+        return b'%d 0 R' % value.number
+    if isinstance(value, bool):
+        return b'true' if value else b'false'
+    if isinstance(value, int):
+        return b'%d' % value
+    if isinstance(value, float):
+        return (f'{value:.4f}'.rstrip('0').rstrip('.') or '0').encode('ascii')
+    if isinstance(value, bytes):
+        return b'<' + value.hex().encode('ascii') + b'>'
+    if isinstance(value, str):
+        return value.encode('ascii')
+    if isinstance(value, (list, tuple)):
+        return b'[' + b' '.join(_pdf_value(v) for v in value) + b']'
+    if isinstance(value, dict):
+        return b'<<' + b''.join(k.encode('ascii') + b' ' + _pdf_value(v) + b' ' for k, v in value.items()) + b'>>'
+    raise TypeError(f"Cannot write {type(value).__name__} to PDF")
+
+def _text_string(text):
+    return b'\xfe\xff' + text.encode('utf-16-be')
+
+class _PdfStreamWriter:
+    """Writes PDF objects straight to a file, remembering offsets for the xref table."""
+
+    def __init__(self, f):
+        self.f = f
+        self.offsets = {}
+        self._next = 1
+        f.write(b'%PDF-1.5\n%\xe2\xe3\xcf\xd3\n')
+
+    def reserve(self):
+        number = self._next
+        self._next += 1
+        return number
+
+    def write(self, number, obj, stream=None):
+        self.offsets[number] = self.f.tell()
+        self.f.write(b'%d 0 obj\n' % number)
+        if stream is not None:
+            obj = dict(obj, **{'/Length': len(stream)})
+        self.f.write(_pdf_value(obj))
+        if stream is not None:
+            self.f.write(b'\nstream\n')
+            self.f.write(stream)
+            self.f.write(b'\nendstream')
+        self.f.write(b'\nendobj\n')
+
+    def finish(self, root, info):
+        xref = self.f.tell()
+        self.f.write(b'xref\n0 %d\n0000000000 65535 f \n' % self._next)
+        for number in range(1, self._next):
+            self.f.write(b'%010d 00000 n \n' % self.offsets[number])
+        trailer = {'/Size': self._next, '/Root': _Ref(root), '/Info': _Ref(info)}
+        self.f.write(b'trailer\n' + _pdf_value(trailer) + b'\nstartxref\n%d\n%%%%EOF\n' % xref)
+
+def _image_object(page, smask_ref=None):
+    obj = {
+        '/Type': '/XObject', '/Subtype': '/Image',
+        '/Width': page.width, '/Height': page.height,
+        '/ColorSpace': page.colorspace, '/BitsPerComponent': page.bits,
+    }
+    if page.filter:
+        obj['/Filter'] = page.filter
+    if page.decode_parms:
+        obj['/DecodeParms'] = page.decode_parms
+    if page.decode:
+        obj['/Decode'] = page.decode
+    if smask_ref:
+        obj['/SMask'] = smask_ref
+    return obj
+
+def _placement(page, resolution, page_size):
+    """Return (media width, media height, x, y, image width, image height) in points."""
+    dpi = (resolution, resolution) if resolution else (page.dpi or (DEFAULT_RESOLUTION, DEFAULT_RESOLUTION))
+    width = page.width * 72.0 / dpi[0]
+    height = page.height * 72.0 / dpi[1]
+    if not page_size:
+        return width, height, 0.0, 0.0, width, height
+    media_width, media_height = page_size
+    # Rotated pages are laid out unrotated, so fit against the swapped page
+    if page.rotate in (90, 270):
+        media_width, media_height = media_height, media_width
+    if (width > height) != (media_width > media_height):
+        media_width, media_height = media_height, media_width
+    scale = min(media_width / width, media_height / height)
+    width, height = width * scale, height * scale
+    return media_width, media_height, (media_width - width) / 2, (media_height - height) / 2, width, height
+
+def images_to_pdf(image_paths, pdf_path, resolution=DEFAULT_RESOLUTION, page_size=None,
+                  max_workers=None, cancel_token=None):
+    """
+    Combine images into one PDF, one page per image or TIFF frame, in the given order.
+
+    Files are read and prepared on a thread pool while pages are streamed to pdf_path,
+    so only a few images are held in memory at once.
+
+    :param resolution: DPI used to size every page; None uses each image's own DPI.
+    :param page_size: Optional (width, height) in points to fit each image onto instead,
+                      turned to match the image's orientation.
+    :param cancel_token: Optional CancellationToken checked between images.
+    :return: pdf_path
+    """
+    image_paths = [str(p) for p in image_paths]
+    if not image_paths:
+        raise ValueError("No images to convert")
+    max_workers = max_workers or min(8, (os.cpu_count() or 2), len(image_paths))
+    started = time.perf_counter()
+    page_count = 0
+
+    try:
+        with open(pdf_path, 'wb') as f, ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image") as executor:
+            writer = _PdfStreamWriter(f)
+            catalog, pages_ref, info = writer.reserve(), writer.reserve(), writer.reserve()
+            kids = []
+            remaining = iter(image_paths)
+            pending = deque(executor.submit(load_image_pages, p) for _, p in zip(range(max_workers * 2), remaining))
+            try:
+                while pending:
+                    if cancel_token:
+                        cancel_token.raise_if_cancelled()
+                    loaded = pending.popleft().result()
+                    next_path = next(remaining, None)
+                    if next_path is not None:
+                        pending.append(executor.submit(load_image_pages, next_path))
+                    for page in loaded:
+                        smask_ref = None
+                        if page.smask:
+                            smask_ref = _Ref(writer.reserve())
+                            writer.write(smask_ref.number, _image_object(page.smask), page.smask.data)
+                        image_ref = writer.reserve()
+                        writer.write(image_ref, _image_object(page, smask_ref), page.data)
+                        media_width, media_height, x, y, width, height = _placement(page, resolution, page_size)
+                        content_ref = writer.reserve()
+                        content = f"q {width:.4f} 0 0 {height:.4f} {x:.4f} {y:.4f} cm /Im0 Do Q".encode('ascii')
+                        writer.write(content_ref, {}, content)
+                        page_ref = writer.reserve()
+                        page_obj = {
+                            '/Type': '/Page', '/Parent': _Ref(pages_ref),
+                            '/MediaBox': [0, 0, float(media_width), float(media_height)],
+                            '/Resources': {'/XObject': {'/Im0': _Ref(image_ref)}},
+                            '/Contents': _Ref(content_ref),
+                        }
+                        if page.rotate:
+                            page_obj['/Rotate'] = page.rotate
+                        writer.write(page_ref, page_obj)
+                        kids.append(_Ref(page_ref))
+                        page_count += 1
+            finally:
+                for future in pending:
+                    future.cancel()
+            writer.write(pages_ref, {'/Type': '/Pages', '/Kids': kids, '/Count': len(kids)})
+            writer.write(catalog, {'/Type': '/Catalog', '/Pages': _Ref(pages_ref)})
+            title = os.path.splitext(os.path.basename(pdf_path))[0]
+            writer.write(info, {'/Title': _text_string(title), '/Producer': _text_string('DocHandler')})
+            writer.finish(catalog, info)
+    except BaseException:
+        try:
+            os.remove(pdf_path)
+        except OSError:
+            pass
+        raise
+
+    elapsed = time.perf_counter() - started
+    logging.info(
+        f"Wrote {page_count} image pages from {len(image_paths)} files to {pdf_path} in {elapsed:.2f}s"
+    )
+    return pdf_path
@@ -0,0 +1,249 @@
+# mailbox_intake.py
+"""
+Bulk intake of quote attachments from an exported mailbox.
+
+Streams messages from a local mbox file or Maildir directory, saves their PDF,
+Word and Excel attachments and converts and names them like dropped files, e.g.:
+
+    python mailbox_intake.py bid-day.mbox --portion "02-4100 - Demolition" --out Q:\\Bids\\Demo
+    python mailbox_intake.py ~/Maildir/bids --workers 4
+"""
+import argparse
+import email.policy
+import email.utils
+import logging
+import mailbox
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from email.parser import BytesParser
+
+from config import CONFIG
+from content_sniffer import sniff, sniff_bytes
+from sender_companies import SenderCompanyMap
+
+DOCUMENT_KINDS = {'pdf', 'doc', 'docx', 'xls', 'xlsx', 'xlsm'}
+# Only these can be read for a company name without starting Office
+SCANNABLE_KINDS = {'pdf', 'docx'}
+
+def open_mailbox(path):
+    """A Maildir for a directory with cur/ and new/, otherwise an mbox file; never created."""
+    if os.path.isdir(path):
+        if not (os.path.isdir(os.path.join(path, 'cur')) and os.path.isdir(os.path.join(path, 'new'))):
+            raise ValueError(f"{path} is a directory but not a Maildir")
+        return mailbox.Maildir(path, factory=None, create=False)
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"Mailbox not found: {path}")
+    return mailbox.mbox(path, factory=None, create=False)
+
+def iter_messages(path):
+    """
+    Yield (key, EmailMessage) for every message, parsing one message at a time.
+
+    Only the mailbox's table of offsets (mbox) or file names (Maildir) is held in
+    memory; each message is parsed from its own file handle and dropped afterwards.
+    """
+    box = open_mailbox(path)
+    parser = BytesParser(policy=email.policy.default)
+    try:
+        for key in box.iterkeys():
+            try:
+                with box.get_file(key) as f:
+                    message = parser.parse(f)
+            except Exception as e:
+                logging.warning(f"Skipping unreadable message {key} in {path}: {e}")
+                continue
+            yield key, message
+    finally:
+        box.close()
+
+def iter_document_attachments(message):
+    """
+    Yield (file name, bytes, SniffResult) of the document attachments, including those of forwarded emails.
+
+    Attachments are picked by their contents, not their names: a quote sent as
+    'scan.dat' or 'application/octet-stream' is kept, and a name whose extension
+    does not match is corrected.
+    """
+    for part in message.walk():
+        if part.is_multipart() or part.get_content_maintype() in ('text', 'message'):
+            continue
+        name = part.get_filename()
+        if not name:
+            continue
+        data = part.get_payload(decode=True)
+        if not data:
+            continue
+        sniffed = sniff_bytes(data)
+        if sniffed.kind not in DOCUMENT_KINDS:
+            continue
+        if not sniffed.matches(name):
+            name = f"{os.path.splitext(name)[0]}{sniffed.extension}"
+        yield name, data, sniffed
+
+@dataclass
+class IntakeAttachment:
+    """One attachment staged for conversion, with the email details used to name it."""
+    path: str
+    original_name: str
+    subject: str
+    sender: str
+
+@dataclass
+class IntakeStats:
+    messages: int = 0
+    attachments: int = 0
+    saved: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def messages_per_second(self):
+        return self.messages / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def attachments_per_second(self):
+        return self.attachments / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return (
+            f"{self.messages} messages, {self.attachments} attachments ({self.saved} saved, "
+            f"{self.failed} failed) in {self.elapsed:.1f}s: {self.messages_per_second:.1f} msg/s, "
+            f"{self.attachments_per_second:.1f} attachments/s"
+        )
+
+class MailboxIntake:
+    """
+    Feeds every document attachment of a mailbox through conversion and naming.
+
+    Attachments are staged in out_dir as messages are read and converted in chunks
+    of chunk_size with PDFOperations.convert_many, so a large mailbox never sits in
+    memory or in the staging folder all at once. With a filename portion, files are
+    named '<portion> - <company>.pdf' like Save Quotes mode; the company comes from
+    the learned sender table or a match against the company list, since a batch run
+    cannot prompt. Names are worked out on a pool of `workers` threads, which is also
+    the number of Office instances conversions are spread across.
+    """
+
+    def __init__(self, file_ops, pdf_ops, out_dir, filename_portion=None, sender_companies=None,
+                 workers=None, chunk_size=50):
+        self.file_ops = file_ops
+        self.pdf_ops = pdf_ops
+        self.out_dir = str(out_dir)
+        self.filename_portion = filename_portion
+        self.sender_companies = sender_companies
+        self.workers = workers or max(1, min(4, os.cpu_count() or 1))
+        self.chunk_size = chunk_size
+        self._company_names = None
+
+    def run(self, mailbox_path):
+        """Process every message of the mailbox and return IntakeStats."""
+        os.makedirs(self.out_dir, exist_ok=True)
+        stats = IntakeStats()
+        started = time.perf_counter()
+        staging = self.file_ops.create_partial_directory(self.out_dir)
+        pending = []
+        try:
+            for key, message in iter_messages(mailbox_path):
+                stats.messages += 1
+                subject = str(message.get('Subject', '') or '')
+                sender = email.utils.parseaddr(str(message.get('From', '') or ''))[1]
+                for name, data, sniffed in iter_document_attachments(message):
+                    stats.attachments += 1
+                    if sniffed.damaged:
+                        stats.failed += 1
+                        logging.error(f"Skipping '{name}' from '{subject}': {sniffed.describe()}")
+                        continue
+                    path = self.file_ops.get_unique_filename(staging, self.file_ops.sanitize_filename(name))
+                    try:
+                        with open(path, 'wb') as f:
+                            f.write(data)
+                    except Exception:
+                        self.file_ops.release_filename(path, written=False)
+                        raise
+                    self.file_ops.release_filename(path)
+                    pending.append(IntakeAttachment(path, name, subject, sender))
+                if len(pending) >= self.chunk_size:
+                    self._convert(pending, stats)
+                    pending = []
+                    stats.elapsed = time.perf_counter() - started
+                    logging.info(f"Mailbox intake progress: {stats.summary()}")
+            if pending:
+                self._convert(pending, stats)
+        finally:
+            # Attachments that failed to convert are not left in the user's folder
+            self.file_ops.discard_partial_directory(staging)
+            stats.elapsed = time.perf_counter() - started
+        logging.info(f"Mailbox intake of {mailbox_path} finished: {stats.summary()}")
+        return stats
+
+    def _convert(self, attachments, stats):
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="intake") as executor:
+            names = list(executor.map(self.name_for, attachments))
+        results = self.pdf_ops.convert_many(
+            [a.path for a in attachments], self.out_dir, names, parallel=self.workers
+        )
+        for attachment, result in zip(attachments, results):
+            if result.ok:
+                stats.saved += 1
+            else:
+                stats.failed += 1
+                logging.error(f"Could not convert '{attachment.original_name}' from '{attachment.subject}': {result.error}")
+
+    def name_for(self, attachment):
+        """The output file name: the Save Quotes name with a portion, else the attachment's own."""
+        base_name = os.path.splitext(self.file_ops.sanitize_filename(attachment.original_name))[0]
+        if not self.filename_portion:
+            return f"{base_name}.pdf"
+        company_name = self.company_for(attachment)
+        return f"{self.filename_portion} - {company_name or base_name}.pdf"
+
+    def company_for(self, attachment):
+        """The sender's learned company, else the first known company named in the document; None if neither."""
+        if self.sender_companies and attachment.sender:
+            company_name, _ = self.sender_companies.lookup(attachment.sender)
+            if company_name:
+                return company_name
+        if sniff(attachment.path).kind not in SCANNABLE_KINDS:
+            return None
+        if self._company_names is None:
+            self._company_names = self.file_ops.load_company_names()
+        text = self.file_ops.extract_text_from_file(attachment.path).lower()
+        for name in self._company_names:
+            if name.lower() in text:
+                return name
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert and file the document attachments of an mbox or Maildir")
+    parser.add_argument("mailbox", help="mbox file or Maildir directory")
+    parser.add_argument("--out", default=str(CONFIG['DEFAULT_SAVE_DIR']), help="Folder for the converted PDFs")
+    parser.add_argument("--portion", help="Filename portion for Save Quotes naming, e.g. '02-4100 - Demolition'")
+    parser.add_argument("--workers", type=int, help="Naming threads and Office instances to use")
+    parser.add_argument("--chunk-size", type=int, default=50, help="Attachments converted per batch")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    from file_operations import FileOperations
+    from pdf_operations import PDFOperations
+
+    file_ops = FileOperations()
+    pdf_ops = PDFOperations(file_ops)
+    intake = MailboxIntake(
+        file_ops,
+        pdf_ops,
+        args.out,
+        filename_portion=args.portion,
+        sender_companies=SenderCompanyMap(CONFIG['SENDER_COMPANIES_PATH']),
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+    )
+    try:
+        stats = intake.run(args.mailbox)
+    finally:
+        pdf_ops.close_converters()
+    print(stats.summary())
+
+if __name__ == "__main__":
+    main()
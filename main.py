@@ -1,5 +1,6 @@
 import sys
 import os
+import multiprocessing
 from PyQt6.QtGui import QIcon, QAction
 from PyQt6.QtWidgets import QApplication, QMessageBox
 from PyQt6.QtCore import Qt
@@ -184,4 +185,6 @@ def main():
         sys.exit(1)
 
 if __name__ == '__main__':
+    # Required for the BackgroundProcessor process pool in the frozen executable
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,454 @@
+# msg_reader.py
+
+import email.utils
+import logging
+import os
+import re
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Optional
+
+import name_index
+
+MSG_EXTENSIONS = {'.msg'}
+
+# Small images of these types are logos and signature graphics embedded in the message body
+INLINE_IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.emf', '.wmf'}
+
+CFB_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+# Special sector numbers
+_MAXREGSECT = 0xFFFFFFFA
+_DIFSECT = 0xFFFFFFFC
+_FATSECT = 0xFFFFFFFD
+_ENDOFCHAIN = 0xFFFFFFFE
+_FREESECT = 0xFFFFFFFF
+_NOSTREAM = 0xFFFFFFFF
+
+# Directory entry types
+_STORAGE = 1
+_STREAM = 2
+_ROOT = 5
+
+_HEADER = struct.Struct('<8s16sHHHHH6sIIIIIIIII')
+_DIFAT_IN_HEADER = 109
+_DIRECTORY_ENTRY = struct.Struct('<64sHBBIII16sIQQIQ')
+
+class CompoundFileError(ValueError):
+    """Raised for data that is not a well-formed OLE compound file."""
+    pass
+
+@dataclass
+class DirectoryEntry:
+    sid: int
+    name: str
+    type: int
+    left: int
+    right: int
+    child: int
+    start: int
+    size: int
+
+    @property
+    def is_storage(self):
+        return self.type in (_STORAGE, _ROOT)
+
+class CompoundFile:
+    """
+    Read-only OLE compound file (CFB, MS-CFB) reader over an in-memory buffer.
+
+    Streams are assembled by following the FAT or, below the mini-stream cutoff, the
+    mini FAT; storages are walked through the directory's sibling trees.
+    """
+
+    def __init__(self, data):
+        self._data = memoryview(data)
+        if len(self._data) < 512 or bytes(self._data[:8]) != CFB_SIGNATURE:
+            raise CompoundFileError("Not an OLE compound file")
+        (_signature, _clsid, _minor, major, byte_order, sector_shift, mini_shift, _reserved,
+         _dir_sectors, fat_sectors, first_dir, _transaction, self._mini_cutoff,
+         first_mini_fat, mini_fat_sectors, first_difat, difat_sectors) = _HEADER.unpack_from(self._data, 0)
+        if byte_order != 0xFFFE or major not in (3, 4):
+            raise CompoundFileError(f"Unsupported compound file version {major}")
+        self._major = major
+        self._sector_size = 1 << sector_shift
+        self._mini_sector_size = 1 << mini_shift
+
+        self._fat = self._read_fat(fat_sectors, first_difat, difat_sectors)
+        self.entries = self._read_directory(first_dir)
+        root = self.entries[0]
+        if root.type != _ROOT:
+            raise CompoundFileError("Compound file has no root entry")
+        self._mini_fat = self._read_table(self._chain(first_mini_fat, self._fat), mini_fat_sectors)
+        self._mini_stream = self._read_chain(root.start, root.size, self._fat, self._sector_size, self._sector)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def _sector(self, sid):
+        offset = (sid + 1) * self._sector_size
+        if offset + self._sector_size > len(self._data):
+            # The last sector of a file may be stored short
+            if offset >= len(self._data):
+                raise CompoundFileError(f"Sector {sid} lies beyond the end of the file")
+        return self._data[offset:offset + self._sector_size]
+
+    def _mini_sector(self, sid):
+        offset = sid * self._mini_sector_size
+        return self._mini_stream[offset:offset + self._mini_sector_size]
+
+    def _read_table(self, sectors, limit=None):
+        sectors = sectors[:limit] if limit is not None else sectors
+        values = []
+        per_sector = self._sector_size // 4
+        for sid in sectors:
+            values.extend(struct.unpack_from(f'<{per_sector}I', self._sector(sid)))
+        return values
+
+    def _read_fat(self, fat_sectors, first_difat, difat_sectors):
+        difat = list(struct.unpack_from(f'<{_DIFAT_IN_HEADER}I', self._data, _HEADER.size))
+        sid = first_difat
+        per_sector = self._sector_size // 4 - 1
+        for _ in range(difat_sectors):
+            if sid > _MAXREGSECT:
+                break
+            sector = struct.unpack_from(f'<{per_sector + 1}I', self._sector(sid))
+            difat.extend(sector[:per_sector])
+            sid = sector[per_sector]
+        return self._read_table([s for s in difat[:fat_sectors] if s <= _MAXREGSECT])
+
+    def _chain(self, start, table):
+        chain = []
+        sid = start
+        while sid <= _MAXREGSECT:
+            if sid >= len(table) or len(chain) > len(table):
+                raise CompoundFileError("Broken sector chain")
+            chain.append(sid)
+            sid = table[sid]
+        return chain
+
+    def _read_chain(self, start, size, table, sector_size, read_sector):
+        if start > _MAXREGSECT or not size:
+            return b''
+        chain = self._chain(start, table)
+        if len(chain) * sector_size < size:
+            raise CompoundFileError("Stream is shorter than its declared size")
+        return b''.join(read_sector(sid) for sid in chain)[:size]
+
+    def _read_directory(self, first_dir):
+        raw = self._read_chain(first_dir, len(self._chain(first_dir, self._fat)) * self._sector_size,
+                               self._fat, self._sector_size, self._sector)
+        entries = []
+        for sid in range(len(raw) // _DIRECTORY_ENTRY.size):
+            (name, name_length, entry_type, _color, left, right, child, _clsid, _state,
+             _created, _modified, start, size) = _DIRECTORY_ENTRY.unpack_from(raw, sid * _DIRECTORY_ENTRY.size)
+            if self._major == 3:
+                # Version 3 files only define the low 32 bits of the size
+                size &= 0xFFFFFFFF
+            entries.append(DirectoryEntry(
+                sid=sid,
+                name=name[:max(name_length - 2, 0)].decode('utf-16le', errors='replace'),
+                type=entry_type, left=left, right=right, child=child, start=start, size=size,
+            ))
+        return entries
+
+    def children(self, entry=None):
+        """The entries directly inside a storage (the root by default), keyed by name."""
+        entry = entry or self.entries[0]
+        found = {}
+        stack = [entry.child]
+        seen = set()
+        while stack:
+            sid = stack.pop()
+            if sid == _NOSTREAM or sid >= len(self.entries) or sid in seen:
+                continue
+            seen.add(sid)
+            child = self.entries[sid]
+            found[child.name] = child
+            stack.extend((child.left, child.right))
+        return found
+
+    def read(self, entry):
+        """The contents of a stream entry."""
+        if entry.size < self._mini_cutoff:
+            return self._read_chain(entry.start, entry.size, self._mini_fat, self._mini_sector_size, self._mini_sector)
+        return self._read_chain(entry.start, entry.size, self._fat, self._sector_size, self._sector)
+
+# MAPI property types and ids used from .msg files
+PT_LONG = 0x0003
+PT_BOOLEAN = 0x000B
+PT_STRING8 = 0x001E
+PT_UNICODE = 0x001F
+PT_BINARY = 0x0102
+PT_OBJECT = 0x000D
+
+PR_SUBJECT = 0x0037
+PR_SENT_REPRESENTING_EMAIL_ADDRESS = 0x0065
+PR_TRANSPORT_MESSAGE_HEADERS = 0x007D
+PR_SENDER_NAME = 0x0C1A
+PR_SENDER_ADDRTYPE = 0x0C1E
+PR_SENDER_EMAIL_ADDRESS = 0x0C1F
+PR_MESSAGE_CODEPAGE = 0x3FFD
+PR_SENDER_SMTP_ADDRESS = 0x5D01
+PR_SENT_REPRESENTING_SMTP_ADDRESS = 0x5D02
+PR_DISPLAY_NAME = 0x3001
+PR_ATTACH_DATA = 0x3701
+PR_ATTACH_FILENAME = 0x3704
+PR_ATTACH_METHOD = 0x3705
+PR_ATTACH_LONG_FILENAME = 0x3707
+PR_ATTACH_MIME_TAG = 0x370E
+PR_ATTACH_CONTENT_ID = 0x3712
+PR_ATTACHMENT_HIDDEN = 0x7FFE
+
+ATTACH_BY_VALUE = 1
+
+_ATTACHMENT_PREFIX = '__attach_version1.0_'
+_PROPERTIES_STREAM = '__properties_version1.0'
+_FIXED_PROPERTY = struct.Struct('<HHI8s')
+
+class MsgError(ValueError):
+    """Raised for a .msg file that cannot be read."""
+    pass
+
+@dataclass
+class MsgAttachment:
+    name: str
+    data: bytes
+    mime_type: str = ""
+    content_id: str = ""
+    hidden: bool = False
+    method: int = ATTACH_BY_VALUE
+
+    @property
+    def size(self):
+        return len(self.data)
+
+@dataclass
+class MsgMessage:
+    path: str
+    subject: str = ""
+    sender_name: str = ""
+    sender_email: str = ""
+    attachments: list = field(default_factory=list)
+
+class _PropertyStorage:
+    """String, binary and fixed-size MAPI properties of one .msg storage."""
+
+    def __init__(self, cfb, entry, header_size, codepage='cp1252'):
+        self._cfb = cfb
+        self.children = cfb.children(entry)
+        self.codepage = codepage
+        self.fixed = {}
+        properties = self.children.get(_PROPERTIES_STREAM)
+        if properties:
+            raw = cfb.read(properties)
+            for offset in range(header_size, len(raw) - _FIXED_PROPERTY.size + 1, _FIXED_PROPERTY.size):
+                prop_type, prop_id, _flags, value = _FIXED_PROPERTY.unpack_from(raw, offset)
+                if prop_type == PT_LONG:
+                    self.fixed[prop_id] = struct.unpack_from('<i', value)[0]
+                elif prop_type == PT_BOOLEAN:
+                    self.fixed[prop_id] = bool(struct.unpack_from('<H', value)[0])
+
+    def _stream(self, prop_id, prop_type):
+        return self.children.get(f"__substg1.0_{prop_id:04X}{prop_type:04X}")
+
+    def string(self, prop_id):
+        entry = self._stream(prop_id, PT_UNICODE)
+        if entry:
+            return self._cfb.read(entry).decode('utf-16le', errors='replace').rstrip('\x00')
+        entry = self._stream(prop_id, PT_STRING8)
+        if entry:
+            return self._cfb.read(entry).decode(self.codepage, errors='replace').rstrip('\x00')
+        return ""
+
+    def binary(self, prop_id):
+        entry = self._stream(prop_id, PT_BINARY)
+        return self._cfb.read(entry) if entry else None
+
+    def has_object(self, prop_id):
+        return self._stream(prop_id, PT_OBJECT) is not None
+
+def _codepage_name(codepage):
+    if codepage == 65001:
+        return 'utf-8'
+    try:
+        name = f"cp{codepage}"
+        ''.encode(name)
+        return name
+    except (LookupError, TypeError):
+        return 'cp1252'
+
+def _sender_email(props):
+    """The sender's SMTP address; Exchange senders carry an X.500 DN in PR_SENDER_EMAIL_ADDRESS."""
+    for prop_id in (PR_SENDER_SMTP_ADDRESS, PR_SENT_REPRESENTING_SMTP_ADDRESS):
+        address = props.string(prop_id)
+        if '@' in address:
+            return address
+    for prop_id in (PR_SENDER_EMAIL_ADDRESS, PR_SENT_REPRESENTING_EMAIL_ADDRESS):
+        address = props.string(prop_id)
+        if '@' in address and not address.startswith('/'):
+            return address
+    headers = props.string(PR_TRANSPORT_MESSAGE_HEADERS)
+    match = re.search(r'^From:(.*(?:\r?\n[ \t].*)*)', headers, re.MULTILINE | re.IGNORECASE)
+    if match:
+        return email.utils.parseaddr(match.group(1).strip())[1]
+    return ""
+
+def read_msg(path):
+    """Read subject, sender and attachments from an Outlook .msg file without Outlook."""
+    try:
+        cfb = CompoundFile.open(path)
+    except CompoundFileError as e:
+        raise MsgError(f"{os.path.basename(path)} is not an Outlook message: {e}")
+
+    # The top-level property stream has a 32-byte header, attachments an 8-byte one
+    root = _PropertyStorage(cfb, None, 32)
+    codepage = root.fixed.get(PR_MESSAGE_CODEPAGE)
+    if codepage:
+        root.codepage = _codepage_name(codepage)
+
+    message = MsgMessage(
+        path=path,
+        subject=root.string(PR_SUBJECT),
+        sender_name=root.string(PR_SENDER_NAME),
+        sender_email=_sender_email(root),
+    )
+    storages = sorted(name for name in root.children if name.startswith(_ATTACHMENT_PREFIX))
+    for name in storages:
+        props = _PropertyStorage(cfb, root.children[name], 8, root.codepage)
+        method = props.fixed.get(PR_ATTACH_METHOD, ATTACH_BY_VALUE)
+        data = props.binary(PR_ATTACH_DATA)
+        file_name = (
+            props.string(PR_ATTACH_LONG_FILENAME) or props.string(PR_ATTACH_FILENAME)
+            or props.string(PR_DISPLAY_NAME)
+        )
+        message.attachments.append(MsgAttachment(
+            name=file_name,
+            # Embedded messages and OLE objects are storages, not file data
+            data=data if data is not None else b'',
+            mime_type=props.string(PR_ATTACH_MIME_TAG),
+            content_id=props.string(PR_ATTACH_CONTENT_ID),
+            hidden=props.fixed.get(PR_ATTACHMENT_HIDDEN, False),
+            method=method,
+        ))
+    return message
+
+def skip_reason(attachment, inline_image_max_bytes):
+    """Why an attachment is not a document worth saving, or None."""
+    if attachment.method != ATTACH_BY_VALUE or not attachment.name:
+        return "not an attached file"
+    extension = os.path.splitext(attachment.name)[1].lower()
+    if extension in INLINE_IMAGE_EXTENSIONS and (
+        attachment.hidden or attachment.size <= inline_image_max_bytes
+    ):
+        return "inline image"
+    return None
+
+_UNSAFE_NAME_CHARACTERS = re.compile(r'[\x00-\x1f<>:"/\\|?*]')
+
+def safe_file_name(name):
+    """A file name that is valid on Windows and Linux; directory parts are dropped."""
+    name = _UNSAFE_NAME_CHARACTERS.sub('_', os.path.basename(name.replace('\\', '/'))).strip(' .')
+    return name[:200] or "attachment"
+
+def save_attachments(message, directory, inline_image_max_bytes=64 * 1024, sanitize=None, unique_path=None):
+    """
+    Write a message's document attachments into directory.
+
+    Returns (saved paths, skipped descriptions). sanitize and unique_path default to
+    safe_file_name and name_index.reserve; the GUI passes FileOperations' so names match
+    its rules. Either way each name is released to the shared name index once written.
+    """
+    sanitize = sanitize or safe_file_name
+    unique_path = unique_path or name_index.reserve
+    saved = []
+    skipped = []
+    for attachment in message.attachments:
+        reason = skip_reason(attachment, inline_image_max_bytes)
+        if reason:
+            skipped.append(f"{attachment.name or 'unnamed'} ({reason})")
+            continue
+        path = unique_path(directory, sanitize(attachment.name))
+        try:
+            with open(path, 'wb') as f:
+                f.write(attachment.data)
+        except Exception:
+            name_index.release(path, written=False)
+            raise
+        name_index.release(path)
+        saved.append(path)
+    return saved, skipped
+
+@dataclass
+class IngestResult:
+    """Outcome of one .msg file in a bulk ingest."""
+    source: str
+    subject: str = ""
+    sender_email: str = ""
+    paths: list = field(default_factory=list)
+    skipped: list = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+def _ingest_one(path, directory, inline_image_max_bytes):
+    """Process-pool worker: one message into directory, which the parent reserved for it."""
+    result = IngestResult(path)
+    try:
+        message = read_msg(path)
+        result.subject = message.subject
+        result.sender_email = message.sender_email
+        os.makedirs(directory)
+        result.paths, result.skipped = save_attachments(message, directory, inline_image_max_bytes)
+    except Exception as e:
+        result.error = str(e)
+    return result
+
+def ingest_msg_files(paths, out_dir, max_workers=None, inline_image_max_bytes=64 * 1024):
+    """
+    Extract the attachments of many .msg files in parallel, each into its own folder.
+
+    Parsing is pure Python and CPU-bound, so messages are spread over worker
+    processes. Folder names are reserved here, not in the workers, whose name
+    indexes are not shared. Returns IngestResults aligned with paths.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    results = [None] * len(paths)
+    started = time.perf_counter()
+    directories = [
+        name_index.reserve(out_dir, safe_file_name(os.path.splitext(os.path.basename(path))[0]))
+        for path in paths
+    ]
+    max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+    try:
+        if max_workers == 1 or len(paths) < 2:
+            results = [
+                _ingest_one(path, directory, inline_image_max_bytes) for path, directory in zip(paths, directories)
+            ]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(_ingest_one, path, directory, inline_image_max_bytes): index
+                    for index, (path, directory) in enumerate(zip(paths, directories))
+                }
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+    finally:
+        for directory in directories:
+            name_index.release(directory, written=os.path.isdir(directory))
+    elapsed = time.perf_counter() - started
+    for result in results:
+        if not result.ok:
+            logging.error(f"Could not read {result.source}: {result.error}")
+    ok = sum(1 for r in results if r.ok)
+    logging.info(
+        f"Ingested {ok}/{len(paths)} messages in {elapsed:.1f}s "
+        f"({ok / elapsed if elapsed else 0.0:.1f} msg/s)"
+    )
+    return results
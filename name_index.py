@@ -0,0 +1,111 @@
+# name_index.py
+
+import os
+import time
+from collections import OrderedDict
+from threading import Lock
+
+class _DirectoryNameIndex:
+    """
+    The names in one directory, read with a single scandir and kept current by our own writes.
+
+    reserve() holds the name it hands out, so two threads never pick the same
+    one, and remembers the next free _N suffix per base name so a folder full of
+    duplicates is not probed one name at a time. Files created by someone else are
+    caught by one existence check on the chosen name, and the index is re-read after
+    max_age seconds. A reservation that is never released lapses after reservation_ttl.
+    """
+
+    def __init__(self, directory, max_age=60, reservation_ttl=600):
+        self.directory = directory
+        self.max_age = max_age
+        self.reservation_ttl = reservation_ttl
+        self.lock = Lock()
+        self.names = set()
+        self.reserved = {}  # name key -> time reserved
+        self.next_suffix = {}
+        self.loaded_at = None
+
+    @staticmethod
+    def key(name):
+        # Windows and macOS folders are case-insensitive
+        return os.path.normcase(name)
+
+    def _refresh(self):
+        if self.loaded_at is not None and time.monotonic() - self.loaded_at < self.max_age:
+            return
+        try:
+            with os.scandir(self.directory) as entries:
+                self.names = {self.key(entry.name) for entry in entries}
+        except FileNotFoundError:
+            self.names = set()
+        now = time.monotonic()
+        self.reserved = {key: at for key, at in self.reserved.items() if now - at < self.reservation_ttl}
+        self.names.update(self.reserved)
+        self.next_suffix = {}
+        self.loaded_at = now
+
+    def _taken(self, name):
+        key = self.key(name)
+        if key in self.names:
+            return True
+        if os.path.lexists(os.path.join(self.directory, name)):
+            self.names.add(key)
+            return True
+        return False
+
+    def reserve(self, filename):
+        with self.lock:
+            self._refresh()
+            if not self._taken(filename):
+                chosen = filename
+            else:
+                base_name, ext = os.path.splitext(filename)
+                suffix_key = self.key(filename)
+                counter = self.next_suffix.get(suffix_key, 1)
+                while self._taken(f"{base_name}_{counter}{ext}"):
+                    counter += 1
+                chosen = f"{base_name}_{counter}{ext}"
+                self.next_suffix[suffix_key] = counter + 1
+            self.names.add(self.key(chosen))
+            self.reserved[self.key(chosen)] = time.monotonic()
+            return chosen
+
+    def release(self, filename, written):
+        """End a reservation: the name stays taken if the file was written, otherwise it is free again."""
+        key = self.key(filename)
+        with self.lock:
+            self.reserved.pop(key, None)
+            if not written:
+                self.names.discard(key)
+                self.next_suffix.clear()
+
+_name_indexes = OrderedDict()
+_registry_lock = Lock()  # guards _name_indexes; each index has its own lock
+_MAX_NAME_INDEXES = 256
+
+def _name_index(directory):
+    key = os.path.normcase(os.path.abspath(directory))
+    with _registry_lock:
+        index = _name_indexes.get(key)
+        if index is None:
+            index = _name_indexes[key] = _DirectoryNameIndex(directory)
+            while len(_name_indexes) > _MAX_NAME_INDEXES:
+                # Staging folders are used once; forget the least recently used
+                _name_indexes.popitem(last=False)
+        else:
+            _name_indexes.move_to_end(key)
+        return index
+
+def reserve(directory, filename):
+    """
+    Reserve a free name in directory: filename, else filename with the next free _N suffix.
+
+    The name is held until release(path, written) or, for names that are written,
+    for good; other threads asking meanwhile get another. Returns the full path.
+    """
+    return os.path.join(directory, _name_index(directory).reserve(filename))
+
+def release(path, written=True):
+    """Commit (written=True) or give back a name handed out by reserve."""
+    _name_index(os.path.dirname(path)).release(os.path.basename(path), written)
@@ -0,0 +1,271 @@
+# office_pool.py
+
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Optional
+
+class OfficeUnavailableError(Exception):
+    """Raised when the pool cannot start a new application instance."""
+    pass
+
+class PoolExhaustedError(TimeoutError):
+    """Raised when no instance became free within the checkout timeout."""
+    pass
+
+class OfficeApplicationFactory:
+    """
+    Creates, checks and disposes of the application objects held by OfficeInstancePool.
+
+    The COM implementation drives Word/Excel; a fake in-process converter only needs
+    to implement these three methods to exercise the pool logic on any platform.
+    """
+
+    name = "Office"
+    # COM objects from DispatchEx belong to the apartment (thread) that created them
+    thread_affine = False
+
+    def create(self):
+        raise NotImplementedError
+
+    def is_healthy(self, app):
+        return True
+
+    def process_id(self, app):
+        """PID of the process behind app, so a watchdog can kill it if it hangs; None if unknown."""
+        return None
+
+    def shutdown(self, app):
+        pass
+
+class ComOfficeFactory(OfficeApplicationFactory):
+    """Starts isolated Office applications through COM (Windows only)."""
+
+    thread_affine = True
+
+    def __init__(self, prog_id, display_alerts=False, health_collection="Documents"):
+        self.name = prog_id
+        self.prog_id = prog_id
+        self.display_alerts = display_alerts
+        self.health_collection = health_collection
+
+    def create(self):
+        import pythoncom
+        import win32com.client
+
+        pythoncom.CoInitialize()
+        try:
+            app = win32com.client.DispatchEx(self.prog_id)
+            app.Visible = False
+            app.DisplayAlerts = self.display_alerts
+            return app
+        except Exception:
+            pythoncom.CoUninitialize()
+            raise
+
+    def is_healthy(self, app):
+        """A hung or crashed Office process fails even a trivial property read."""
+        try:
+            getattr(app, self.health_collection).Count
+            return True
+        except Exception as e:
+            logging.warning(f"{self.prog_id} instance failed health check: {e}")
+            return False
+
+    def process_id(self, app):
+        """Find the PID through the application's main window (Excel exposes Hwnd; Word needs its caption)."""
+        try:
+            import win32gui
+            import win32process
+
+            hwnd = getattr(app, 'Hwnd', None)
+            if not hwnd:
+                original = app.Caption
+                app.Caption = f"dochandler-{uuid.uuid4()}"
+                try:
+                    hwnd = win32gui.FindWindow('OpusApp', app.Caption)
+                finally:
+                    app.Caption = original
+            if hwnd:
+                return win32process.GetWindowThreadProcessId(hwnd)[1]
+        except Exception as e:
+            logging.warning(f"Could not find the process of {self.prog_id}: {e}")
+        return None
+
+    def shutdown(self, app):
+        import pythoncom
+
+        try:
+            app.Quit()
+        except Exception as e:
+            logging.warning(f"Failed to quit {self.prog_id}: {e}")
+        finally:
+            pythoncom.CoUninitialize()
+
+@dataclass
+class _PooledInstance:
+    app: object
+    thread_id: int
+    pid: Optional[int] = None
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    documents: int = 0
+    leased_documents: int = 0
+    broken: bool = False
+
+class OfficeInstancePool:
+    """
+    Keeps warm Office application objects so conversions skip the multi-second startup.
+
+    Instances are health-checked before checkout, recycled after max_documents or on
+    any error raised while checked out, and shut down once idle for idle_timeout
+    seconds. When max_size instances are busy, checkout waits up to checkout_timeout.
+    For thread-affine (COM) factories max_size applies per thread, since an instance
+    can only be used and quit by the thread that started it.
+    """
+
+    def __init__(self, factory, max_size=2, max_documents=50, idle_timeout=300, checkout_timeout=60):
+        self.factory = factory
+        self.max_size = max_size
+        self.max_documents = max_documents
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self._condition = threading.Condition()
+        self._idle = []
+        self._busy = {}
+        self._starting = 0
+        self.stats = {'created': 0, 'reused': 0, 'recycled': 0, 'unhealthy': 0, 'timeouts': 0}
+
+    @contextmanager
+    def checkout(self):
+        """Lease an application object; an exception inside the block retires the instance."""
+        instance = self._acquire()
+        try:
+            yield instance.app
+        except BaseException:
+            instance.broken = True
+            raise
+        finally:
+            self._release(instance)
+
+    def record_document(self, app, count=1):
+        """Count documents converted under one lease so batch work is recycled on schedule too."""
+        with self._condition:
+            instance = self._busy.get(id(app))
+            if instance:
+                instance.documents += count
+                instance.leased_documents += count
+
+    def process_id(self, app):
+        """PID of a checked-out application object, if the factory could determine it."""
+        with self._condition:
+            instance = self._busy.get(id(app))
+            return instance.pid if instance else None
+
+    def _usable(self, instance):
+        return not self.factory.thread_affine or instance.thread_id == threading.get_ident()
+
+    def _acquire(self):
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            self.reap_idle()
+            with self._condition:
+                instance = next((i for i in reversed(self._idle) if self._usable(i)), None)
+                if instance:
+                    self._idle.remove(instance)
+                    self._busy[id(instance.app)] = instance
+                elif self._size() < self.max_size:
+                    self._starting += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats['timeouts'] += 1
+                        raise PoolExhaustedError(
+                            f"No {self.factory.name} instance became free within {self.checkout_timeout}s"
+                        )
+                    self._condition.wait(remaining)
+                    continue
+
+            if instance:
+                if self.factory.is_healthy(instance.app):
+                    self.stats['reused'] += 1
+                    instance.leased_documents = 0
+                    return instance
+                self.stats['unhealthy'] += 1
+                with self._condition:
+                    self._busy.pop(id(instance.app), None)
+                self._retire(instance)
+                continue
+            return self._start_instance()
+
+    def _start_instance(self):
+        try:
+            app = self.factory.create()
+        except Exception as e:
+            logging.error(f"Could not start {self.factory.name}: {e}", exc_info=True)
+            raise OfficeUnavailableError(f"Could not start {self.factory.name}: {e}")
+        finally:
+            with self._condition:
+                self._starting -= 1
+                self._condition.notify()
+
+        instance = _PooledInstance(app, threading.get_ident(), pid=self.factory.process_id(app))
+        with self._condition:
+            self._busy[id(app)] = instance
+        self.stats['created'] += 1
+        logging.info(f"Started pooled {self.factory.name} instance ({self._size()} in pool)")
+        return instance
+
+    def _release(self, instance):
+        if not instance.leased_documents:
+            instance.documents += 1
+        instance.last_used = time.monotonic()
+        with self._condition:
+            self._busy.pop(id(instance.app), None)
+
+        if instance.broken or instance.documents >= self.max_documents:
+            self.stats['recycled'] += 1
+            reason = "after an error" if instance.broken else f"after {instance.documents} documents"
+            logging.info(f"Recycling {self.factory.name} instance {reason}")
+            self._retire(instance)
+            return
+
+        with self._condition:
+            self._idle.append(instance)
+            self._condition.notify()
+
+    def _retire(self, instance):
+        try:
+            self.factory.shutdown(instance.app)
+        except Exception as e:
+            logging.warning(f"Error shutting down {self.factory.name} instance: {e}")
+        with self._condition:
+            self._condition.notify()
+
+    def _size(self):
+        """Instances counted against max_size; thread-affine instances are limited per owning thread."""
+        instances = self._idle + list(self._busy.values())
+        return sum(1 for i in instances if self._usable(i)) + self._starting
+
+    def reap_idle(self, max_idle=None):
+        """Shut down instances idle longer than max_idle (default idle_timeout) that this thread may touch."""
+        max_idle = self.idle_timeout if max_idle is None else max_idle
+        now = time.monotonic()
+        with self._condition:
+            expired = [
+                i for i in self._idle
+                if self._usable(i) and now - i.last_used >= max_idle
+            ]
+            for instance in expired:
+                self._idle.remove(instance)
+        for instance in expired:
+            logging.info(f"Shutting down idle {self.factory.name} instance")
+            self._retire(instance)
+        return len(expired)
+
+    def shutdown(self):
+        """Shut down every idle instance this thread owns."""
+        return self.reap_idle(max_idle=0)
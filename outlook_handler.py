@@ -1,161 +1,345 @@
-import win32com.client
-import pythoncom
 import tempfile
-from io import BytesIO
 import logging
 import os
-from contextlib import contextmanager
 from config import CONFIG
+from outlook_session import shared_session
+from filegroup_descriptor import (
+    DESCRIPTOR_FORMATS, FD_FILESIZE, file_contents_format, parse_file_group_descriptor
+)
+from msg_reader import INLINE_IMAGE_EXTENSIONS, read_msg, save_attachments
+import content_sniffer
 from PyQt6.QtCore import Qt, QByteArray, QThread, pyqtSignal
 import time
+from dataclasses import dataclass, field
+
+OLE_OBJECT_FORMAT = "application/x-qt-windows-mime;value=\"Ole Object\""
+OUTLOOK_DROP_FORMATS = (OLE_OBJECT_FORMAT, "FileContents") + tuple(fmt for fmt, _ in DESCRIPTOR_FORMATS)
+
+OL_BY_VALUE = 1  # Attachment.Type of an ordinary attached file
+
+@dataclass
+class AttachmentBatch:
+    """Every file saved from one Outlook drop, with the email details they share for naming."""
+    directory: str
+    paths: list = field(default_factory=list)
+    subject: str = ""
+    sender: str = ""
+    skipped: list = field(default_factory=list)
+
+class OutlookDrop:
+    """
+    The Outlook formats of a drop, copied out of QMimeData.
+
+    QMimeData belongs to the GUI thread and is only valid during the drop event, so
+    the payload is snapshotted there and the snapshot is handed to the worker.
+    """
+
+    def __init__(self, formats):
+        self.formats = formats
+
+    @classmethod
+    def from_mime(cls, mime_data):
+        formats = {}
+        for fmt in OUTLOOK_DROP_FORMATS:
+            if mime_data.hasFormat(fmt):
+                # A memoryview over the QByteArray copy Qt hands back, not another copy of it
+                formats[fmt] = memoryview(mime_data.data(fmt))
+        drop = cls(formats)
+        # Each described file has its own FileContents stream, requested by index
+        for descriptor in drop.descriptors():
+            fmt = file_contents_format(descriptor.index)
+            contents = mime_data.data(fmt)
+            if len(contents):
+                formats[fmt] = memoryview(contents)
+        return drop
+
+    def hasFormat(self, fmt):
+        return fmt in self.formats
+
+    def data(self, fmt):
+        return self.formats.get(fmt, b"")
+
+    def has_file_contents(self):
+        return any(fmt in self.formats for fmt, _ in DESCRIPTOR_FORMATS) and (
+            "FileContents" in self.formats or file_contents_format(0) in self.formats
+        )
+
+    def descriptors(self):
+        """Parsed entries of the drop's FILEGROUPDESCRIPTOR, preferring the Unicode variant."""
+        for fmt, unicode in DESCRIPTOR_FORMATS:
+            if fmt in self.formats:
+                return parse_file_group_descriptor(self.formats[fmt], unicode)
+        return []
+
+    def file_contents(self, index):
+        """The bytes of the index-th described file; a plain FileContents format serves index 0."""
+        contents = self.formats.get(file_contents_format(index))
+        if contents is None and index == 0:
+            contents = self.formats.get("FileContents")
+        return contents
 
 class OutlookWorker(QThread):
-    finished = pyqtSignal(str)  # Signal for successfully processed file
+    finished = pyqtSignal(object)  # AttachmentBatch of the saved files
     error = pyqtSignal(str)     # Signal for any errors
 
-    def __init__(self, mime_data, file_ops, pdf_ops, resource_manager=None):
+    def __init__(self, mime_data, file_ops, pdf_ops, resource_manager=None, session=None, save_dir=None):
         super().__init__()
         self.mime_data = mime_data
         self.file_ops = file_ops
         self.pdf_ops = pdf_ops
         self.resource_manager = resource_manager
+        self.session = session
+        self.save_dir = save_dir
 
     def run(self):
         """Run Outlook processing in a separate thread."""
         try:
-            handler = OutlookHandler(self.file_ops, self.pdf_ops, self.resource_manager)
-            temp_file_path = handler.get_outlook_item(self.mime_data)
-            if temp_file_path:
-                self.finished.emit(temp_file_path)
+            handler = OutlookHandler(self.file_ops, self.pdf_ops, self.resource_manager, self.session)
+            batch = handler.get_outlook_items(self.mime_data, self.save_dir)
+            if batch.paths:
+                self.finished.emit(batch)
             else:
                 self.error.emit("Failed to process Outlook item")
         except Exception as e:
             self.error.emit(str(e))
 
+class MsgFileWorker(QThread):
+    """Extracts saved .msg files off the GUI thread; no Outlook needed."""
+    finished = pyqtSignal(object)  # AttachmentBatch, once per message
+    error = pyqtSignal(str)
 
-class OutlookHandler:
-    def __init__(self, file_ops, pdf_ops, resource_manager=None):
+    def __init__(self, paths, file_ops, pdf_ops, resource_manager=None, save_dir=None):
+        super().__init__()
+        self.paths = list(paths)
         self.file_ops = file_ops
         self.pdf_ops = pdf_ops
         self.resource_manager = resource_manager
+        self.save_dir = save_dir
 
-    @contextmanager
-    def get_outlook_instance(self):
-        """Create and manage an Outlook instance."""
-        pythoncom.CoInitialize()
-        try:
-            outlook = win32com.client.DispatchEx('Outlook.Application')
-            mapi = outlook.GetNamespace("MAPI")
-            # Test connection to ensure Outlook is responsive
-            mapi.GetDefaultFolder(6)  # 6 = olFolderInbox
-            yield mapi
-        except pythoncom.com_error as e:
-            logging.error(f"COM Error creating Outlook instance: {e}")
-            raise ValueError("Unable to connect to Outlook - COM error")
-        except Exception as e:
-            logging.error(f"Error creating Outlook instance: {e}")
-            raise ValueError("Unable to connect to Outlook")
-        finally:
+    def run(self):
+        # Reading .msg files never submits to the Outlook session, so Outlook is not started
+        handler = OutlookHandler(self.file_ops, self.pdf_ops, self.resource_manager)
+        for path in self.paths:
             try:
-                outlook = None
-                pythoncom.CoUninitialize()
-            except:
-                pass
+                self.finished.emit(handler.get_msg_file_items(path, self.save_dir))
+            except Exception as e:
+                self.error.emit(str(e))
+
+
+class OutlookHandler:
+    def __init__(self, file_ops, pdf_ops, resource_manager=None, session=None, request_timeout=120,
+                 inline_image_max_bytes=None):
+        self.file_ops = file_ops
+        self.pdf_ops = pdf_ops
+        self.resource_manager = resource_manager
+        # One long-lived MAPI connection shared by every drop instead of one per drop
+        self.session = session or shared_session()
+        self.request_timeout = request_timeout
+        self.inline_image_max_bytes = (
+            CONFIG['OUTLOOK_INLINE_IMAGE_MAX_BYTES'] if inline_image_max_bytes is None else inline_image_max_bytes
+        )
 
     def get_outlook_item(self, mime_data):
+        """Save the dropped Outlook item and return the first file; see get_outlook_items."""
+        return self.get_outlook_items(mime_data).paths[0]
+
+    def get_outlook_items(self, mime_data, save_dir=None):
+        """
+        Save every file of a dropped Outlook item into a fresh folder of its own.
+
+        With save_dir the folder is a staging folder inside the destination, so saving a
+        file later is a rename instead of another copy; otherwise it is a temporary folder.
+        mime_data may be QMimeData or an OutlookDrop. Returns an AttachmentBatch.
+        """
         if not self.resource_manager:
             raise RuntimeError("ResourceManager not initialized")
 
+        directory = None
         try:
-            # Create temp directory if it doesn't exist
-            temp_dir = tempfile.gettempdir()
-            if not os.path.exists(temp_dir):
-                os.makedirs(temp_dir)
-
-            if mime_data.hasFormat("application/x-qt-windows-mime;value=\"Ole Object\""):
-                return self._handle_ole_object(mime_data)
-            elif mime_data.hasFormat("FileGroupDescriptor") and mime_data.hasFormat("FileContents"):
-                return self._handle_file_content(mime_data)
+            drop = mime_data if isinstance(mime_data, OutlookDrop) else OutlookDrop.from_mime(mime_data)
+
+            # One folder per drop, so attachments keep their own names without colliding
+            directory = self._create_batch_directory(save_dir)
+
+            if drop.hasFormat(OLE_OBJECT_FORMAT):
+                return self._handle_ole_object(drop, directory)
+            elif drop.has_file_contents():
+                return self._handle_file_content(drop, directory)
             else:
                 raise ValueError("Unsupported Outlook item format")
         except Exception as e:
             logging.error(f"Error processing Outlook item: {str(e)}", exc_info=True)
+            if directory and save_dir:
+                # Don't leave half-written files in the user's folder
+                self.file_ops.discard_partial_directory(directory)
             raise ValueError(f"Failed to process Outlook attachment: {str(e)}")
 
+    def get_msg_file_items(self, path, save_dir=None):
+        """
+        Save the attachments of an Outlook .msg file read straight from disk.
 
+        Like get_outlook_items, but the message is parsed by msg_reader, so it works
+        without Outlook and on any platform. Returns an AttachmentBatch.
+        """
+        directory = None
+        try:
+            directory = self._create_batch_directory(save_dir)
+            batch = AttachmentBatch(directory=directory)
+            self._expand_msg(path, batch)
+            if not batch.paths:
+                raise ValueError("No valid attachments found")
+            return batch
+        except Exception as e:
+            logging.error(f"Error processing message file {path}: {str(e)}", exc_info=True)
+            if directory and save_dir:
+                self.file_ops.discard_partial_directory(directory)
+            raise ValueError(f"Failed to process {os.path.basename(path)}: {str(e)}")
+
+    def _create_batch_directory(self, save_dir):
+        if save_dir:
+            return self.file_ops.create_partial_directory(save_dir)
+        directory = tempfile.mkdtemp(prefix="dochandler_outlook_")
+        register = getattr(self.resource_manager, 'register_temp_directory', None)
+        if register:
+            register(directory)
+        return directory
+
+    def _expand_msg(self, path, batch):
+        """Add a .msg file's attachments to the batch, saved next to it in batch.directory."""
+        message = read_msg(path)
+        paths, skipped = save_attachments(
+            message,
+            batch.directory,
+            self.inline_image_max_bytes,
+            sanitize=self.file_ops.sanitize_filename,
+            unique_path=self.file_ops.get_unique_filename,
+        )
+        batch.paths.extend(paths)
+        batch.skipped.extend(skipped)
+        batch.subject = batch.subject or message.subject
+        batch.sender = batch.sender or message.sender_email
+        for skipped_attachment in skipped:
+            logging.info(f"Skipped attachment {skipped_attachment}")
+        logging.info(f"Read {len(paths)} attachment(s) from '{message.subject}' without Outlook")
 
-    def _handle_ole_object(self, mime_data):
+    def _handle_ole_object(self, drop, directory):
         """Handle item dragged directly from Outlook."""
-        with self.get_outlook_instance() as outlook:
-            ole_data = mime_data.data("application/x-qt-windows-mime;value=\"Ole Object\"")
-            if not ole_data:
-                raise ValueError("Empty OLE object data")
-
-            # Handle QByteArray properly
-            if isinstance(ole_data, QByteArray):
-                ole_bytes = ole_data.data()
-            else:
-                ole_bytes = ole_data
+        ole_bytes = drop.data(OLE_OBJECT_FORMAT)
+        if not ole_bytes:
+            raise ValueError("Empty OLE object data")
+
+        try:
+            # Try decoding with null termination handling; the snapshot holds a memoryview
+            entry_id = bytes(ole_bytes).decode('utf-16le').split('\x00')[0]
+            batch = self.session.call(self._save_attachments, entry_id, directory, timeout=self.request_timeout)
+        except Exception as e:
+            logging.error(f"Error handling OLE object: {str(e)}")
+            raise ValueError(f"Failed to process Outlook attachment: {str(e)}")
+
+        for skipped in batch.skipped:
+            logging.info(f"Skipped attachment {skipped}")
+        logging.info(f"Saved {len(batch.paths)} attachment(s) from '{batch.subject}'")
+        return batch
+
+    def _save_attachments(self, namespace, entry_id, directory):
+        """Runs on the Outlook session thread: one request saves the whole email."""
+        item = namespace.GetItemFromID(entry_id)
 
+        if not item or not hasattr(item, 'Attachments') or item.Attachments.Count == 0:
+            raise ValueError("No valid attachments found")
+
+        batch = AttachmentBatch(
+            directory=directory,
+            subject=getattr(item, 'Subject', '') or '',
+            sender=self._sender_address(item),
+        )
+        attachments = item.Attachments
+        for index in range(1, attachments.Count + 1):
+            attachment = attachments.Item(index)
+            reason = self._skip_reason(attachment)
+            if reason:
+                batch.skipped.append(f"{attachment.FileName} ({reason})")
+                continue
+            save_path = self.file_ops.get_unique_filename(directory, self.file_ops.sanitize_filename(attachment.FileName))
             try:
-                # Try decoding with null termination handling
-                entry_id = ole_bytes.decode('utf-16le').split('\x00')[0]
-                item = outlook.GetItemFromID(entry_id)
-                
-                if not item or not hasattr(item, 'Attachments') or item.Attachments.Count == 0:
-                    raise ValueError("No valid attachments found")
-
-                attachment = item.Attachments.Item(1)
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".tmp") as temp_file:
-                    temp_file.write(attachment.Content)
-                    return temp_file.name
+                # SaveAsFile streams straight to disk instead of pulling the content through COM
+                attachment.SaveAsFile(save_path)
+            except Exception:
+                self.file_ops.release_filename(save_path, written=False)
+                raise
+            self.file_ops.release_filename(save_path)
+            batch.paths.append(save_path)
+
+        if not batch.paths:
+            raise ValueError("No valid attachments found")
+        return batch
 
+    def _sender_address(self, item):
+        """The sender's SMTP address; Exchange senders otherwise only have an X.500 path."""
+        address = getattr(item, 'SenderEmailAddress', '') or ''
+        if getattr(item, 'SenderEmailType', 'SMTP') == 'EX':
+            try:
+                address = item.Sender.GetExchangeUser().PrimarySmtpAddress or address
             except Exception as e:
-                logging.error(f"Error handling OLE object: {str(e)}")
-                raise ValueError(f"Failed to process Outlook attachment: {str(e)}")
+                logging.debug(f"No SMTP address for Exchange sender {address}: {e}")
+        return address
 
+    def _skip_reason(self, attachment):
+        """Why an attachment is not a document worth saving, or None."""
+        if getattr(attachment, 'Type', OL_BY_VALUE) != OL_BY_VALUE:
+            return "not an attached file"
+        extension = os.path.splitext(attachment.FileName)[1].lower()
+        if extension in INLINE_IMAGE_EXTENSIONS and attachment.Size <= self.inline_image_max_bytes:
+            return "inline image"
+        return None
 
 
-    def _handle_file_content(self, mime_data):
-        """Handle file content data."""
-        contents = mime_data.data("FileContents")
-        descriptor = mime_data.data("FileGroupDescriptor")
-        
-        if not contents or not descriptor:
-            raise ValueError("Missing file data")
 
-        try:
-            filename = self._extract_filename_from_descriptor(descriptor)
-            content_data = contents.data()
-            
-            # Create a non-temporary file path that won't be deleted
-            temp_dir = tempfile.gettempdir()
-            temp_path = os.path.join(temp_dir, filename or f"document_{int(time.time())}.pdf")
-            
-            with open(temp_path, 'wb') as f:
-                f.write(content_data)
-            
-            return temp_path
+    def _handle_file_content(self, drop, directory):
+        """Save every file described by the drop's FILEGROUPDESCRIPTOR from its FileContents stream."""
+        descriptors = drop.descriptors()
+        if not descriptors:
+            raise ValueError("Missing file data")
 
-        except Exception as e:
-            logging.error(f"Error saving file content: {str(e)}")
-            raise
-
-    def _extract_filename_from_descriptor(self, descriptor):
-        """Extract filename from descriptor data."""
-        desc_data = descriptor.data()
-        
-        for encoding in ['utf-16le', 'utf-8', 'ascii']:
-            try:
-                text = desc_data.decode(encoding)
-                parts = text.split('\x00')
-                for part in parts:
-                    if part.lower().endswith(('.pdf', '.doc', '.docx')):
-                        return self.file_ops.sanitize_filename(part)
-            except:
+        batch = AttachmentBatch(directory=directory)
+        for descriptor in descriptors:
+            contents = drop.file_contents(descriptor.index)
+            if not contents:
+                batch.skipped.append(f"{descriptor.name} (no contents)")
                 continue
-        
-        return None
+            try:
+                contents = memoryview(contents)
+                if descriptor.flags & FD_FILESIZE and descriptor.size < len(contents):
+                    # Clipboard memory blocks can be rounded up past the end of the file
+                    contents = contents[:descriptor.size]
+                file_name = self.file_ops.sanitize_filename(
+                    descriptor.name or f"document_{int(time.time())}_{descriptor.index}.pdf"
+                )
+                save_path = self.file_ops.get_unique_filename(directory, file_name)
+                try:
+                    with open(save_path, 'wb') as f:
+                        f.write(contents)
+                except Exception:
+                    self.file_ops.release_filename(save_path, written=False)
+                    raise
+                self.file_ops.release_filename(save_path)
+                if descriptor.modified:
+                    timestamp = descriptor.modified.timestamp()
+                    os.utime(save_path, (timestamp, timestamp))
+                if content_sniffer.sniff(save_path).kind == 'msg':
+                    # A whole email dragged out of Outlook arrives as a .msg: take its attachments instead
+                    self._expand_msg(save_path, batch)
+                    os.remove(save_path)
+                else:
+                    batch.paths.append(save_path)
+
+            except Exception as e:
+                logging.error(f"Error saving file content: {str(e)}")
+                raise
+
+        for skipped in batch.skipped:
+            logging.info(f"Skipped dropped file {skipped}")
+        return batch
 
 
     def is_email(self, outlook_item):
@@ -179,7 +363,12 @@ class OutlookHandler:
 
             # Save file
             save_path = self.file_ops.get_unique_filename(save_dir, file_name)
-            attachment.SaveAsFile(save_path)
+            try:
+                attachment.SaveAsFile(save_path)
+            except Exception:
+                self.file_ops.release_filename(save_path, written=False)
+                raise
+            self.file_ops.release_filename(save_path)
             logging.info(f"Saved attachment: {save_path}")
 
             # Convert Word to PDF if needed
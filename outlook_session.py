@@ -0,0 +1,202 @@
+# outlook_session.py
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+class OutlookUnavailableError(Exception):
+    """Raised when no MAPI session could be opened."""
+    pass
+
+class OutlookBackend:
+    """
+    Opens, checks and closes the MAPI namespace used by OutlookSession.
+
+    All three methods are called on the session thread only. The COM implementation
+    talks to Outlook; the tests' FakeOutlookBackend serves in-memory items so the session
+    and the extraction code can be exercised on any platform.
+    """
+
+    name = "Outlook"
+
+    def connect(self):
+        raise NotImplementedError
+
+    def is_healthy(self, namespace):
+        return True
+
+    def disconnect(self, namespace):
+        pass
+
+class ComOutlookBackend(OutlookBackend):
+    """Connects to Outlook through COM (Windows only)."""
+
+    def __init__(self):
+        self._outlook = None
+
+    def connect(self):
+        import pythoncom
+        import win32com.client
+
+        pythoncom.CoInitialize()
+        try:
+            self._outlook = win32com.client.DispatchEx('Outlook.Application')
+            namespace = self._outlook.GetNamespace("MAPI")
+            # Test connection to ensure Outlook is responsive
+            namespace.GetDefaultFolder(6)  # 6 = olFolderInbox
+            return namespace
+        except Exception:
+            self._outlook = None
+            pythoncom.CoUninitialize()
+            raise
+
+    def is_healthy(self, namespace):
+        """A closed or restarted Outlook fails even a trivial folder lookup."""
+        try:
+            namespace.GetDefaultFolder(6)
+            return True
+        except Exception as e:
+            logging.warning(f"Outlook session failed health check: {e}")
+            return False
+
+    def disconnect(self, namespace):
+        import pythoncom
+
+        # Release our references only; quitting would close the user's Outlook window
+        self._outlook = None
+        pythoncom.CoUninitialize()
+
+_STOP = object()
+
+class OutlookSession:
+    """
+    Owns one MAPI namespace on a dedicated thread and runs extraction requests against it.
+
+    Connecting to Outlook costs a COM apartment, an out-of-process launch and a
+    round-trip probe, so the namespace is opened on the first request and reused.
+    Requests are queued and run one at a time on the session thread (the namespace
+    belongs to that thread's apartment). When a request fails and the namespace no
+    longer answers a health check, the session reconnects and retries it once. After
+    idle_timeout seconds without requests the namespace is closed and the thread
+    exits; the next request starts it again.
+    """
+
+    def __init__(self, backend=None, idle_timeout=600, connect_attempts=3, retry_delay=1.0):
+        self.backend = backend or ComOutlookBackend()
+        self.idle_timeout = idle_timeout
+        self.connect_attempts = connect_attempts
+        self.retry_delay = retry_delay
+        self._requests = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._namespace = None
+        self.stats = {'requests': 0, 'connects': 0, 'reconnects': 0, 'idle_shutdowns': 0, 'failures': 0}
+
+    @property
+    def connected(self):
+        return self._namespace is not None
+
+    def submit(self, func, *args, **kwargs):
+        """Queue func(namespace, *args, **kwargs) for the session thread; returns a Future."""
+        future = Future()
+        with self._lock:
+            self._requests.put((func, args, kwargs, future))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="outlook-session", daemon=True)
+                self._thread.start()
+        return future
+
+    def call(self, func, *args, timeout=None, **kwargs):
+        """Run func(namespace, ...) on the session thread and wait for its result."""
+        return self.submit(func, *args, **kwargs).result(timeout=timeout)
+
+    def _run(self):
+        while True:
+            try:
+                request = self._requests.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                request = None
+            if request is not None and request is not _STOP:
+                self._serve(*request)
+                continue
+            with self._lock:
+                # A request queued while we were timing out or stopping keeps the thread alive
+                if not self._requests.empty():
+                    continue
+                if request is None and self._namespace is not None:
+                    self.stats['idle_shutdowns'] += 1
+                    logging.info(f"Closing idle {self.backend.name} session")
+                self._disconnect()
+                self._thread = None
+                return
+
+    def _serve(self, func, args, kwargs, future):
+        if not future.set_running_or_notify_cancel():
+            return
+        self.stats['requests'] += 1
+        try:
+            result = self._execute(func, args, kwargs)
+        except Exception as e:
+            self.stats['failures'] += 1
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    def _execute(self, func, args, kwargs):
+        namespace = self._ensure_connected()
+        try:
+            return func(namespace, *args, **kwargs)
+        except Exception as e:
+            if self.backend.is_healthy(namespace):
+                raise
+            logging.warning(f"{self.backend.name} session was lost ({e}); reconnecting")
+            self.stats['reconnects'] += 1
+            self._disconnect()
+        return func(self._ensure_connected(), *args, **kwargs)
+
+    def _ensure_connected(self):
+        if self._namespace is not None:
+            return self._namespace
+        for attempt in range(self.connect_attempts):
+            try:
+                self._namespace = self.backend.connect()
+                self.stats['connects'] += 1
+                logging.info(f"Opened {self.backend.name} session")
+                return self._namespace
+            except Exception as e:
+                logging.warning(f"Attempt {attempt + 1} to connect to {self.backend.name} failed: {e}")
+                if attempt == self.connect_attempts - 1:
+                    raise OutlookUnavailableError(f"Unable to connect to {self.backend.name}: {e}") from e
+                time.sleep(self.retry_delay * (2 ** attempt))
+
+    def _disconnect(self):
+        namespace, self._namespace = self._namespace, None
+        if namespace is None:
+            return
+        try:
+            self.backend.disconnect(namespace)
+        except Exception as e:
+            logging.warning(f"Error closing {self.backend.name} session: {e}")
+
+    def stop(self, timeout=10):
+        """Close the namespace and end the session thread; queued requests still run first."""
+        with self._lock:
+            thread = self._thread
+            if thread is None or not thread.is_alive():
+                return
+            self._requests.put(_STOP)
+        thread.join(timeout=timeout)
+
+_shared_session = None
+_shared_lock = threading.Lock()
+
+def shared_session():
+    """The process-wide Outlook session used when a handler isn't given its own."""
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is None:
+            from config import CONFIG
+            _shared_session = OutlookSession(idle_timeout=CONFIG['OUTLOOK_SESSION_IDLE_SECONDS'])
+        return _shared_session
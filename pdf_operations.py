@@ -10,55 +10,160 @@ from PIL import Image
 import fitz  # PyMuPDF
 import pytesseract
 from urllib.parse import unquote
-import win32com.client
-import pythoncom
 import tempfile
 from io import BytesIO
 import time
 from PyQt6.QtWidgets import QApplication, QLineEdit
 from PyQt6.QtGui import QCursor
 from PyQt6.QtCore import Qt
-from contextlib import contextmanager
+from contextlib import contextmanager, nullcontext
 from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
 import shutil
+import threading
+from background_processor import TaskCancelledError, initialize_sta
+from office_pool import OfficeInstancePool, ComOfficeFactory, OfficeUnavailableError
+from converter_backends import BackendSelector, default_backends
+from conversion_cache import ConversionCache
+from conversion_profiles import get_profile
+from conversion_watchdog import ConversionWatchdog
+from image_to_pdf import images_to_pdf
+import content_sniffer
+from content_sniffer import IMAGE_KINDS, OFFICE_KINDS
+from config import CONFIG
+
+@dataclass
+class ConversionResult:
+    """Outcome of one document in a convert_many batch."""
+    source: str
+    pdf_path: Optional[str] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self):
+        return self.pdf_path is not None and self.error is None
 
 class PDFOperations:
-    def __init__(self, file_ops, resource_manager=None):
+    def __init__(self, file_ops, resource_manager=None, word_pool=None, excel_pool=None, converters=None,
+                 profile=None):
         self.file_ops = file_ops
+        # The one PDFOperations per process: FileOperations uses it rather than building a second
+        file_ops.use_pdf_ops(self)
         self.resource_manager = resource_manager
+        # Export settings ("fast", "balanced" or "archival") applied by every backend
+        self.profile = get_profile(profile or CONFIG['CONVERSION_PROFILE'])
+        # Warm Office instances shared by every conversion; started lazily on first use
+        self.word_pool = word_pool or OfficeInstancePool(
+            ComOfficeFactory('Word.Application', display_alerts=0, health_collection='Documents')
+        )
+        self.excel_pool = excel_pool or OfficeInstancePool(
+            ComOfficeFactory('Excel.Application', display_alerts=False, health_collection='Workbooks')
+        )
+        # Office COM, LibreOffice or pure Python, whichever is fastest at the configured fidelity
+        self.converters = converters or BackendSelector(
+            default_backends(self.word_pool, self.excel_pool, CONFIG['LIBREOFFICE_PROFILE_DIR']),
+            fidelity=CONFIG['CONVERSION_FIDELITY'],
+            cache_path=CONFIG['CONVERTER_BENCHMARK_PATH'],
+            cache=self._open_conversion_cache(),
+            watchdog=ConversionWatchdog(
+                deadline=CONFIG['CONVERSION_DEADLINE_SECONDS'],
+                max_failures=CONFIG['QUARANTINE_AFTER_FAILURES'],
+                quarantine_path=CONFIG['QUARANTINE_PATH']
+            )
+        )
+        # STA threads that export a parallel batch's extra chunks; each keeps its Office instance between batches
+        self._export_workers = []
+        self._export_workers_lock = threading.Lock()
         pytesseract.pytesseract.tesseract_cmd = r'C:\Users\Burness\AppData\Local\Programs\Tesseract-OCR\tesseract.exe'
 
     @contextmanager
     def get_word_instance(self):
-        """Create an isolated Word instance for conversion."""
-        pythoncom.CoInitialize()
-        word_app = None
+        """Check out a warm Word instance from the pool for conversion."""
         try:
-            word_app = win32com.client.DispatchEx('Word.Application')
-            word_app.Visible = False
-            word_app.DisplayAlerts = 0
-            yield word_app
-        except Exception as e:
+            with self.word_pool.checkout() as word_app:
+                yield word_app
+        except OfficeUnavailableError as e:
             logging.error(f"Error creating Word instance: {str(e)}", exc_info=True)
             raise Exception("Microsoft Word is required for document conversion. Please ensure Word is installed.")
-        finally:
-            if word_app:
-                try:
-                    word_app.Quit()
-                except:
-                    pass
-            pythoncom.CoUninitialize()
 
-    def extract_text_from_image_pdf(self, pdf_path):
-        """Extract text from image-based PDFs using OCR."""
-        if not self.resource_manager:
-            raise RuntimeError("ResourceManager not initialized")
+    def reap_idle_office_instances(self):
+        """
+        Shut down pooled Office instances owned by the calling thread that have sat idle too long.
+
+        Each export worker is asked to reap its own instances too, since only the thread
+        that started a COM instance may quit it.
+        """
+        with self._export_workers_lock:
+            for worker in self._export_workers:
+                worker.submit(self._reap_own_office_instances)
+        return self._reap_own_office_instances()
+
+    def _reap_own_office_instances(self):
+        return self.word_pool.reap_idle() + self.excel_pool.reap_idle()
+
+    def shutdown_office_instances(self):
+        """Quit every idle pooled Office instance owned by the calling thread, then stop the export workers."""
+        with self._export_workers_lock:
+            workers, self._export_workers = self._export_workers, []
+        for worker in workers:
+            worker.submit(self._shutdown_own_office_instances)
+            worker.shutdown(wait=True)
+        return self._shutdown_own_office_instances()
+
+    def _shutdown_own_office_instances(self):
+        return self.word_pool.shutdown() + self.excel_pool.shutdown()
+
+    def _start_export_workers(self, count):
+        """count long-lived STA threads for parallel Office exports, started on first use."""
+        with self._export_workers_lock:
+            while len(self._export_workers) < count:
+                self._export_workers.append(ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix=f"convert-sta-{len(self._export_workers)}",
+                    initializer=initialize_sta
+                ))
+            return self._export_workers[:count]
+
+    @staticmethod
+    def _open_conversion_cache():
+        try:
+            return ConversionCache(CONFIG['CONVERSION_CACHE_DIR'], CONFIG['CONVERSION_CACHE_MAX_BYTES'])
+        except Exception as e:
+            logging.error(f"Conversion cache unavailable, every conversion will run the converter: {e}")
+            return None
 
-        with self.resource_manager.busy_cursor():
+    def close_converters(self):
+        """Stop converter processes (e.g. the LibreOffice listener) kept running between conversions."""
+        self.converters.close()
+        if self.converters.watchdog:
+            stats = self.converters.watchdog.stats
+            logging.info(
+                f"Conversion watchdog: {stats['timeouts']} timeouts, {stats['kills']} processes killed, "
+                f"{stats['refused']} quarantined documents refused"
+            )
+            self.converters.watchdog.stop()
+        if self.converters.cache:
+            stats = self.converters.cache.stats()
+            logging.info(
+                f"Conversion cache: {stats['hits']:.0f} hits, {stats['misses']:.0f} misses, "
+                f"{stats['office_launches_saved']:.0f} Office conversions saved "
+                f"({stats['seconds_saved']:.0f}s), {stats['bytes'] / 1024 ** 2:.1f} MB cached"
+            )
+            self.converters.cache.close()
+
+    def extract_text_from_image_pdf(self, pdf_path, cancel_token=None, progress=None):
+        """Extract text from image-based PDFs using OCR, stopping early if cancel_token is triggered."""
+        # Background tasks have no cursor to manage, so only require the ResourceManager on the GUI path
+        busy = self.resource_manager.busy_cursor() if self.resource_manager else nullcontext()
+        with busy:
             text_content = ""
             try:
                 pdf_document = fitz.open(pdf_path)
+                if progress:
+                    progress.set_total(pdf_document.page_count, unit="page")
                 for page_num in range(pdf_document.page_count):
+                    if cancel_token:
+                        cancel_token.raise_if_cancelled()
                     page = pdf_document.load_page(page_num)
                     pix = page.get_pixmap()
                     
@@ -71,61 +176,55 @@ class PDFOperations:
                     # Perform OCR on in-memory image
                     page_text = pytesseract.image_to_string(Image.open(img_buffer))
                     text_content += f"Page {page_num + 1}\n{page_text}\n\n"
+                    if progress:
+                        progress.advance()
                 return text_content
+            except TaskCancelledError:
+                logging.info(f"OCR cancelled: {pdf_path}")
+                raise
             except Exception as e:
                 logging.error(f"Error performing OCR on PDF: {str(e)}", exc_info=True)
                 return ""
 
     def _convert_image_to_pdf(self, image_path, save_dir, new_file_name):
-        """Convert image to PDF using PIL and in-memory operations."""
-        if not self.resource_manager:
-            raise RuntimeError("ResourceManager not initialized")
+        """Convert an image (every frame of a multi-page TIFF) to PDF without re-encoding it."""
+        return self.convert_images_to_pdf([image_path], save_dir, new_file_name)
 
-        with self.resource_manager.busy_cursor():
+    def convert_images_to_pdf(self, image_paths, save_dir, new_file_name, cancel_token=None):
+        """Combine photos or scans into one PDF in save_dir, one page per image or TIFF frame."""
+        busy = self.resource_manager.busy_cursor() if self.resource_manager else nullcontext()
+        with busy:
             try:
                 pdf_name = os.path.splitext(new_file_name)[0] + '.pdf'
                 pdf_path = self.file_ops.get_unique_filename(save_dir, pdf_name)
-                
-                # Use in-memory buffer
-                img = Image.open(image_path)
-                if img.mode in ['RGBA', 'LA', 'P']:
-                    img = img.convert('RGB')
-                
-                pdf_buffer = BytesIO()
-                img.save(pdf_buffer, 'PDF', resolution=300.0)
-                pdf_buffer.seek(0)
-                
-                # Save to final path
-                with open(pdf_path, 'wb') as f:
-                    f.write(pdf_buffer.read())
-                logging.info(f"Successfully converted image to PDF: {pdf_path}")
+                try:
+                    images_to_pdf(image_paths, pdf_path, cancel_token=cancel_token)
+                    current_time = time.time()
+                    os.utime(pdf_path, (current_time, current_time))
+                except Exception:
+                    self.file_ops.release_filename(pdf_path, written=False)
+                    raise
+                self.file_ops.release_filename(pdf_path)
+                logging.info(f"Successfully converted {len(image_paths)} image(s) to PDF: {pdf_path}")
                 return pdf_path
             except Exception as e:
                 logging.error(f"Error converting image to PDF: {str(e)}", exc_info=True)
                 raise
 
-
-
     def _convert_doc_to_docx(self, doc_path):
         """Convert .doc file to .docx format."""
         try:
-            with self.get_word_instance() as word:
-                # Get unique docx path
-                docx_path = os.path.splitext(doc_path)[0] + '.docx'
-                doc = word.Documents.Open(doc_path)
-                try:
-                    doc.SaveAs2(docx_path, FileFormat=16)  # wdFormatDocumentDefault = 16
-                    return docx_path
-                finally:
-                    doc.Close()
+            docx_path = os.path.splitext(doc_path)[0] + '.docx'
+            return self.converters.convert(doc_path, docx_path, self.profile.options())
         except Exception as e:
             logging.error(f"Error converting .doc to .docx: {str(e)}")
             return None
     
-    def convert_word_to_pdf(self, doc_path, save_dir, base_name):
+    def convert_word_to_pdf(self, doc_path, save_dir, base_name, cancel_token=None):
         """
         Convert a Word document to PDF and save it to the specified directory.
-        Uses context manager for Word instance and handles unique filenames.
+        Uses the fastest converter backend that meets the fidelity setting and handles unique filenames.
+        A conversion cancelled while Word was busy has its PDF removed again.
         """
         try:
             # Normalize paths
@@ -141,31 +240,166 @@ class PDFOperations:
             # Generate unique filename through FileOperations
             pdf_path = self.file_ops.get_unique_filename(save_dir, f"{base_name}.pdf")
 
-            with self.get_word_instance() as word:
-                try:
-                    # Convert paths to absolute to avoid any path resolution issues
-                    abs_doc_path = os.path.abspath(doc_path)
-                    abs_pdf_path = os.path.abspath(pdf_path)
-                    
-                    doc = word.Documents.Open(abs_doc_path)
-                    try:
-                        doc.SaveAs(abs_pdf_path, FileFormat=17)  # 17 = wdFormatPDF
-                        # Update modification time
-                        current_time = time.time()
-                        os.utime(abs_pdf_path, (current_time, current_time))
-                        logging.info(f"Converted Word to PDF: {pdf_path}")
-                        return pdf_path
-                    finally:
-                        doc.Close(SaveChanges=False)
-                except Exception as word_error:
-                    logging.error(f"Error in Word conversion process: {str(word_error)}")
-                    raise RuntimeError(f"Word conversion failed: {str(word_error)}")
+            started = time.perf_counter()
+            try:
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
+                # Convert paths to absolute to avoid any path resolution issues
+                abs_pdf_path = os.path.abspath(pdf_path)
+                self.converters.convert(os.path.abspath(doc_path), abs_pdf_path, self.profile.options())
+                if cancel_token and cancel_token.cancelled:
+                    # Word cannot be interrupted mid-export, so the finished PDF is withdrawn instead
+                    os.remove(abs_pdf_path)
+                    cancel_token.raise_if_cancelled()
+                # Update modification time
+                current_time = time.time()
+                os.utime(abs_pdf_path, (current_time, current_time))
+                elapsed = time.perf_counter() - started
+                logging.info(f"Converted Word to PDF: {pdf_path} in {elapsed:.1f}s ({60 / elapsed:.1f} docs/min)")
+            except TaskCancelledError:
+                self.file_ops.release_filename(pdf_path, written=False)
+                raise
+            except Exception as word_error:
+                self.file_ops.release_filename(pdf_path, written=False)
+                logging.error(f"Error in Word conversion process: {str(word_error)}")
+                raise RuntimeError(f"Word conversion failed: {str(word_error)}")
+            self.file_ops.release_filename(pdf_path)
+            return pdf_path
+        except TaskCancelledError:
+            logging.info(f"Conversion of {doc_path} cancelled")
+            raise
         except Exception as e:
             logging.error(f"Error converting Word to PDF: {str(e)}")
             raise RuntimeError(f"Failed to convert {doc_path} to PDF: {str(e)}")
 
-    def convert_to_pdf(self, file_path, save_dir, new_file_name):
+    def convert_many(self, paths, save_dir, names, cancel_tokens=None, parallel=None, cancel_token=None):
+        """
+        Convert many documents to PDF with one converter session instead of one per file.
+
+        Office documents are exported into a local temp workspace, then moved into the
+        (possibly synced) save folder; PDFs are copied as convert_to_pdf does.
+
+        :param paths: Source files.
+        :param save_dir: Destination folder, or a list of folders aligned with paths.
+        :param names: Output file names aligned with paths.
+        :param cancel_tokens: Optional list of CancellationTokens aligned with paths.
+        :param parallel: Number of pooled Office instances to spread documents across;
+                         by default large batches use the whole Word pool.
+        :param cancel_token: Optional CancellationToken for the whole batch, used for every
+                             document without its own (a background task is given one).
+        :return: List of ConversionResult aligned with paths.
+        """
+        save_dirs = [save_dir] * len(paths) if isinstance(save_dir, (str, os.PathLike)) else list(save_dir)
+        cancel_tokens = cancel_tokens or [cancel_token] * len(paths)
+        results = [ConversionResult(path) for path in paths]
+        started = time.perf_counter()
+
+        workspace = tempfile.mkdtemp(prefix="dochandler_batch_")
         try:
+            office_docs = []
+            for index, path in enumerate(paths):
+                try:
+                    if cancel_tokens[index]:
+                        cancel_tokens[index].raise_if_cancelled()
+                    if not os.path.exists(path):
+                        raise FileNotFoundError(f"Input file not found: {path}")
+                    if os.path.getsize(path) == 0:
+                        raise ValueError(f"Input file is empty: {path}")
+                    sniffed = content_sniffer.sniff(path)
+                    if sniffed.kind in OFFICE_KINDS:
+                        # Office picks its import filter by extension: a mislabelled file is exported from a renamed copy
+                        source = content_sniffer.typed_path(path, sniffed, workspace)
+                        office_docs.append((index, os.path.abspath(source), os.path.join(workspace, f"{index}.pdf")))
+                    elif sniffed.kind == 'pdf':
+                        self._publish_pdf(path, save_dirs[index], names[index], results[index], move=False)
+                    elif sniffed.kind in IMAGE_KINDS:
+                        results[index].pdf_path = self._convert_image_to_pdf(path, save_dirs[index], names[index])
+                    else:
+                        raise ValueError(f"Unsupported file type: {sniffed.describe()}")
+                except Exception as e:
+                    results[index].error = e
+
+            for (index, _, workspace_pdf), outcome in zip(office_docs, self._export_office_documents(office_docs, cancel_tokens, parallel)):
+                try:
+                    if isinstance(outcome, Exception):
+                        raise outcome
+                    # Cancelled while Office was exporting: the workspace PDF is dropped with the workspace
+                    if cancel_tokens[index]:
+                        cancel_tokens[index].raise_if_cancelled()
+                    self._publish_pdf(workspace_pdf, save_dirs[index], names[index], results[index], move=True)
+                except TaskCancelledError as e:
+                    results[index].error = e
+                except Exception as e:
+                    logging.error(f"Error converting {paths[index]} in batch: {str(e)}")
+                    results[index].error = RuntimeError(f"Failed to convert {paths[index]} to PDF: {str(e)}")
+        finally:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+        for result in results:
+            if result.ok:
+                self.file_ops.discard_partial_file(result.source)
+
+        converted = sum(1 for r in results if r.ok)
+        elapsed = time.perf_counter() - started
+        if converted:
+            logging.info(
+                f"Batch converted {converted}/{len(paths)} documents in {elapsed:.1f}s "
+                f"({converted * 60 / elapsed:.1f} docs/min)"
+            )
+        return results
+
+    def _export_office_documents(self, office_docs, cancel_tokens, parallel):
+        """
+        Export (index, src, workspace_pdf) items, split across pooled instances when parallel > 1.
+
+        The first chunk is exported on the calling thread (the COM lane in the app), the others
+        on fixed STA export workers, so every Office instance is used by the thread that started it.
+        """
+        if not office_docs:
+            return []
+        if parallel is None:
+            parallel = self.word_pool.max_size if len(office_docs) >= 10 else 1
+        parallel = max(1, min(parallel, len(office_docs)))
+
+        def export(chunk):
+            try:
+                return self.converters.convert_many(
+                    [(src, dst) for _, src, dst in chunk],
+                    options=self.profile.options(),
+                    cancel_tokens=[cancel_tokens[index] for index, _, _ in chunk],
+                    scratch=True
+                )
+            except Exception as e:
+                return [e] * len(chunk)
+
+        if parallel == 1:
+            return export(office_docs)
+        chunks = [office_docs[i::parallel] for i in range(parallel)]
+        workers = self._start_export_workers(parallel - 1)
+        futures = [worker.submit(export, chunk) for worker, chunk in zip(workers, chunks[1:])]
+        chunk_results = [export(chunks[0])] + [future.result() for future in futures]
+        outcomes = [None] * len(office_docs)
+        for offset, chunk_result in enumerate(chunk_results):
+            outcomes[offset::parallel] = chunk_result
+        return outcomes
+
+    def _publish_pdf(self, pdf, save_dir, name, result, move):
+        """Place a converted or source PDF under a unique name in save_dir with a fresh timestamp."""
+        base_name = os.path.splitext(os.path.basename(name))[0]
+        pdf_path = self.file_ops.get_unique_filename(os.path.normpath(save_dir), f"{base_name}.pdf")
+        try:
+            # A workspace file hard-linked from the conversion cache is copied so the saved PDF gets its own inode
+            self.file_ops.place_file(pdf, pdf_path, move=move and os.stat(pdf).st_nlink == 1)
+        except Exception:
+            self.file_ops.release_filename(pdf_path, written=False)
+            raise
+        self.file_ops.release_filename(pdf_path)
+        result.pdf_path = pdf_path
+
+    def convert_to_pdf(self, file_path, save_dir, new_file_name, cancel_token=None):
+        try:
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
             # Validate input file
             if not os.path.exists(file_path):
                 raise FileNotFoundError(f"Input file not found: {file_path}")
@@ -176,23 +410,41 @@ class PDFOperations:
             if not new_file_name.lower().endswith('.pdf'):
                 new_file_name = f"{os.path.splitext(new_file_name)[0]}.pdf"
 
-            # Get unique filename using the existing method
-            pdf_path = self.file_ops.get_unique_filename(save_dir, new_file_name)
-
-            # Handle conversion based on file type
-            file_ext = os.path.splitext(file_path)[1].lower()
-            if file_ext in ['.doc', '.docx']:
-                return self.convert_word_to_pdf(file_path, save_dir, os.path.splitext(new_file_name)[0])
-            elif file_ext == '.pdf':
-                # Copy PDF and update modification time
-                shutil.copy(file_path, pdf_path)
-                current_time = time.time()
-                os.utime(pdf_path, (current_time, current_time))
+            # Handle conversion based on what the file really is
+            sniffed = content_sniffer.sniff(file_path)
+            if sniffed.kind in OFFICE_KINDS and not sniffed.matches(file_path):
+                raise ValueError(
+                    f"{os.path.basename(file_path)} is a {sniffed.kind.upper()} file; "
+                    f"save it as {sniffed.extension} before converting it"
+                )
+            if sniffed.kind in ('doc', 'docx'):
+                converted = self.convert_word_to_pdf(
+                    file_path, save_dir, os.path.splitext(new_file_name)[0], cancel_token=cancel_token
+                )
+            elif sniffed.kind in ('xls', 'xlsx', 'xlsm'):
+                converted = self._convert_excel_to_pdf(file_path, save_dir, new_file_name)
+            elif sniffed.kind in IMAGE_KINDS:
+                converted = self.convert_images_to_pdf([file_path], save_dir, new_file_name, cancel_token=cancel_token)
+            elif sniffed.kind == 'pdf':
+                # Reserved here only: the converters above pick their own unique names
+                pdf_path = self.file_ops.get_unique_filename(save_dir, new_file_name)
+                # Copy the PDF (or rename it into place if it was staged there) with a fresh timestamp
+                try:
+                    self.file_ops.place_file(file_path, pdf_path)
+                except Exception:
+                    self.file_ops.release_filename(pdf_path, written=False)
+                    raise
+                self.file_ops.release_filename(pdf_path)
                 logging.info(f"PDF file copied to: {pdf_path} with updated timestamp")
                 return pdf_path
             else:
-                raise ValueError(f"Unsupported file type: {file_ext}")
+                raise ValueError(f"Unsupported file type: {sniffed.describe()}")
+            # A staged source is not needed once its PDF exists
+            self.file_ops.discard_partial_file(file_path)
+            return converted
 
+        except TaskCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Error converting file to PDF: {e}", exc_info=True)
             raise RuntimeError(f"Failed to convert {file_path} to PDF: {str(e)}")
@@ -202,63 +454,41 @@ class PDFOperations:
 
     @contextmanager
     def get_excel_instance(self):
-        """Create an isolated Excel instance for conversion."""
-        pythoncom.CoInitialize()
-        excel_app = None
+        """Check out a warm Excel instance from the pool for conversion."""
         try:
-            excel_app = win32com.client.DispatchEx('Excel.Application')
-            excel_app.Visible = False
-            excel_app.DisplayAlerts = False
-            yield excel_app
-        except Exception as e:
+            with self.excel_pool.checkout() as excel_app:
+                yield excel_app
+        except OfficeUnavailableError as e:
             logging.error(f"Error creating Excel instance: {str(e)}", exc_info=True)
             raise Exception("Microsoft Excel is required for conversion. Please ensure Excel is installed.")
-        finally:
-            if excel_app:
-                try:
-                    excel_app.Quit()
-                except:
-                    pass
-            pythoncom.CoUninitialize()
 
     def _convert_excel_to_pdf(self, excel_path, save_dir, new_file_name):
-        """Convert Excel to PDF using COM automation."""
-        if not self.resource_manager:
-            raise RuntimeError("ResourceManager not initialized")
-                
+        """Convert Excel to PDF; simple .xlsx sheets are rendered directly, others go to Excel."""
         try:
             pdf_name = os.path.splitext(new_file_name)[0] + '.pdf'
             pdf_path = self.file_ops.get_unique_filename(save_dir, pdf_name)
-            
-            # Use get_excel_instance for proper COM initialization
-            with self.get_excel_instance() as excel:
-                try:
-                    # Create absolute paths
-                    abs_excel_path = os.path.abspath(excel_path)
-                    abs_pdf_path = os.path.abspath(pdf_path)
-                    
-                    # Open workbook and export to PDF
-                    wb = excel.Workbooks.Open(abs_excel_path)
-                    try:
-                        wb.ExportAsFixedFormat(0, abs_pdf_path)
-                        logging.info(f"Successfully converted Excel to PDF: {pdf_path}")
-                        return pdf_path
-                    finally:
-                        wb.Close(False)
-                except Exception as e:
-                    raise Exception(f"Failed to save PDF: {str(e)}")
-                    
+            try:
+                self.converters.convert(os.path.abspath(excel_path), os.path.abspath(pdf_path), self.profile.options())
+            except Exception:
+                self.file_ops.release_filename(pdf_path, written=False)
+                raise
+            self.file_ops.release_filename(pdf_path)
+            logging.info(f"Successfully converted Excel to PDF: {pdf_path}")
+            return pdf_path
+
         except Exception as e:
             logging.error(f"Error converting Excel to PDF: {str(e)}", exc_info=True)
             raise
 
 
-    def merge_pdfs(self, file_paths, output_path):
+    def merge_pdfs(self, file_paths, output_path, cancel_token=None):
         """Merge multiple PDFs into a single PDF."""
         try:
             merger = PdfMerger()
 
             for file_path in file_paths:
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
                 if os.path.exists(file_path):
                     merger.append(file_path)
                 else:
@@ -270,6 +500,9 @@ class PDFOperations:
 
             logging.info(f"Merged PDF saved to: {output_path}")
             return output_path
+        except TaskCancelledError:
+            logging.info(f"PDF merge cancelled: {output_path}")
+            raise
         except Exception as e:
             logging.error(f"Error merging PDFs: {str(e)}", exc_info=True)
             raise
@@ -385,13 +618,15 @@ class PDFOperations:
             logging.error(f"Error adding watermark to PDF: {str(e)}", exc_info=True)
             raise
 
-    def extract_text_from_pdf(self, pdf_path):
+    def extract_text_from_pdf(self, pdf_path, cancel_token=None):
         """Extract text from a PDF using multi-threading."""
         try:
             pdf_document = fitz.open(pdf_path)
             text_content = [""] * pdf_document.page_count  # Pre-allocate for thread-safe storage
 
             def extract_page_text(page_num):
+                if cancel_token and cancel_token.cancelled:
+                    return ""
                 try:
                     page = pdf_document.load_page(page_num)
                     return page.get_text()
@@ -407,7 +642,11 @@ class PDFOperations:
                 text_content[idx] = text
 
             pdf_document.close()
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
             return "\n".join(text_content)  # Combine all page texts
+        except TaskCancelledError:
+            raise
         except Exception as e:
             logging.error(f"Error extracting text from PDF: {e}", exc_info=True)
             return f"Error extracting text: {e}"
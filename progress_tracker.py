@@ -0,0 +1,142 @@
+# progress_tracker.py
+
+import threading
+import time
+from dataclasses import dataclass, field
+
+@dataclass
+class _TaskProgress:
+    done: float = 0.0
+    total: float = 1.0
+    unit: str = "task"
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def fraction(self):
+        if self.total <= 0:
+            return 1.0
+        return min(1.0, self.done / self.total)
+
+class ProgressReporter:
+    """
+    Handed to a running task so it can report fine-grained progress (e.g. pages).
+
+    Updates are rate-limited at the source, so a task may call advance() once per page
+    without flooding the sink. The reporter is picklable whenever its sink is, which
+    lets process-pool tasks report through a multiprocessing queue.
+    """
+
+    def __init__(self, sink, key, min_interval=0.05):
+        self._sink = sink
+        self._key = key
+        self._min_interval = min_interval
+        self._done = 0
+        self._total = 1
+        self._unit = "task"
+        self._last_sent = 0.0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_last_sent'] = 0.0
+        return state
+
+    def set_total(self, total, unit="page"):
+        self._total = max(0, total)
+        self._unit = unit
+        self._send(force=True)
+
+    def advance(self, amount=1):
+        self._done += amount
+        self._send(force=self._done >= self._total)
+
+    def update(self, done, total=None):
+        if total is not None:
+            self._total = total
+        self._done = done
+        self._send(force=self._done >= self._total)
+
+    def _send(self, force=False):
+        now = time.monotonic()
+        if force or now - self._last_sent >= self._min_interval:
+            self._last_sent = now
+            self._sink.put((self._key, self._done, self._total, self._unit))
+
+class ProgressTracker:
+    """
+    Aggregates progress from concurrent tasks into one overall percentage and ETA.
+
+    Every task counts equally regardless of its unit, so a 3-page letter and a
+    1000-page OCR job each contribute their completed fraction. take_update() only
+    returns a value once per frame budget, which is what throttles the Qt side.
+    """
+
+    def __init__(self, frame_budget=0.1):
+        self.frame_budget = frame_budget
+        self._lock = threading.Lock()
+        self._tasks = {}
+        self._batch_started = None
+        self._dirty = False
+        self._last_emit = 0.0
+
+    def put(self, message):
+        """Apply a (key, done, total, unit) update; also the sink for in-process reporters."""
+        key, done, total, unit = message
+        with self._lock:
+            progress = self._tasks.get(key)
+            if progress is None:
+                return
+            progress.done, progress.total, progress.unit = done, total, unit
+            self._dirty = True
+
+    def start(self, key):
+        with self._lock:
+            if not self._tasks:
+                self._batch_started = time.monotonic()
+            self._tasks[key] = _TaskProgress()
+            self._dirty = True
+
+    def finish(self, key):
+        with self._lock:
+            progress = self._tasks.get(key)
+            if progress is not None:
+                progress.done = progress.total
+                self._dirty = True
+
+    def reporter(self, key, sink=None):
+        return ProgressReporter(sink or self, key)
+
+    @property
+    def busy(self):
+        with self._lock:
+            return bool(self._tasks)
+
+    def snapshot(self):
+        """Return (percent 0-100, eta seconds or -1 if unknown) across all tracked tasks."""
+        with self._lock:
+            return self._snapshot_locked(time.monotonic())
+
+    def _snapshot_locked(self, now):
+        if not self._tasks:
+            return 100, 0.0
+        fraction = sum(p.fraction for p in self._tasks.values()) / len(self._tasks)
+        elapsed = now - (self._batch_started or now)
+        if fraction <= 0 or elapsed <= 0:
+            eta = -1.0
+        else:
+            eta = elapsed * (1 - fraction) / fraction
+        return int(fraction * 100), eta
+
+    def take_update(self):
+        """Return a (percent, eta) snapshot if something changed and the frame budget has elapsed."""
+        now = time.monotonic()
+        with self._lock:
+            if not self._dirty or now - self._last_emit < self.frame_budget:
+                return None
+            self._dirty = False
+            self._last_emit = now
+            snapshot = self._snapshot_locked(now)
+            # Once everything has finished, start the next batch from zero
+            if all(p.fraction >= 1.0 for p in self._tasks.values()):
+                self._tasks.clear()
+                self._batch_started = None
+            return snapshot
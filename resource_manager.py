@@ -12,6 +12,8 @@ from PyQt6.QtCore import Qt, QTimer
 import gc
 import time
 import weakref
+from conversion_watchdog import attach_process
+from office_pool import ComOfficeFactory
 
 T = TypeVar('T')
 
@@ -31,35 +33,42 @@ class ResourceManager:
 
     @contextmanager
     def manage_com_object(self, com_class: str, visible: bool = False):
+        """
+        Start an isolated COM application, retrying the launch, and quit it afterwards.
+
+        Only the launch is retried; the block runs once. Inside a ConversionWatchdog
+        supervision the application's process is registered so a hang can be killed.
+        """
         obj = None
-        with self._temp_files_lock:
+        pythoncom.CoInitialize()
+        try:
             for attempt in range(self._max_retries):
                 try:
-                    pythoncom.CoInitialize()
                     obj = win32com.client.DispatchEx(com_class)
-                    if hasattr(obj, 'Visible'):
-                        obj.Visible = visible
-                    if hasattr(obj, 'DisplayAlerts'):
-                        obj.DisplayAlerts = False
-                    self._com_objects.add(obj)
-                    self._resource_timestamps[id(obj)] = time.time()
-                    yield obj
                     break
                 except Exception as e:
                     logging.warning(f"Attempt {attempt + 1} failed for COM class {com_class}: {e}")
                     if attempt == self._max_retries - 1:
                         raise
                     time.sleep(self._retry_delay * (2 ** attempt))
-                finally:
-                    if obj:
-                        try:
-                            if hasattr(obj, 'Quit'):
-                                obj.Quit()
-                        except Exception as quit_error:
-                            logging.warning(f"Failed to quit COM object {com_class}: {quit_error}")
-                        self._com_objects.discard(obj)
-                    pythoncom.CoUninitialize()
-
+            if hasattr(obj, 'Visible'):
+                obj.Visible = visible
+            if hasattr(obj, 'DisplayAlerts'):
+                obj.DisplayAlerts = False
+            self._com_objects.add(obj)
+            self._resource_timestamps[id(obj)] = time.time()
+            attach_process(ComOfficeFactory(com_class).process_id(obj))
+            yield obj
+        finally:
+            if obj is not None:
+                try:
+                    if hasattr(obj, 'Quit'):
+                        obj.Quit()
+                except Exception as quit_error:
+                    logging.warning(f"Failed to quit COM object {com_class}: {quit_error}")
+                self._com_objects.discard(obj)
+                self._resource_timestamps.pop(id(obj), None)
+            pythoncom.CoUninitialize()
 
     @contextmanager
     def temp_directory(self) -> Iterator[str]:
@@ -71,6 +80,10 @@ class ResourceManager:
         finally:
             self.cleanup_directory(temp_dir)
 
+    def register_temp_directory(self, directory: str) -> None:
+        """Track a temporary directory created elsewhere so cleanup_all removes it."""
+        self._temp_directories.add(directory)
+
     @contextmanager
     def temp_file(self, suffix: Optional[str] = None) -> Iterator[str]:
         """Create and manage a temporary file."""
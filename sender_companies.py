@@ -0,0 +1,127 @@
+# sender_companies.py
+
+import email.utils
+import json
+import logging
+import os
+import threading
+import time
+
+# Mailbox providers shared by unrelated senders: never map a whole domain from these
+PUBLIC_EMAIL_DOMAINS = {
+    'aol.com', 'comcast.net', 'gmail.com', 'googlemail.com', 'hotmail.com', 'icloud.com',
+    'live.com', 'mac.com', 'me.com', 'msn.com', 'outlook.com', 'proton.me', 'protonmail.com',
+    'yahoo.com', 'ymail.com',
+}
+
+def normalize_sender(sender):
+    """The lower-cased address of a sender ('Name <a@b.com>' or 'a@b.com'); '' if it has none."""
+    address = email.utils.parseaddr(sender or '')[1].strip().lower()
+    # Exchange-internal senders ('/O=ORG/OU=.../CN=...') have no domain to learn from
+    return address if '@' in address else ''
+
+def sender_domain(address):
+    return address.rsplit('@', 1)[1] if '@' in address else ''
+
+class SenderCompanyMap:
+    """
+    Learned sender → company table for naming files that came from email.
+
+    Every time the user settles on a company for an emailed file, the sender's
+    address is mapped to it and the sender's domain counts one vote for it. A later
+    file from the same address resolves with a dictionary lookup; an unknown address
+    at a known domain resolves to the domain's company as long as every vote agrees.
+    The table is a JSON file that survives restarts.
+    """
+
+    def __init__(self, path=None):
+        self.path = str(path) if path else None
+        self._lock = threading.Lock()
+        data = self._load()
+        self._addresses = data.get('addresses', {})
+        self._domains = data.get('domains', {})
+        self.stats = {'address_hits': 0, 'domain_hits': 0, 'misses': 0}
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable sender-company table: {e}")
+            return {}
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            staging = f"{self.path}.tmp"
+            with open(staging, 'w', encoding='utf-8') as f:
+                json.dump({'addresses': self._addresses, 'domains': self._domains}, f, indent=2)
+            os.replace(staging, self.path)
+        except Exception as e:
+            logging.warning(f"Could not save sender-company table: {e}")
+
+    def lookup(self, sender):
+        """
+        The company learned for a sender as (company, 'address' | 'domain'), or (None, None).
+
+        A domain whose senders were mapped to different companies (a reseller or a
+        shared host) resolves nothing; only exact addresses are trusted there.
+        """
+        address = normalize_sender(sender)
+        if not address:
+            return None, None
+        with self._lock:
+            entry = self._addresses.get(address)
+            if entry:
+                self.stats['address_hits'] += 1
+                return entry['company'], 'address'
+            votes = self._domains.get(sender_domain(address), {})
+            if len(votes) == 1:
+                self.stats['domain_hits'] += 1
+                return next(iter(votes)), 'domain'
+            self.stats['misses'] += 1
+        return None, None
+
+    def learn(self, sender, company):
+        """Record that files from sender belong to company; returns False if there is nothing to learn."""
+        address = normalize_sender(sender)
+        company = (company or '').strip()
+        if not address or not company:
+            return False
+        with self._lock:
+            previous = self._addresses.get(address, {}).get('company')
+            if previous == company:
+                self._addresses[address]['seen'] = time.strftime('%Y-%m-%d')
+                return True
+            self._addresses[address] = {'company': company, 'seen': time.strftime('%Y-%m-%d')}
+            domain = sender_domain(address)
+            if domain not in PUBLIC_EMAIL_DOMAINS:
+                votes = self._domains.setdefault(domain, {})
+                if previous and previous in votes:
+                    # The user corrected this address: its earlier vote no longer counts
+                    votes[previous] -= 1
+                    if votes[previous] <= 0:
+                        del votes[previous]
+                votes[company] = votes.get(company, 0) + 1
+            self._save()
+        logging.info(f"Learned company '{company}' for sender {address}")
+        return True
+
+    def forget(self, sender):
+        """Drop what was learned from one address (its domain vote goes with it)."""
+        address = normalize_sender(sender)
+        with self._lock:
+            entry = self._addresses.pop(address, None)
+            if not entry:
+                return False
+            votes = self._domains.get(sender_domain(address), {})
+            if entry['company'] in votes:
+                votes[entry['company']] -= 1
+                if votes[entry['company']] <= 0:
+                    del votes[entry['company']]
+            self._save()
+        return True
@@ -0,0 +1,139 @@
+# staging.py
+
+import logging
+import os
+import shutil
+import sys
+import time
+import uuid
+from threading import Lock
+
+from config import CONFIG
+
+# Staging root kept at the top of a save folder's volume when that volume is not the local one
+STAGING_DIR_NAME = '.dochandler-staging'
+# Staging folders earlier versions made inside the save folder itself, still cleaned up
+LEGACY_DIR_NAMES = ('.dochandler-partial.tmp', '.dochandler-partial')
+
+_roots_lock = Lock()
+_volume_roots = {}  # st_dev -> staging root on that volume
+
+def _hide_directory(path):
+    """Mark a staging folder hidden and unindexed on Windows, where a leading dot does not hide it."""
+    if sys.platform != 'win32':
+        return
+    import ctypes
+    FILE_ATTRIBUTE_HIDDEN = 0x2
+    FILE_ATTRIBUTE_NOT_CONTENT_INDEXED = 0x2000
+    if not ctypes.windll.kernel32.SetFileAttributesW(
+        str(path), FILE_ATTRIBUTE_HIDDEN | FILE_ATTRIBUTE_NOT_CONTENT_INDEXED
+    ):
+        logging.debug(f"Could not hide staging folder {path}: {ctypes.WinError()}")
+
+def _device(path):
+    """The st_dev of path, or of its nearest existing parent; None if nothing on the way exists."""
+    path = os.path.abspath(path)
+    while True:
+        try:
+            return os.stat(path).st_dev
+        except OSError:
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
+
+def _mount_point(path):
+    path = os.path.abspath(path)
+    while not os.path.ismount(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+def _is_local_volume(mount):
+    """False for network drives and shares, where a folder at the root would be seen by everyone."""
+    if sys.platform != 'win32':
+        return True
+    if mount.startswith('\\\\'):
+        return False
+    import ctypes
+    DRIVE_REMOVABLE, DRIVE_FIXED = 2, 3
+    return ctypes.windll.kernel32.GetDriveTypeW(mount) in (DRIVE_REMOVABLE, DRIVE_FIXED)
+
+def local_root():
+    return os.path.abspath(str(CONFIG['STAGING_DIR']))
+
+def staging_root(save_dir):
+    """
+    Where files bound for save_dir are staged: never inside save_dir, which may be synced.
+
+    That is the local staging folder when it is on save_dir's volume, so saving a staged
+    file is a rename; otherwise a hidden folder at the root of save_dir's volume if it is
+    a local disk, and the local staging folder (saving then copies) as a last resort.
+    """
+    local = local_root()
+    device = _device(save_dir)
+    if device is None or device == _device(local):
+        return local
+    with _roots_lock:
+        root = _volume_roots.get(device)
+        if root is None:
+            root = local
+            mount = _mount_point(save_dir)
+            if _is_local_volume(mount):
+                try:
+                    os.makedirs(os.path.join(mount, STAGING_DIR_NAME), exist_ok=True)
+                    root = os.path.join(mount, STAGING_DIR_NAME)
+                except OSError as e:
+                    logging.info(f"Staging files for {mount} locally, its root is not writable: {e}")
+            _volume_roots[device] = root
+        return root
+
+def create_directory(save_dir):
+    """A new, empty staging folder for one drop bound for save_dir."""
+    root = staging_root(save_dir)
+    directory = os.path.join(root, uuid.uuid4().hex)
+    os.makedirs(directory)
+    _hide_directory(root)
+    return directory
+
+def is_staged(file_path):
+    """True for a file in a drop's staging folder, including those of earlier versions."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(file_path)))
+    name = os.path.basename(root)
+    return (
+        name == STAGING_DIR_NAME or name in LEGACY_DIR_NAMES
+        or os.path.normcase(root) == os.path.normcase(local_root())
+    )
+
+def remove_empty(directory):
+    """Remove a drop's staging folder, then the staging root, once they are empty."""
+    for path in (directory, os.path.dirname(directory)):
+        try:
+            os.rmdir(path)
+        except FileNotFoundError:
+            continue
+        except OSError:
+            return
+
+def cleanup(save_dir, max_age=24 * 3600):
+    """Remove staging folders for save_dir older than max_age seconds, left by a crash or an unsaved drop."""
+    removed = 0
+    now = time.time()
+    roots = [staging_root(save_dir)] + [os.path.join(save_dir, name) for name in LEGACY_DIR_NAMES]
+    for root in roots:
+        if not os.path.isdir(root):
+            continue
+        for entry in os.scandir(root):
+            try:
+                if entry.is_dir() and now - entry.stat().st_mtime >= max_age:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    removed += 1
+            except OSError as e:
+                logging.warning(f"Could not remove staging folder {entry.path}: {e}")
+        try:
+            os.rmdir(root)
+        except OSError:
+            pass
+    return removed
@@ -0,0 +1,120 @@
+# task_journal.py
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+@dataclass
+class JournalEntry:
+    task_id: str
+    task_type: str
+    replay_name: str
+    args: list
+    kwargs: dict
+    priority: int
+    attempts: int
+
+class TaskJournal:
+    """
+    Write-ahead journal of background tasks kept in SQLite (WAL mode).
+
+    Every journaled task is recorded when it is queued, when it starts and when it
+    finishes, so work that was queued or running when the app died can be replayed
+    on the next start.
+    """
+
+    def __init__(self, db_path, max_attempts=3, retention_seconds=7 * 24 * 3600):
+        self.db_path = str(db_path)
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id TEXT PRIMARY KEY,
+                task_type TEXT NOT NULL,
+                replay_name TEXT NOT NULL,
+                args TEXT NOT NULL,
+                kwargs TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                enqueued_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_state ON tasks(state)")
+        self._prune(retention_seconds)
+        logging.info(f"Task journal opened: {self.db_path}")
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def _prune(self, retention_seconds):
+        """Drop finished entries older than the retention window."""
+        cutoff = time.time() - retention_seconds
+        self._execute(
+            "DELETE FROM tasks WHERE state IN ('completed', 'failed', 'cancelled') AND finished_at < ?",
+            (cutoff,)
+        )
+
+    def record_enqueue(self, task_id, task_type, replay_name, args, kwargs, priority):
+        """Record a queued task; replaying an already-journaled task_id leaves its row untouched."""
+        self._execute(
+            "INSERT OR IGNORE INTO tasks (task_id, task_type, replay_name, args, kwargs, priority, state, enqueued_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, 'queued', ?)",
+            (task_id, task_type, replay_name, json.dumps(list(args), default=str),
+             json.dumps(kwargs, default=str), priority, time.time())
+        )
+
+    def record_start(self, task_id):
+        self._execute(
+            "UPDATE tasks SET state = 'running', attempts = attempts + 1, started_at = ? WHERE task_id = ?",
+            (time.time(), task_id)
+        )
+
+    def record_completion(self, task_id):
+        self._finish(task_id, 'completed')
+
+    def record_failure(self, task_id, error):
+        self._finish(task_id, 'failed', str(error))
+
+    def record_cancelled(self, task_id):
+        self._finish(task_id, 'cancelled')
+
+    def _finish(self, task_id, state, error=None):
+        self._execute(
+            "UPDATE tasks SET state = ?, error = ?, finished_at = ? WHERE task_id = ?",
+            (state, error, time.time(), task_id)
+        )
+
+    def unfinished(self):
+        """Return queued or interrupted entries in enqueue order, giving up on ones that keep failing."""
+        rows = self._execute(
+            "SELECT task_id, task_type, replay_name, args, kwargs, priority, attempts "
+            "FROM tasks WHERE state IN ('queued', 'running') ORDER BY enqueued_at"
+        ).fetchall()
+
+        entries = []
+        for task_id, task_type, replay_name, args, kwargs, priority, attempts in rows:
+            if attempts >= self.max_attempts:
+                logging.warning(f"Journaled task {task_id} abandoned after {attempts} attempts")
+                self.record_failure(task_id, "Interrupted too many times")
+                continue
+            entries.append(JournalEntry(
+                task_id, task_type, replay_name, json.loads(args), json.loads(kwargs), priority, attempts
+            ))
+        return entries
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
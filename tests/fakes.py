@@ -0,0 +1,257 @@
+# tests/fakes.py
+
+import hashlib
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import name_index
+from conversion_watchdog import as_timeout, attach_process, checkpoint
+from converter_backends import ConversionError, ConverterBackend
+from office_pool import OfficeApplicationFactory
+from outlook_session import OutlookBackend
+
+class FakeOfficeApp:
+    """Stands in for a Word or Excel application object."""
+
+    def __init__(self, number):
+        self.number = number
+        self.healthy = True
+        self.quit = False
+
+class FakeOfficeFactory(OfficeApplicationFactory):
+    """Hands out FakeOfficeApps and records what the pool did with them."""
+
+    name = "Fake Office"
+
+    def __init__(self, thread_affine=False, fail_creates=0):
+        self.thread_affine = thread_affine
+        self.fail_creates = fail_creates
+        self.created = []
+        self.shut_down = []
+        self._lock = threading.Lock()
+
+    def create(self):
+        with self._lock:
+            if self.fail_creates:
+                self.fail_creates -= 1
+                raise OSError("Office could not start")
+            app = FakeOfficeApp(len(self.created) + 1)
+            self.created.append(app)
+            return app
+
+    def is_healthy(self, app):
+        return app.healthy
+
+    def process_id(self, app):
+        return 1000 + app.number
+
+    def shutdown(self, app):
+        app.quit = True
+        with self._lock:
+            self.shut_down.append(app)
+
+class FakeAttachment:
+    def __init__(self, file_name, content=b"", position=0):
+        self.FileName = file_name
+        self.DisplayName = file_name
+        self.Position = position
+        self.Size = len(content)
+        self.Type = 1  # olByValue
+        self.content = content
+
+    def SaveAsFile(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.content)
+
+class FakeAttachments:
+    def __init__(self, attachments):
+        self._attachments = list(attachments)
+
+    @property
+    def Count(self):
+        return len(self._attachments)
+
+    def Item(self, index):
+        """1-based, like the Outlook collection."""
+        return self._attachments[index - 1]
+
+class FakeMailItem:
+    Class = 43  # olMail
+
+    def __init__(self, subject="", attachments=(), sender_email=""):
+        self.Subject = subject
+        self.SenderEmailAddress = sender_email
+        self.Attachments = FakeAttachments(attachments)
+
+class FakeNamespace:
+    def __init__(self, backend):
+        self._backend = backend
+        self.connected = True
+
+    def _check(self):
+        if not self.connected:
+            raise ConnectionError("The Outlook session was disconnected")
+
+    def GetDefaultFolder(self, folder):
+        self._check()
+        return folder
+
+    def GetItemFromID(self, entry_id):
+        self._check()
+        try:
+            return self._backend.items[entry_id]
+        except KeyError:
+            raise LookupError(f"No Outlook item with ID {entry_id}")
+
+class FakeOutlookBackend(OutlookBackend):
+    """In-memory Outlook: items keyed by entry ID; drop() simulates Outlook closing."""
+
+    name = "Fake Outlook"
+
+    def __init__(self, items=None, failed_connects=0):
+        self.items = dict(items or {})
+        self.failed_connects = failed_connects
+        self.namespaces = []
+        self.connects = 0
+
+    def connect(self):
+        if self.failed_connects:
+            self.failed_connects -= 1
+            raise ConnectionError("Outlook is not running")
+        self.connects += 1
+        namespace = FakeNamespace(self)
+        self.namespaces.append(namespace)
+        return namespace
+
+    def is_healthy(self, namespace):
+        return namespace.connected
+
+    def disconnect(self, namespace):
+        namespace.connected = False
+
+    def drop(self):
+        """Disconnect every open namespace, as when the user closes Outlook."""
+        for namespace in self.namespaces:
+            namespace.connected = False
+
+class FakeMimeData:
+    """The QMimeData calls OutlookDrop.from_mime makes, over a dict of format -> bytes."""
+
+    def __init__(self, formats):
+        self.formats = formats
+
+    def hasFormat(self, fmt):
+        return fmt in self.formats
+
+    def data(self, fmt):
+        return self.formats.get(fmt, b"")
+
+class FakeFileOps:
+    """The FileOperations calls OutlookHandler makes, without its PDF dependencies."""
+
+    def sanitize_filename(self, filename):
+        return filename.replace('/', '_').replace('\\', '_')
+
+    def get_unique_filename(self, directory, filename):
+        return name_index.reserve(directory, filename)
+
+    def release_filename(self, file_path, written=True):
+        name_index.release(file_path, written)
+
+    def create_partial_directory(self, save_dir):
+        directory = os.path.join(save_dir, f"staging-{time.monotonic_ns()}")
+        os.makedirs(directory)
+        return directory
+
+    def discard_partial_directory(self, directory):
+        pass
+
+class StandInBackend(ConverterBackend):
+    """
+    Deterministic fake converter for tests on machines without Office.
+
+    Writes a small valid PDF naming the source and its SHA-256, so the same input always
+    produces byte-identical output. seconds_per_doc simulates conversion cost. Files named
+    in hang_on are handed to a converter process that never finishes, like Word stuck
+    behind a dialog, to exercise the conversion watchdog.
+    """
+
+    def __init__(self, name="stand-in", formats=None, fidelity='exact', seconds_per_doc=0.0,
+                 session_seconds=0.0, fail_on=(), hang_on=()):
+        self.name = name
+        self.formats = formats or {ext: ('.pdf',) for ext in ('.doc', '.docx', '.rtf', '.xls', '.xlsx', '.txt')}
+        self.fidelity = fidelity
+        self.seconds_per_doc = seconds_per_doc
+        self.session_seconds = session_seconds
+        self.fail_on = {os.path.basename(f) for f in fail_on}
+        self.hang_on = {os.path.basename(f) for f in hang_on}
+        self.conversions = 0
+
+    def _hang(self, src):
+        process = subprocess.Popen([sys.executable, '-c', 'import time\nwhile True: time.sleep(60)'])
+        attach_process(process.pid)
+        returncode = process.wait()
+        raise ConversionError(f"{self.name} converter process for {os.path.basename(src)} exited with {returncode}")
+
+    def _write(self, src, dst):
+        if os.path.basename(src) in self.fail_on:
+            raise ConversionError(f"{self.name} refused {src}")
+        if os.path.basename(src) in self.hang_on:
+            self._hang(src)
+        with open(src, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        if self.seconds_per_doc:
+            time.sleep(self.seconds_per_doc)
+        with open(dst, 'wb') as f:
+            f.write(minimal_pdf([os.path.basename(src), f"sha256 {digest}"]))
+        self.conversions += 1
+        return dst
+
+    def convert(self, src, dst, options=None):
+        if self.session_seconds:
+            time.sleep(self.session_seconds)
+        return self._write(src, dst)
+
+    def convert_many(self, pairs, options=None, cancel_tokens=None):
+        if self.session_seconds:
+            time.sleep(self.session_seconds)
+        cancel_tokens = cancel_tokens or [None] * len(pairs)
+        results = []
+        for (src, dst), token in zip(pairs, cancel_tokens):
+            try:
+                if token:
+                    token.raise_if_cancelled()
+                checkpoint(src)
+                results.append(self._write(src, dst))
+            except Exception as e:
+                results.append(as_timeout(e))
+        return results
+
+def minimal_pdf(lines):
+    """Return the bytes of a one-page PDF showing lines of Latin-1 text."""
+    text = "".join(
+        f"BT /F1 11 Tf 72 {720 - 16 * i} Td ({line.replace(chr(92), '/').replace('(', '[').replace(')', ']')}) Tj ET\n"
+        for i, line in enumerate(lines)
+    ).encode('latin-1', errors='replace')
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(text) + text + b"endstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
@@ -0,0 +1,86 @@
+# tests/test_converter_backends.py
+
+import pytest
+
+from conversion_watchdog import ConversionTimeoutError, ConversionWatchdog, DocumentQuarantined
+from converter_backends import BackendSelector, ConversionError
+from fakes import StandInBackend
+
+@pytest.fixture
+def document(tmp_path):
+    path = tmp_path / "letter.docx"
+    path.write_bytes(b"letter")
+    return str(path)
+
+def names(backends):
+    return [backend.name for backend in backends]
+
+def test_configured_order_stands_until_every_candidate_is_timed(document):
+    first, second = StandInBackend("first"), StandInBackend("second")
+    selector = BackendSelector([first, second])
+    selector._timings = {".docx>.pdf": {"second": 0.1}}
+    assert names(selector.candidates(document)) == ["first", "second"]
+    selector._timings = {".docx>.pdf": {"first": 0.5, "second": 0.1}}
+    assert names(selector.candidates(document)) == ["second", "first"]
+
+def test_benchmark_orders_fastest_first_and_failures_last(document, tmp_path):
+    slow = StandInBackend("slow", seconds_per_doc=0.05)
+    broken = StandInBackend("broken", fail_on=[document])
+    fast = StandInBackend("fast")
+    selector = BackendSelector([slow, broken, fast], cache_path=tmp_path / "timings.json")
+    selector.benchmark(document)
+    assert names(selector.candidates(document)) == ["fast", "slow", "broken"]
+    # The timings are reused by the next app start
+    assert names(BackendSelector([slow, broken, fast], cache_path=tmp_path / "timings.json").candidates(document)) == [
+        "fast", "slow", "broken"
+    ]
+
+def test_fidelity_and_availability_filter_candidates(document):
+    draft = StandInBackend("draft", fidelity='draft')
+    standard = StandInBackend("standard", fidelity='standard')
+    office = StandInBackend("office", fidelity='exact')
+    office.is_available = lambda: False
+    assert names(BackendSelector([draft, standard, office], fidelity='standard').candidates(document)) == ["standard"]
+    assert names(BackendSelector([draft, standard, office], fidelity='draft').candidates(document)) == ["draft", "standard"]
+    with pytest.raises(ConversionError):
+        BackendSelector([draft, standard, office], fidelity='exact').select(document)
+
+def test_conversion_falls_back_to_the_next_backend(document, tmp_path):
+    broken = StandInBackend("broken", fail_on=[document])
+    working = StandInBackend("working")
+    dst = str(tmp_path / "letter.pdf")
+    assert BackendSelector([broken, working]).convert(document, dst) == dst
+    assert working.conversions == 1
+    with open(dst, 'rb') as f:
+        assert f.read().startswith(b"%PDF-")
+
+def test_every_backend_failing_raises_conversion_error(document, tmp_path):
+    selector = BackendSelector([StandInBackend("a", fail_on=[document]), StandInBackend("b", fail_on=[document])])
+    with pytest.raises(ConversionError, match="a: .*b: "):
+        selector.convert(document, str(tmp_path / "letter.pdf"))
+
+def test_hung_converter_is_killed_and_the_document_quarantined(document, tmp_path):
+    watchdog = ConversionWatchdog(deadline=0.5, max_failures=2, quarantine_path=tmp_path / "quarantine.json")
+    hanging = StandInBackend("hanging", hang_on=[document])
+    selector = BackendSelector([hanging], watchdog=watchdog)
+    for _ in range(2):
+        with pytest.raises(ConversionError) as raised:
+            selector.convert(document, str(tmp_path / "letter.pdf"))
+        assert "did not finish" in str(raised.value)
+    assert watchdog.stats['kills'] == 2
+    with pytest.raises(DocumentQuarantined):
+        selector.convert(document, str(tmp_path / "letter.pdf"))
+    watchdog.release(document)
+    assert not watchdog.quarantined()
+
+def test_batch_conversion_times_out_only_the_hung_document(tmp_path):
+    paths = []
+    for name in ("ok.docx", "hangs.docx"):
+        path = tmp_path / name
+        path.write_bytes(name.encode())
+        paths.append(str(path))
+    watchdog = ConversionWatchdog(deadline=0.5)
+    selector = BackendSelector([StandInBackend("stand-in", hang_on=[paths[1]])], watchdog=watchdog)
+    results = selector.convert_many([(p, p.replace(".docx", ".pdf")) for p in paths])
+    assert results[0] == paths[0].replace(".docx", ".pdf")
+    assert isinstance(results[1], (ConversionTimeoutError, ConversionError))
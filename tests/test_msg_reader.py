@@ -0,0 +1,37 @@
+# tests/test_msg_reader.py
+
+import multiprocessing
+import os
+import time
+
+import pytest
+
+import msg_reader
+from msg_reader import MsgAttachment, MsgMessage, ingest_msg_files
+
+def fake_read_msg(path):
+    # Long enough for the workers to be parsing at the same time
+    time.sleep(0.2)
+    with open(path, 'rb') as f:
+        data = f.read()
+    return MsgMessage(path=path, subject=os.path.basename(path), attachments=[MsgAttachment(name="quote.pdf", data=data)])
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_messages_with_the_same_name_get_their_own_folders(workers, tmp_path, monkeypatch):
+    if workers > 1 and multiprocessing.get_start_method() != 'fork':
+        pytest.skip("the patched reader only reaches forked workers")
+    monkeypatch.setattr(msg_reader, 'read_msg', fake_read_msg)
+    paths = []
+    for number in range(6):
+        inbox = tmp_path / f"inbox{number}"
+        inbox.mkdir()
+        path = inbox / "Quote.msg"
+        path.write_bytes(b"%d" % number)
+        paths.append(str(path))
+    results = ingest_msg_files(paths, str(tmp_path / "out"), max_workers=workers)
+    assert all(result.ok for result in results), [result.error for result in results]
+    folders = [os.path.basename(os.path.dirname(result.paths[0])) for result in results]
+    assert folders == ["Quote"] + [f"Quote_{n}" for n in range(1, 6)]
+    for number, result in enumerate(results):
+        with open(result.paths[0], 'rb') as f:
+            assert f.read() == b"%d" % number
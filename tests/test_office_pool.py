@@ -0,0 +1,121 @@
+# tests/test_office_pool.py
+
+import threading
+
+import pytest
+
+from fakes import FakeOfficeFactory
+from office_pool import OfficeInstancePool, OfficeUnavailableError, PoolExhaustedError
+
+def test_checkout_reuses_a_warm_instance():
+    factory = FakeOfficeFactory()
+    pool = OfficeInstancePool(factory, max_size=1)
+    with pool.checkout() as first:
+        pass
+    with pool.checkout() as second:
+        assert pool.process_id(second) == 1001
+    assert first is second
+    assert pool.stats['created'] == 1
+    assert pool.stats['reused'] == 1
+
+def test_instance_is_recycled_after_max_documents():
+    factory = FakeOfficeFactory()
+    pool = OfficeInstancePool(factory, max_documents=2)
+    for _ in range(3):
+        with pool.checkout():
+            pass
+    assert [app.number for app in factory.shut_down] == [1]
+    assert pool.stats['recycled'] == 1
+    assert len(factory.created) == 2
+
+def test_batch_documents_count_towards_recycling():
+    factory = FakeOfficeFactory()
+    pool = OfficeInstancePool(factory, max_documents=5)
+    with pool.checkout() as app:
+        pool.record_document(app, count=5)
+    assert factory.shut_down == [app]
+
+def test_error_inside_checkout_retires_the_instance():
+    factory = FakeOfficeFactory()
+    pool = OfficeInstancePool(factory)
+    with pytest.raises(RuntimeError):
+        with pool.checkout():
+            raise RuntimeError("SaveAs failed")
+    assert factory.created[0].quit
+    with pool.checkout() as app:
+        assert app.number == 2
+
+def test_unhealthy_instance_is_replaced_at_checkout():
+    factory = FakeOfficeFactory()
+    pool = OfficeInstancePool(factory)
+    with pool.checkout() as app:
+        pass
+    app.healthy = False
+    with pool.checkout() as replacement:
+        assert replacement is not app
+    assert app.quit
+    assert pool.stats['unhealthy'] == 1
+
+def test_idle_instances_are_reaped():
+    factory = FakeOfficeFactory()
+    pool = OfficeInstancePool(factory, idle_timeout=60)
+    with pool.checkout() as app:
+        pass
+    assert pool.reap_idle() == 0
+    assert pool.reap_idle(max_idle=0) == 1
+    assert app.quit
+
+def test_checkout_waits_then_gives_up_when_exhausted():
+    factory = FakeOfficeFactory()
+    pool = OfficeInstancePool(factory, max_size=1, checkout_timeout=0.2)
+    with pool.checkout():
+        with pytest.raises(PoolExhaustedError):
+            with pool.checkout():
+                pass
+    assert pool.stats['timeouts'] == 1
+
+def test_checkout_gets_an_instance_released_while_waiting():
+    factory = FakeOfficeFactory()
+    pool = OfficeInstancePool(factory, max_size=1, checkout_timeout=5)
+    leased = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with pool.checkout():
+            leased.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    leased.wait(5)
+    threading.Timer(0.1, release.set).start()
+    with pool.checkout() as app:
+        assert app.number == 1
+    holder.join()
+
+def test_thread_affine_instances_stay_with_their_thread():
+    factory = FakeOfficeFactory(thread_affine=True)
+    pool = OfficeInstancePool(factory, max_size=1)
+    with pool.checkout() as app:
+        pass
+    used = []
+
+    def other_thread():
+        with pool.checkout() as other:
+            used.append(other)
+        pool.shutdown()
+
+    worker = threading.Thread(target=other_thread)
+    worker.start()
+    worker.join()
+    assert used[0] is not app
+    assert not app.quit
+    assert pool.shutdown() == 1
+
+def test_failed_start_raises_office_unavailable():
+    pool = OfficeInstancePool(FakeOfficeFactory(fail_creates=1))
+    with pytest.raises(OfficeUnavailableError):
+        with pool.checkout():
+            pass
+    with pool.checkout() as app:
+        assert app.number == 1
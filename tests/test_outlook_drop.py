@@ -0,0 +1,91 @@
+# tests/test_outlook_drop.py
+
+import os
+import struct
+from datetime import datetime, timezone
+
+import pytest
+
+from fakes import FakeAttachment, FakeFileOps, FakeMailItem, FakeMimeData, FakeOutlookBackend, minimal_pdf
+from filegroup_descriptor import (
+    DESCRIPTOR_A_SIZE, DESCRIPTOR_W_SIZE, FD_FILESIZE, FD_WRITESTIME, DescriptorError,
+    file_contents_format, parse_file_group_descriptor
+)
+from outlook_handler import OLE_OBJECT_FORMAT, OutlookDrop, OutlookHandler
+from outlook_session import OutlookSession
+
+DESCRIPTOR_W_FORMAT = "application/x-qt-windows-mime;value=\"FileGroupDescriptorW\""
+MODIFIED = datetime(2024, 3, 1, 12, 30, tzinfo=timezone.utc)
+
+def filetime(moment):
+    return int((moment - datetime(1601, 1, 1, tzinfo=timezone.utc)).total_seconds() * 10 ** 7)
+
+def descriptor_bytes(files, unicode=True):
+    """A FILEGROUPDESCRIPTOR(W) as Outlook puts it on the clipboard, for (name, size) pairs."""
+    data = bytearray(struct.pack('<I', len(files)))
+    for name, size in files:
+        entry = struct.pack(
+            '<I16s8s8sIQQQII', FD_FILESIZE | FD_WRITESTIME, b'', b'', b'', 0,
+            0, 0, filetime(MODIFIED), size >> 32, size & 0xFFFFFFFF
+        )
+        encoded = name.encode('utf-16le' if unicode else 'cp1252')
+        entry += encoded.ljust((DESCRIPTOR_W_SIZE if unicode else DESCRIPTOR_A_SIZE) - len(entry), b'\0')
+        data += entry
+    return bytes(data)
+
+def test_parses_every_unicode_entry():
+    descriptors = parse_file_group_descriptor(descriptor_bytes([("Angebot Müller.pdf", 10), ("b.docx", 2 ** 33)]))
+    assert [d.name for d in descriptors] == ["Angebot Müller.pdf", "b.docx"]
+    assert [d.size for d in descriptors] == [10, 2 ** 33]
+    assert descriptors[0].modified == MODIFIED
+
+def test_infers_the_ansi_variant_from_the_length():
+    descriptors = parse_file_group_descriptor(memoryview(descriptor_bytes([("quote.pdf", 5)], unicode=False)))
+    assert descriptors[0].name == "quote.pdf"
+
+def test_truncated_descriptor_is_rejected():
+    with pytest.raises(DescriptorError):
+        parse_file_group_descriptor(descriptor_bytes([("a.pdf", 1), ("b.pdf", 1)])[:-100], unicode=True)
+
+def test_drop_snapshot_holds_every_indexed_file_contents():
+    mime = FakeMimeData({
+        DESCRIPTOR_W_FORMAT: descriptor_bytes([("a.pdf", 3), ("b.pdf", 2)]),
+        file_contents_format(0): b"AAA",
+        file_contents_format(1): b"BB",
+    })
+    drop = OutlookDrop.from_mime(mime)
+    assert isinstance(drop.data(DESCRIPTOR_W_FORMAT), memoryview)
+    assert [d.name for d in drop.descriptors()] == ["a.pdf", "b.pdf"]
+    assert bytes(drop.file_contents(1)) == b"BB"
+    assert drop.has_file_contents()
+
+@pytest.fixture
+def handler():
+    pdf = minimal_pdf(["quote"])
+    backend = FakeOutlookBackend({
+        'ENTRY1': FakeMailItem("Quote 42", [FakeAttachment("quote.pdf", pdf)], sender_email="bob@acme.com"),
+    })
+    session = OutlookSession(backend)
+    yield OutlookHandler(FakeFileOps(), None, resource_manager=object(), session=session, inline_image_max_bytes=0)
+    session.stop()
+
+def test_dragged_email_is_found_by_its_entry_id(handler, tmp_path):
+    # Outlook's "Ole Object" format carries the NUL-terminated UTF-16 entry ID
+    drop = OutlookDrop({OLE_OBJECT_FORMAT: memoryview("ENTRY1\0junk".encode('utf-16le'))})
+    batch = handler.get_outlook_items(drop, str(tmp_path))
+    assert batch.subject == "Quote 42"
+    assert batch.sender == "bob@acme.com"
+    assert [os.path.basename(p) for p in batch.paths] == ["quote.pdf"]
+
+def test_dragged_attachments_are_saved_with_their_sizes_and_times(handler, tmp_path):
+    mime = FakeMimeData({
+        DESCRIPTOR_W_FORMAT: descriptor_bytes([("a.pdf", 3), ("a.pdf", 2)]),
+        # Clipboard blocks are rounded up; the descriptor's size is what counts
+        file_contents_format(0): b"AAA\0\0\0\0\0",
+        file_contents_format(1): b"BB",
+    })
+    batch = handler.get_outlook_items(OutlookDrop.from_mime(mime), str(tmp_path))
+    assert [os.path.basename(p) for p in batch.paths] == ["a.pdf", "a_1.pdf"]
+    with open(batch.paths[0], 'rb') as f:
+        assert f.read() == b"AAA"
+    assert os.path.getmtime(batch.paths[0]) == MODIFIED.timestamp()
@@ -0,0 +1,91 @@
+# tests/test_outlook_session.py
+
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import pytest
+
+from fakes import FakeMailItem, FakeOutlookBackend
+from outlook_session import OutlookSession, OutlookUnavailableError
+
+def subject_of(namespace, entry_id):
+    return namespace.GetItemFromID(entry_id).Subject
+
+@pytest.fixture
+def backend():
+    return FakeOutlookBackend({'ID1': FakeMailItem("Quote"), 'ID2': FakeMailItem("Invoice")})
+
+def test_one_connection_serves_every_request(backend):
+    session = OutlookSession(backend)
+    try:
+        assert session.call(subject_of, 'ID1', timeout=5) == "Quote"
+        assert session.call(subject_of, 'ID2', timeout=5) == "Invoice"
+        assert backend.connects == 1
+        assert session.stats['requests'] == 2
+    finally:
+        session.stop()
+    assert not session.connected
+
+def test_lost_session_reconnects_and_retries(backend):
+    session = OutlookSession(backend)
+    try:
+        session.call(subject_of, 'ID1', timeout=5)
+        backend.drop()
+        assert session.call(subject_of, 'ID2', timeout=5) == "Invoice"
+        assert backend.connects == 2
+        assert session.stats['reconnects'] == 1
+    finally:
+        session.stop()
+
+def test_error_from_a_healthy_session_is_not_retried(backend):
+    session = OutlookSession(backend)
+    try:
+        with pytest.raises(LookupError):
+            session.call(subject_of, 'missing', timeout=5)
+        assert backend.connects == 1
+        assert session.stats['failures'] == 1
+    finally:
+        session.stop()
+
+def test_connect_is_retried_with_backoff():
+    backend = FakeOutlookBackend({'ID1': FakeMailItem("Quote")}, failed_connects=2)
+    session = OutlookSession(backend, connect_attempts=3, retry_delay=0)
+    try:
+        assert session.call(subject_of, 'ID1', timeout=5) == "Quote"
+    finally:
+        session.stop()
+
+def test_outlook_not_running_raises_unavailable():
+    session = OutlookSession(FakeOutlookBackend(failed_connects=3), connect_attempts=3, retry_delay=0)
+    try:
+        with pytest.raises(OutlookUnavailableError):
+            session.call(subject_of, 'ID1', timeout=5)
+    finally:
+        session.stop()
+
+def test_idle_session_disconnects_and_restarts_on_demand(backend):
+    session = OutlookSession(backend, idle_timeout=0.1)
+    try:
+        session.call(subject_of, 'ID1', timeout=5)
+        deadline = time.monotonic() + 5
+        while session.connected and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert not session.connected
+        assert not backend.namespaces[0].connected
+        assert session.stats['idle_shutdowns'] == 1
+        assert session.call(subject_of, 'ID2', timeout=5) == "Invoice"
+        assert backend.connects == 2
+    finally:
+        session.stop()
+
+def test_call_times_out_while_the_session_is_busy(backend):
+    session = OutlookSession(backend)
+    release = threading.Event()
+    try:
+        session.submit(lambda namespace: release.wait(5))
+        with pytest.raises(FutureTimeoutError):
+            session.call(subject_of, 'ID1', timeout=0.1)
+    finally:
+        release.set()
+        session.stop()
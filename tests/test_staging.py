@@ -0,0 +1,50 @@
+# tests/test_staging.py
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import staging
+from config import CONFIG
+
+@pytest.fixture
+def local_root(tmp_path, monkeypatch):
+    root = tmp_path / "local" / "staging"
+    monkeypatch.setitem(CONFIG, 'STAGING_DIR', root)
+    return str(root)
+
+def test_drops_are_staged_outside_the_save_folder(local_root, tmp_path):
+    save_dir = tmp_path / "OneDrive" / "Quotes"
+    save_dir.mkdir(parents=True)
+    directory = staging.create_directory(str(save_dir))
+    assert os.path.dirname(directory) == local_root
+    assert os.listdir(save_dir) == []
+    staged = os.path.join(directory, "quote.pdf")
+    assert staging.is_staged(staged)
+    assert not staging.is_staged(str(save_dir / "quote.pdf"))
+    staging.remove_empty(directory)
+    assert not os.path.exists(local_root)
+
+def test_cleanup_removes_stale_and_legacy_staging_folders(local_root, tmp_path):
+    save_dir = tmp_path / "Quotes"
+    save_dir.mkdir()
+    fresh = staging.create_directory(str(save_dir))
+    stale = staging.create_directory(str(save_dir))
+    legacy = save_dir / staging.LEGACY_DIR_NAMES[0] / "abc"
+    legacy.mkdir(parents=True)
+    assert staging.is_staged(str(legacy / "quote.pdf"))
+    old = time.time() - 2 * 24 * 3600
+    for path in (stale, legacy):
+        os.utime(path, (old, old))
+    assert staging.cleanup(str(save_dir)) == 2
+    assert os.path.isdir(fresh)
+    assert not os.path.exists(stale)
+    assert os.listdir(save_dir) == []
+
+def test_staging_and_duplicate_index_import_without_the_document_libraries():
+    code = "import sys, duplicate_index; sys.exit('file_operations' in sys.modules or 'fitz' in sys.modules)"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    assert subprocess.run([sys.executable, "-c", code], cwd=root).returncode == 0
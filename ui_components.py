@@ -542,7 +542,8 @@ class UIComponents:
         if current_item:
             row = self.pending_files_list.row(current_item)
             self.pending_files_list.takeItem(row)
-            self.parent.pending_files.pop(row)
+            removed_file = self.parent.pending_files.pop(row)
+            self.parent.cancel_file_tasks(removed_file)
             
             # Update save button text
             if self.pending_files_list.count() > 1:
@@ -554,6 +555,8 @@ class UIComponents:
 
     def clear_pending_files(self):
         self.pending_files_list.clear()
+        for file_path in self.parent.pending_files:
+            self.parent.cancel_file_tasks(file_path)
         self.parent.pending_files.clear()
         self.save_button.setText("Save")
 
@@ -841,8 +844,16 @@ class UIComponents:
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(value)
 
+    def show_eta(self, seconds):
+        """Show the estimated time left for background work next to the percentage."""
+        if seconds < 0 or self.progress_bar.value() >= 100:
+            self.progress_bar.setFormat("%p%")
+        else:
+            self.progress_bar.setFormat(f"%p% - about {int(seconds) + 1}s left")
+
     def hide_progress(self):
         self.progress_bar.setVisible(False)
+        self.progress_bar.setFormat("%p%")
 
     def show_error_message(self, title, message):
         QMessageBox.critical(self.parent, title, message)
@@ -0,0 +1,501 @@
+# xlsx_renderer.py
+
+import datetime
+import logging
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from typing import Optional
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+def _tag(name):
+    return f"{{{MAIN_NS}}}{name}"
+
+# Built-in number formats that matter for quote sheets (ECMA-376 18.8.30)
+BUILTIN_FORMATS = {
+    0: 'General', 1: '0', 2: '0.00', 3: '#,##0', 4: '#,##0.00',
+    5: '$#,##0;($#,##0)', 6: '$#,##0;[Red]($#,##0)', 7: '$#,##0.00;($#,##0.00)', 8: '$#,##0.00;[Red]($#,##0.00)',
+    9: '0%', 10: '0.00%', 11: '0.00E+00', 12: '# ?/?', 13: '# ??/??',
+    14: 'm/d/yyyy', 15: 'd-mmm-yy', 16: 'd-mmm', 17: 'mmm-yy',
+    18: 'h:mm AM/PM', 19: 'h:mm:ss AM/PM', 20: 'h:mm', 21: 'h:mm:ss', 22: 'm/d/yyyy h:mm',
+    37: '#,##0 ;(#,##0)', 38: '#,##0 ;[Red](#,##0)', 39: '#,##0.00;(#,##0.00)', 40: '#,##0.00;[Red](#,##0.00)',
+    44: '_($* #,##0.00_);_($* (#,##0.00);_($* "-"??_);_(@_)', 45: 'mm:ss', 46: '[h]:mm:ss', 47: 'mmss.0',
+    48: '##0.0E+0', 49: '@',
+}
+
+# Excel column width unit -> points: (chars * 7px + 5px padding) at 96 dpi
+def _width_to_points(width):
+    return (width * 7 + 5) * 0.75
+
+DEFAULT_COLUMN_WIDTH = 8.43
+
+@dataclass
+class CellStyle:
+    number_format: str = 'General'
+    bold: bool = False
+    align: Optional[str] = None
+    wrap: bool = False
+    fill: Optional[str] = None
+    borders: dict = field(default_factory=dict)
+
+@dataclass
+class SheetData:
+    name: str
+    cells: dict = field(default_factory=dict)  # (row, col) -> (value, style index), 1-based
+    column_widths: dict = field(default_factory=dict)
+    hidden_columns: set = field(default_factory=set)
+    hidden_rows: set = field(default_factory=set)
+    print_area: Optional[tuple] = None  # (first_row, first_col, last_row, last_col)
+    landscape: Optional[bool] = None
+    gridlines: bool = False
+    uncached_formulas: int = 0
+
+class XlsxComplexityError(Exception):
+    """Raised when a workbook needs Excel to be rendered faithfully."""
+    pass
+
+def _column_index(letters):
+    index = 0
+    for char in letters:
+        index = index * 26 + (ord(char.upper()) - 64)
+    return index
+
+_CELL_REF = re.compile(r"\$?([A-Za-z]{1,3})\$?(\d+)")
+
+def _parse_ref(ref):
+    match = _CELL_REF.fullmatch(ref)
+    if not match:
+        raise ValueError(f"Bad cell reference: {ref}")
+    return int(match.group(2)), _column_index(match.group(1))
+
+class XlsxWorkbook:
+    """Streaming reader for the parts of a simple .xlsx that are needed to print its first sheet."""
+
+    def __init__(self, path):
+        self.path = path
+        self.zip = zipfile.ZipFile(path)
+        self.names = set(self.zip.namelist())
+        self.date1904 = False
+        self.sheets = []  # (name, part path, state)
+        self.print_areas = {}
+        self._read_workbook()
+
+    def close(self):
+        self.zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read_workbook(self):
+        rels = {}
+        rels_part = 'xl/_rels/workbook.xml.rels'
+        if rels_part in self.names:
+            for rel in ET.fromstring(self.zip.read(rels_part)).iter(f"{{{PKG_REL_NS}}}Relationship"):
+                target = rel.get('Target', '')
+                rels[rel.get('Id')] = target.lstrip('/') if target.startswith('/') else f"xl/{target}"
+
+        root = ET.fromstring(self.zip.read('xl/workbook.xml'))
+        properties = root.find(_tag('workbookPr'))
+        if properties is not None:
+            self.date1904 = properties.get('date1904') in ('1', 'true')
+        for sheet in root.iter(_tag('sheet')):
+            part = rels.get(sheet.get(f"{{{REL_NS}}}id"))
+            self.sheets.append((sheet.get('name'), part, sheet.get('state', 'visible')))
+        for name in root.iter(_tag('definedName')):
+            if name.get('name') == '_xlnm.Print_Area' and name.get('localSheetId') is not None:
+                self.print_areas[int(name.get('localSheetId'))] = (name.text or '').strip()
+
+    def visible_sheets(self):
+        return [s for s in self.sheets if s[2] == 'visible']
+
+    def shared_strings(self):
+        """Read the shared string table incrementally, joining rich-text runs and skipping phonetic hints."""
+        strings = []
+        part = 'xl/sharedStrings.xml'
+        if part not in self.names:
+            return strings
+        with self.zip.open(part) as f:
+            for _, element in ET.iterparse(f, events=('end',)):
+                if element.tag == _tag('si'):
+                    parts = []
+                    for child in element:
+                        if child.tag == _tag('t'):
+                            parts.append(child.text or '')
+                        elif child.tag == _tag('r'):
+                            parts.extend(t.text or '' for t in child.iter(_tag('t')))
+                    strings.append("".join(parts))
+                    element.clear()
+        return strings
+
+    def styles(self):
+        """Return the cellXfs list as CellStyle objects."""
+        part = 'xl/styles.xml'
+        if part not in self.names:
+            return [CellStyle()]
+        root = ET.fromstring(self.zip.read(part))
+        formats = dict(BUILTIN_FORMATS)
+        for fmt in root.iter(_tag('numFmt')):
+            formats[int(fmt.get('numFmtId'))] = fmt.get('formatCode', 'General')
+
+        fonts = []
+        fonts_node = root.find(_tag('fonts'))
+        for font in (fonts_node if fonts_node is not None else []):
+            bold = font.find(_tag('b'))
+            fonts.append(bold is not None and bold.get('val', '1') not in ('0', 'false'))
+
+        fills = []
+        fills_node = root.find(_tag('fills'))
+        for fill in (fills_node if fills_node is not None else []):
+            pattern = fill.find(_tag('patternFill'))
+            colour = None
+            if pattern is not None and pattern.get('patternType') == 'solid':
+                fg = pattern.find(_tag('fgColor'))
+                if fg is not None and fg.get('rgb'):
+                    colour = '#' + fg.get('rgb')[-6:]
+            fills.append(colour)
+
+        borders = []
+        borders_node = root.find(_tag('borders'))
+        for border in (borders_node if borders_node is not None else []):
+            sides = {}
+            for side in ('left', 'right', 'top', 'bottom'):
+                node = border.find(_tag(side))
+                if node is not None and node.get('style'):
+                    sides[side] = 1.0 if node.get('style') in ('medium', 'thick', 'double') else 0.5
+            borders.append(sides)
+
+        styles = []
+        xfs = root.find(_tag('cellXfs'))
+        for xf in (xfs if xfs is not None else []):
+            alignment = xf.find(_tag('alignment'))
+            styles.append(CellStyle(
+                number_format=formats.get(int(xf.get('numFmtId', 0)), 'General'),
+                bold=_pick(fonts, xf.get('fontId'), False),
+                align=alignment.get('horizontal') if alignment is not None else None,
+                wrap=alignment is not None and alignment.get('wrapText') in ('1', 'true'),
+                fill=_pick(fills, xf.get('fillId'), None),
+                borders=_pick(borders, xf.get('borderId'), {}),
+            ))
+        return styles or [CellStyle()]
+
+    def read_sheet(self, index=0, shared_strings=None):
+        """Stream one worksheet's cells, column widths, hidden rows/columns and page setup."""
+        name, part, _ = self.sheets[index]
+        sheet = SheetData(name)
+        shared_strings = self.shared_strings() if shared_strings is None else shared_strings
+        row_number = 0
+        last_col = 0
+
+        with self.zip.open(part) as f:
+            for event, element in ET.iterparse(f, events=('start', 'end')):
+                tag = element.tag
+                if event == 'start':
+                    if tag == _tag('row'):
+                        row_number = int(element.get('r', row_number + 1))
+                        last_col = 0
+                    continue
+                if tag == _tag('c'):
+                    ref = element.get('r')
+                    if ref:
+                        row, col = _parse_ref(ref)
+                    else:
+                        row, col = row_number, last_col + 1
+                    last_col = col
+                    value = _cell_value(element, shared_strings)
+                    if value is None and element.find(_tag('f')) is not None:
+                        sheet.uncached_formulas += 1
+                    if value is not None and value != '':
+                        sheet.cells[(row, col)] = (value, int(element.get('s', 0)))
+                    element.clear()
+                elif tag == _tag('row'):
+                    if element.get('hidden') in ('1', 'true'):
+                        sheet.hidden_rows.add(row_number)
+                    element.clear()
+                elif tag == _tag('col'):
+                    for col in range(int(element.get('min')), int(element.get('max')) + 1):
+                        if element.get('hidden') in ('1', 'true'):
+                            sheet.hidden_columns.add(col)
+                        if element.get('width'):
+                            sheet.column_widths[col] = float(element.get('width'))
+                elif tag == _tag('pageSetup'):
+                    if element.get('orientation'):
+                        sheet.landscape = element.get('orientation') == 'landscape'
+                elif tag == _tag('printOptions'):
+                    sheet.gridlines = element.get('gridLines') in ('1', 'true')
+
+        area = self.print_areas.get(index)
+        if area:
+            sheet.print_area = _parse_print_area(area)
+        return sheet
+
+def _pick(items, index, default):
+    try:
+        return items[int(index)]
+    except (TypeError, ValueError, IndexError):
+        return default
+
+def _cell_value(element, shared_strings):
+    cell_type = element.get('t', 'n')
+    if cell_type == 'inlineStr':
+        inline = element.find(_tag('is'))
+        return "".join(t.text or '' for t in inline.iter(_tag('t'))) if inline is not None else None
+    v = element.find(_tag('v'))
+    if v is None or v.text is None:
+        return None
+    if cell_type == 's':
+        return shared_strings[int(v.text)]
+    if cell_type == 'b':
+        return v.text in ('1', 'true')
+    if cell_type in ('str', 'e'):
+        return v.text
+    try:
+        return float(v.text)
+    except ValueError:
+        return v.text
+
+def _parse_print_area(text):
+    """'Sheet1'!$A$1:$F$40 -> (1, 1, 40, 6); only the first range of a multi-range area is used."""
+    first = text.split(',')[0]
+    reference = first.rsplit('!', 1)[-1]
+    if ':' not in reference:
+        return None
+    start, end = reference.split(':')
+    try:
+        first_row, first_col = _parse_ref(start)
+        last_row, last_col = _parse_ref(end)
+    except ValueError:
+        return None
+    return first_row, first_col, last_row, last_col
+
+# --- number formatting ---------------------------------------------------------------
+
+_QUOTED = re.compile(r'"[^"]*"|\\.|\[[^\]]*\]|_.|\*.')
+
+def _is_date_format(code):
+    bare = _QUOTED.sub('', code).lower()
+    return any(token in bare for token in ('y', 'd', 'h', 's')) or ('m' in bare and not any(c in bare for c in '0#'))
+
+def format_value(value, number_format, date1904=False):
+    """Render a cell value roughly the way Excel displays it for the common quote-sheet formats."""
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if not isinstance(value, float):
+        return str(value)
+
+    sections = number_format.split(';')
+    code = sections[0]
+    if value < 0 and len(sections) > 1 and sections[1]:
+        code = sections[1]
+        negative_in_format = True
+    else:
+        negative_in_format = False
+
+    if number_format in ('General', '@'):
+        if value.is_integer() and abs(value) < 1e15:
+            return str(int(value))
+        return f"{value:.10g}"
+
+    if _is_date_format(code):
+        base = datetime.datetime(1904, 1, 1) if date1904 else datetime.datetime(1899, 12, 30)
+        moment = base + datetime.timedelta(days=value)
+        bare = _QUOTED.sub('', code).lower()
+        has_date = any(c in bare for c in 'yd') or 'mmm' in bare
+        has_time = 'h' in bare or 's' in bare
+        date_text = f"{moment.month}/{moment.day}/{moment.year}"
+        time_text = f"{moment.hour}:{moment.minute:02d}"
+        if has_date and has_time:
+            return f"{date_text} {time_text}"
+        return time_text if has_time else date_text
+
+    bare = _QUOTED.sub('', code)
+    percent = '%' in bare
+    number = abs(value) if negative_in_format else value
+    if percent:
+        number *= 100
+    decimals = len(re.match(r'[0#?]*', bare.split('.', 1)[1]).group(0)) if '.' in bare else 0
+    if 'E+' in bare.upper():
+        text = f"{number:.{decimals}E}"
+    elif ',' in bare:
+        text = f"{number:,.{decimals}f}"
+    else:
+        text = f"{number:.{decimals}f}"
+    if percent:
+        text += '%'
+    currency = next((c for c in ('$', '€', '£', '¥') if c in code), '')
+    if currency:
+        text = text.replace('-', '-' + currency, 1) if text.startswith('-') else currency + text
+    if negative_in_format and '(' in code:
+        text = f"({text})"
+    elif negative_in_format:
+        text = f"-{text}"
+    return text
+
+# --- complexity detection ---------------------------------------------------------------
+
+_MERGE_MARKER = b'mergeCell '
+
+def _part_contains(zf, part, marker, chunk_size=256 * 1024):
+    """Search a zip member for a byte marker without loading it whole."""
+    overlap = b''
+    with zf.open(part) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return False
+            if marker in overlap + chunk:
+                return True
+            overlap = chunk[-len(marker):]
+
+def assess_workbook(path, max_cells=100000):
+    """
+    Return the reasons a workbook is too complex for the fast renderer (empty if it is simple).
+
+    Charts, drawings and images, macros, pivot tables, embedded objects, several visible
+    sheets and merged cells all need Excel to print faithfully.
+    """
+    reasons = []
+    try:
+        with XlsxWorkbook(path) as workbook:
+            names = workbook.names
+            if 'xl/vbaProject.bin' in names:
+                reasons.append('macros')
+            if any(n.startswith(('xl/charts/', 'xl/chartsheets/')) for n in names):
+                reasons.append('charts')
+            if any(n.startswith(('xl/drawings/', 'xl/media/')) for n in names):
+                reasons.append('drawings or images')
+            if any(n.startswith('xl/pivotTables/') for n in names):
+                reasons.append('pivot tables')
+            if any(n.startswith(('xl/embeddings/', 'xl/activeX/')) for n in names):
+                reasons.append('embedded objects')
+            visible = workbook.visible_sheets()
+            if len(visible) != 1:
+                reasons.append(f'{len(visible)} visible sheets')
+            else:
+                part = visible[0][1]
+                if not part or part not in names:
+                    reasons.append('missing worksheet part')
+                else:
+                    if _part_contains(workbook.zip, part, _MERGE_MARKER):
+                        reasons.append('merged cells')
+                    # Uncompressed sheet XML is roughly 30-60 bytes per cell
+                    if workbook.zip.getinfo(part).file_size > max_cells * 60:
+                        reasons.append('very large sheet')
+    except (zipfile.BadZipFile, KeyError, ET.ParseError, OSError) as e:
+        reasons.append(f'unreadable: {e}')
+    return reasons
+
+# --- rendering ---------------------------------------------------------------
+
+def render_xlsx_to_pdf(xlsx_path, pdf_path, check_complexity=True):
+    """
+    Print the single visible sheet of a simple workbook to PDF with reportlab.
+
+    Honours the print area, hidden rows/columns, column widths, orientation, bold fonts,
+    horizontal alignment, solid fills and cell borders. Raises XlsxComplexityError for
+    workbooks that should go to Excel instead.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+    from xml.sax.saxutils import escape
+
+    if check_complexity:
+        reasons = assess_workbook(xlsx_path)
+        if reasons:
+            raise XlsxComplexityError(f"{os.path.basename(xlsx_path)} needs Excel: {', '.join(reasons)}")
+
+    with XlsxWorkbook(xlsx_path) as workbook:
+        index = workbook.sheets.index(workbook.visible_sheets()[0])
+        sheet = workbook.read_sheet(index)
+        styles = workbook.styles()
+        date1904 = workbook.date1904
+    if sheet.uncached_formulas:
+        # Saved by something other than Excel; only Excel can calculate the missing results
+        raise XlsxComplexityError(
+            f"{os.path.basename(xlsx_path)} has {sheet.uncached_formulas} formulas without saved results"
+        )
+
+    if sheet.print_area:
+        first_row, first_col, last_row, last_col = sheet.print_area
+    elif sheet.cells:
+        rows = [r for r, _ in sheet.cells]
+        cols = [c for _, c in sheet.cells]
+        first_row, first_col, last_row, last_col = min(rows), min(cols), max(rows), max(cols)
+    else:
+        first_row = first_col = last_row = last_col = 1
+
+    row_numbers = [r for r in range(first_row, last_row + 1) if r not in sheet.hidden_rows]
+    col_numbers = [c for c in range(first_col, last_col + 1) if c not in sheet.hidden_columns]
+    widths = [_width_to_points(sheet.column_widths.get(c, DEFAULT_COLUMN_WIDTH)) for c in col_numbers]
+
+    margin = 0.5 * inch
+    portrait_width = letter[0] - 2 * margin
+    use_landscape = sheet.landscape if sheet.landscape is not None else sum(widths) > portrait_width
+    page = landscape(letter) if use_landscape else letter
+    usable_width = page[0] - 2 * margin
+    # Fit to one page wide, as most quote sheets are set up to print
+    scale = min(1.0, usable_width / sum(widths)) if widths else 1.0
+    font_size = max(5.0, 9 * scale)
+    widths = [w * scale for w in widths]
+
+    normal = ParagraphStyle('cell', fontName='Helvetica', fontSize=font_size, leading=font_size * 1.2)
+    bold = ParagraphStyle('cell-bold', parent=normal, fontName='Helvetica-Bold')
+    alignments = {'center': 'CENTER', 'centerContinuous': 'CENTER', 'right': 'RIGHT', 'left': 'LEFT'}
+
+    data = []
+    commands = [
+        ('FONT', (0, 0), (-1, -1), 'Helvetica', font_size),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 0), (-1, -1), 1),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+    ]
+    if sheet.gridlines:
+        commands.append(('GRID', (0, 0), (-1, -1), 0.25, colors.lightgrey))
+
+    for y, row in enumerate(row_numbers):
+        data_row = []
+        for x, col in enumerate(col_numbers):
+            value, style_index = sheet.cells.get((row, col), ('', 0))
+            style = styles[style_index] if style_index < len(styles) else styles[0]
+            text = format_value(value, style.number_format, date1904) if value != '' else ''
+            if style.wrap and text:
+                data_row.append(Paragraph(escape(text), bold if style.bold else normal))
+            else:
+                data_row.append(text)
+                if style.bold and text:
+                    commands.append(('FONT', (x, y), (x, y), 'Helvetica-Bold', font_size))
+            align = alignments.get(style.align)
+            if align is None and isinstance(value, float):
+                align = 'RIGHT'  # Excel's General alignment puts numbers on the right
+            if align:
+                commands.append(('ALIGN', (x, y), (x, y), align))
+            if style.fill:
+                commands.append(('BACKGROUND', (x, y), (x, y), colors.HexColor(style.fill)))
+            for side, command in (('left', 'LINEBEFORE'), ('right', 'LINEAFTER'),
+                                  ('top', 'LINEABOVE'), ('bottom', 'LINEBELOW')):
+                if side in style.borders:
+                    commands.append((command, (x, y), (x, y), style.borders[side] * scale, colors.black))
+        data.append(data_row)
+
+    document = SimpleDocTemplate(
+        pdf_path, pagesize=page, leftMargin=margin, rightMargin=margin, topMargin=margin, bottomMargin=margin,
+        title=sheet.name
+    )
+    if data and widths:
+        table = Table(data, colWidths=widths, hAlign='LEFT')
+        table.setStyle(TableStyle(commands))
+        document.build([table])
+    else:
+        document.build([Spacer(1, 1)])
+    logging.debug(f"Rendered {xlsx_path} ({len(row_numbers)}x{len(col_numbers)}) with reportlab")
+    return pdf_path